@@ -8,6 +8,15 @@
 
 from byteplug.document.types import *
 from byteplug.document.specs import validate_specs
-from byteplug.document.document import document_to_object
-from byteplug.document.object import object_to_document
+from byteplug.document.compiler import compile_specs
+from byteplug.document.document import document_to_object, validate_document
+from byteplug.document.document import decoded_document_to_object, validate_decoded_document
+from byteplug.document.object import object_to_document, validate_object
+from byteplug.document.object import iter_object_to_document, write_object_to_document
+from byteplug.document.streaming import iter_document_items, validate_document_stream, iter_documents_to_objects
+from byteplug.document.binary import object_to_binary, binary_to_object
+from byteplug.document.messagepack import msgpack_to_object, object_to_msgpack
+from byteplug.document.cbor import cbor_to_object, object_to_cbor
+from byteplug.document.files import document_file_to_object, validate_document_file, iter_document_file_to_objects
+from byteplug.document.records import Record
 from byteplug.document.exception import ValidationError, ValidationWarning
@@ -0,0 +1,291 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import json
+import operator
+from byteplug.document.utils import LIST_ITEM_SEGMENT, FIELD_SEGMENT
+from byteplug.document.exception import ValidationError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Notes:
+# - This module implements the validation and conversion of NumPy arrays, in
+#   place of Python lists, by the 'object' module (and its generated
+#   functions). NumPy is an optional dependency; without it, ndarray is None
+#   and arrays are never accepted.
+# - Arrays are accepted for the lists of flags, integers and decimals (as
+#   one-dimensional arrays of bool, integer and floating-point types), and
+#   for the lists of maps whose fields are scalars (as structured arrays with
+#   one field per field of the maps; strings are either Unicode or object
+#   fields, and enums are either strings or the index of their value in the
+#   sorted values of the enum).
+# - The items are checked per field, as a whole, and converted to Python
+#   values with tolist(); the errors of the items are the same (and reported
+#   in the same order) as the errors of the equivalent list of Python values.
+#   Arrays of the wrong type (or shape) are reported as a whole. Any change
+#   of the messages of the 'object' module must be reflected here.
+# - Specs that are nested too deeply to be walked recursively don't accept
+#   arrays.
+
+__all__ = [
+    'ndarray',
+    'accepts_arrays',
+    'compare_array',
+    'adjust_array_node',
+    'validate_array_node',
+    'encode_array_node'
+]
+
+ndarray = numpy.ndarray if numpy is not None else None
+
+SCALAR_TYPES = ('flag', 'integer', 'decimal', 'string', 'enum')
+
+# The kinds of array (see numpy.dtype.kind) accepted for each type.
+array_kinds = {
+    'flag'   : 'b',
+    'integer': 'iu',
+    'decimal': 'f',
+    'string' : 'UO',
+    'enum'   : 'UOiu'
+}
+
+array_messages = {
+    'flag'   : "was expecting an array of booleans",
+    'integer': "was expecting an array of integers",
+    'decimal': "was expecting an array of floats",
+    'string' : "was expecting an array of strings",
+    'enum'   : "was expecting an array of strings or integers",
+    'map'    : "was expecting a structured array"
+}
+
+bound_operators = {
+    # (is_minimum, is_exclusive): operator a valid node satisfies
+    (True, True)  : operator.gt,
+    (True, False) : operator.ge,
+    (False, True) : operator.lt,
+    (False, False): operator.le
+}
+
+bound_messages = {
+    (True, True)  : "value must be strictly greater than {}",
+    (True, False) : "value must be equal or greater than {}",
+    (False, True) : "value must be strictly lower than {}",
+    (False, False): "value must be equal or lower than {}"
+}
+
+def accepts_arrays(specs):
+    """ Tell whether arrays are accepted in place of the lists of a specs. """
+
+    value = specs.value
+    if value.type in ('flag', 'integer', 'decimal'):
+        return True
+    elif value.type == 'map':
+        return all(field.type in SCALAR_TYPES for field in value.fields.values())
+
+    return False
+
+def compare_array(array, bound, is_minimum):
+    """ Return the mask of the items of an array that don't satisfy a bound.
+
+    The items are compared like Python values would be; NaN never satisfies
+    a bound.
+    """
+
+    is_exclusive, value = bound
+    operator_ = bound_operators[(is_minimum, is_exclusive)]
+
+    if array.dtype.kind in 'iu':
+        # Bounds that don't fit in the type of the array give the same result
+        # for all items.
+        info = numpy.iinfo(array.dtype)
+        if not (info.min <= value <= info.max):
+            return numpy.full(len(array), not operator_(int(info.min), value))
+    else:
+        # Integer bounds that have no exact float form are compared to the
+        # items one by one.
+        if type(value) is int:
+            try:
+                is_exact = float(value) == value
+            except OverflowError:
+                is_exact = False
+
+            if not is_exact:
+                return numpy.fromiter((not operator_(item, value) for item in array.tolist()), numpy.bool_, len(array))
+
+        # Python floats are double precision.
+        array = array.astype(numpy.float64, copy=False)
+
+    return ~operator_(array, value)
+
+def check_items(array, specs, item_path, position, item_errors):
+    # Check the items of a one-dimensional array (of the right kind) against
+    # the specs of its items, and return them as Python values. The errors
+    # are added to item_errors along with the index of their item and the
+    # position of their field, so they can be sorted.
+    type_ = specs.type
+    items = array.tolist()
+
+    # The masks of the invalid items along with their message, in the order
+    # the checks are made on a single item.
+    masks = []
+
+    if type_ == 'integer' or type_ == 'decimal':
+        for is_minimum, bound in ((True, specs.minimum), (False, specs.maximum)):
+            if bound:
+                message = bound_messages[(is_minimum, bound[0])].format(bound[1])
+                masks.append((compare_array(array, bound, is_minimum), message))
+    elif type_ == 'string' or (type_ == 'enum' and array.dtype.kind in 'UO'):
+        is_string = numpy.ones(len(items), dtype=numpy.bool_)
+        if array.dtype.kind == 'O':
+            is_string = numpy.fromiter((type(item) is str for item in items), numpy.bool_, len(items))
+            masks.append((~is_string, "was expecting a string"))
+
+        if type_ == 'string':
+            lengths = numpy.fromiter((len(item) if type(item) is str else 0 for item in items), numpy.int64, len(items))
+
+            if specs.length is not None:
+                masks.append((is_string & (lengths != specs.length), f"length must be equal to {specs.length}"))
+            if specs.minimum_length is not None:
+                masks.append((is_string & ~(lengths >= specs.minimum_length), f"length must be equal or greater than {specs.minimum_length}"))
+            if specs.maximum_length is not None:
+                masks.append((is_string & ~(lengths <= specs.maximum_length), f"length must be equal or lower than {specs.maximum_length}"))
+            if specs.pattern is not None:
+                match = specs.pattern.match
+                mismatches = (type(item) is str and match(item) is None for item in items)
+                masks.append((numpy.fromiter(mismatches, numpy.bool_, len(items)), "value did not match the pattern"))
+        else:
+            # Only the distinct items are looked up.
+            values = specs.values
+            strings = [item if type(item) is str else '' for item in items]
+            distinct_items, inverse = numpy.unique(numpy.array(strings, dtype=numpy.object_), return_inverse=True)
+            is_value = numpy.array([item in values for item in distinct_items.tolist()], dtype=numpy.bool_)
+            masks.append((is_string & ~is_value[inverse.reshape(-1)], "enum value is invalid"))
+    elif type_ == 'enum':
+        # The items are the index of their value in the sorted values.
+        values = sorted(specs.values)
+        is_invalid = (array < 0) | (array >= len(values))
+        masks.append((is_invalid, "enum value is invalid"))
+
+        if not is_invalid.any():
+            items = [values[item] for item in items]
+
+    for mask, message in masks:
+        for index in numpy.flatnonzero(mask).tolist():
+            error = ValidationError(item_path(index), message)
+            item_errors.append((index, position, error))
+
+    return items
+
+def process_array_node(path, node, specs, errors, warnings, adjust):
+    if node.ndim != 1:
+        error = ValidationError(path, array_messages[specs.value.type])
+        errors.append(error)
+        return
+
+    # Same as check_list_node() of the 'object' module.
+    length = specs.length
+    if length is not None:
+        if len(node) != length:
+            error = ValidationError(path, f"length must be equal to {length}")
+            errors.append(error)
+            return
+
+    minimum = specs.minimum_length
+    if minimum is not None:
+        if not (len(node) >= minimum):
+            error = ValidationError(path, f"length must be equal or greater than {minimum}")
+            errors.append(error)
+            return
+
+    maximum = specs.maximum_length
+    if maximum is not None:
+        if not (len(node) <= maximum):
+            error = ValidationError(path, f"length must be equal or lower than {maximum}")
+            errors.append(error)
+            return
+
+    value = specs.value
+    item_errors = []
+
+    if value.type != 'map':
+        if node.dtype.kind not in array_kinds[value.type]:
+            error = ValidationError(path, array_messages[value.type])
+            errors.append(error)
+            return
+
+        item_path = lambda index: (path, LIST_ITEM_SEGMENT, index)
+        adjusted_node = check_items(node, value, item_path, 0, item_errors)
+    else:
+        names = node.dtype.names
+        if names is None:
+            error = ValidationError(path, array_messages['map'])
+            errors.append(error)
+            return
+
+        # The fields are checked once for all the items.
+        fields = value.fields
+        node_errors = []
+
+        for name in names:
+            field = fields.get(name)
+            if field is None:
+                error = ValidationError(path, f"'{name}' field was unexpected")
+                node_errors.append(error)
+            elif node.dtype[name].kind not in array_kinds[field.type] or node.dtype[name].shape != ():
+                error = ValidationError(path, f"'{name}' field {array_messages[field.type]}")
+                node_errors.append(error)
+
+        for name in fields.keys():
+            if name not in names:
+                error = ValidationError(path, f"'{name}' field was missing")
+                node_errors.append(error)
+
+        if len(node_errors) > 0:
+            errors.extend(node_errors)
+            return
+
+        columns = []
+        for position, name in enumerate(names):
+            item_path = lambda index, name=name: ((path, LIST_ITEM_SEGMENT, index), FIELD_SEGMENT, name)
+            columns.append(check_items(node[name], fields[name], item_path, position, item_errors))
+
+        adjusted_node = None
+        if adjust and len(item_errors) == 0:
+            adjusted_node = [dict(zip(names, items)) for items in zip(*columns)]
+
+    if len(item_errors) > 0:
+        # The errors of the items are reported in the order of the items (and
+        # of their fields), the order doesn't change between the checks of a
+        # single field.
+        item_errors.sort(key=lambda item_error: item_error[:2])
+        errors.extend(error for _, _, error in item_errors)
+        return
+
+    return adjusted_node
+
+def adjust_array_node(path, node, specs, errors, warnings):
+    """ Same as process_list_node() of the 'object' module for arrays. """
+
+    return process_array_node(path, node, specs, errors, warnings, True)
+
+def validate_array_node(path, node, specs, errors, warnings):
+    """ Same as validate_list_node() of the 'object' module for arrays. """
+
+    process_array_node(path, node, specs, errors, warnings, False)
+
+def encode_array_node(path, node, specs, errors, warnings):
+    """ Same as adjust_array_node() but return the JSON document of the node.
+
+    The document is the same as the one the standard library json.dumps()
+    encodes (null if the node is invalid).
+    """
+
+    return json.dumps(process_array_node(path, node, specs, errors, warnings, True))
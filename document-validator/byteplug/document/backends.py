@@ -0,0 +1,228 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import json
+import math
+
+# Notes:
+# - This module implements the registry of the JSON parsers and encoders used
+#   by document_to_object() and object_to_document() (and their validate_
+#   counterparts). The standard library 'json' module is always available;
+#   the 'orjson' backend is registered if the package is installed.
+# - A backend is only in charge of turning a JSON document into JSON values
+#   (and back); everything else (int vs float distinction, tuples, etc.) is
+#   done by the 'document' and 'object' modules so it stays the same
+#   regardless of the backend.
+# - The documents and the objects a backend can't handle like the standard
+#   library 'json' module does (according to its capabilities) are parsed
+#   and encoded by the standard library instead (see load_json() and
+#   dump_json()), so the result is the same regardless of the backend. The
+#   documents are looked up for integers that may not fit in 64 bits (any run
+#   of 19 digits, in numbers or in strings) and the objects for non-finite
+#   floats; the checks only cost a fallback when they're wrong.
+# - Backends must raise a ValueError (like json.JSONDecodeError) when the
+#   document is not valid JSON, and a RecursionError when the document (or the
+#   object) is nested too deeply for them.
+
+__all__ = [
+    'JSONBackend',
+    'register_json_backend',
+    'unregister_json_backend',
+    'get_json_backend',
+    'get_json_backends',
+    'set_json_backend'
+]
+
+class JSONBackend:
+    """ A JSON parser and encoder along with its capabilities.
+
+    - name: the name the backend is registered with
+    - loads: function that parses a JSON document (a str, or a UTF-8 encoded
+      bytes-like object if it has the bytes_input capability) into JSON
+      values (dict, list, str, int, float, bool and None)
+    - dumps: function that encodes JSON values (where tuples are allowed in
+      place of lists) to a JSON document, as a str
+    - bytes_input: the parser accepts UTF-8 encoded bytes, bytearray and
+      memoryview documents directly; otherwise, they're decoded to a str
+      first
+    - big_integers: integers that don't fit in 64 bits are parsed to (and
+      encoded from) int; otherwise, the parser is expected to return them as
+      float and the encoder to raise a TypeError
+    - allow_nan: the NaN, Infinity and -Infinity literals (and the numbers
+      that overflow a float) are parsed to (and encoded from) float;
+      otherwise, the parser is expected to reject them and how the encoder
+      handles them is up to the backend
+    - separators: the (item_separator, key_separator) tuple the encoder puts
+      between the items of arrays (and objects), and between the keys and
+      the values of objects
+    """
+
+    __slots__ = ('name', 'loads', 'dumps', 'bytes_input', 'big_integers', 'allow_nan', 'separators')
+
+    def __init__(self, name, loads, dumps, bytes_input=False, big_integers=True, allow_nan=True, separators=(', ', ': ')):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.bytes_input = bytes_input
+        self.big_integers = big_integers
+        self.allow_nan = allow_nan
+        self.separators = separators
+
+json_backends = {}
+default_json_backend = None
+
+def register_json_backend(backend):
+    """ Register a JSON backend (replacing the one with the same name). """
+
+    assert isinstance(backend, JSONBackend), "backend must be a JSONBackend"
+
+    json_backends[backend.name] = backend
+
+def unregister_json_backend(backend):
+    """ Unregister a JSON backend.
+
+    The backend is either the name of a registered backend or a JSONBackend
+    object. The default backend can't be unregistered.
+    """
+
+    backend = get_json_backend(backend)
+    assert backend is not default_json_backend, "the default JSON backend can't be unregistered"
+    assert json_backends.get(backend.name) is backend, f"'{backend.name}' JSON backend is not registered"
+
+    del json_backends[backend.name]
+
+def get_json_backend(backend=None):
+    """ Return a registered JSON backend.
+
+    The backend is either the name of a registered backend or a JSONBackend
+    object (which is returned as is). If it's None, the default backend is
+    returned.
+    """
+
+    if backend is None:
+        return default_json_backend
+    elif isinstance(backend, JSONBackend):
+        return backend
+
+    assert backend in json_backends, f"'{backend}' JSON backend is not registered"
+
+    return json_backends[backend]
+
+def get_json_backends():
+    """ Return the names of the registered JSON backends. """
+
+    return list(json_backends.keys())
+
+def set_json_backend(backend):
+    """ Set the JSON backend used when none is passed.
+
+    The backend is either the name of a registered backend or a JSONBackend
+    object. The standard library 'json' module is the default backend.
+    """
+
+    global default_json_backend
+    default_json_backend = get_json_backend(backend)
+
+# The digits are translated to '0' and everything else to a space, so the runs
+# of digits are looked up with a substring search (a regular expression is
+# slower than most parsers).
+DIGITS_TABLE = bytes(ord('0') if byte in b'0123456789' else ord(' ') for byte in range(256))
+LONG_NUMBER = b'0' * 19
+
+def has_long_numbers(document):
+    if isinstance(document, str):
+        document = document.encode('utf-8', 'surrogatepass')
+
+    return LONG_NUMBER in bytes(document).translate(DIGITS_TABLE)
+
+def load_json(document, backend):
+    """ Parse a JSON document with a backend.
+
+    The document is a str, or a UTF-8 encoded bytes-like object if the
+    backend has the bytes_input capability. Documents the backend can't parse
+    like the standard library does are parsed by the standard library.
+    """
+
+    if not backend.big_integers and has_long_numbers(document):
+        return loads_fallback(document)
+
+    try:
+        return backend.loads(document)
+    except ValueError:
+        # Invalid documents are reported by the standard library too.
+        if backend.allow_nan:
+            raise
+
+        return loads_fallback(document)
+
+def loads_fallback(document):
+    if not isinstance(document, str):
+        document = str(document, 'utf-8', 'surrogatepass')
+
+    return json.loads(document)
+
+def has_non_finite_numbers(value):
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        type_ = type(value)
+        if type_ is float:
+            if not math.isfinite(value):
+                return True
+        elif type_ is dict:
+            stack.extend(value.values())
+        elif type_ is list or type_ is tuple:
+            stack.extend(value)
+
+    return False
+
+def dump_json(value, backend):
+    """ Encode JSON values with a backend.
+
+    Values the backend can't encode like the standard library does are
+    encoded by the standard library (with the separators of the backend, and
+    the non-ASCII characters as is).
+    """
+
+    if not backend.allow_nan and has_non_finite_numbers(value):
+        return json.dumps(value, ensure_ascii=False, separators=backend.separators)
+
+    try:
+        return backend.dumps(value)
+    except TypeError:
+        if backend.big_integers:
+            raise
+
+        return json.dumps(value, ensure_ascii=False, separators=backend.separators)
+
+# The standard library parses and encodes the NaN, Infinity and -Infinity
+# literals by default.
+register_json_backend(JSONBackend('json', json.loads, json.dumps))
+set_json_backend('json')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def orjson_dumps(object):
+        try:
+            return orjson.dumps(object).decode('utf-8')
+        except TypeError as error:
+            # The encoder doesn't distinguish its own recursion limit from
+            # other errors.
+            if str(error) == "Recursion limit reached":
+                raise RecursionError(str(error)) from None
+
+            raise
+
+    # Note that orjson encodes the NaN and infinite numbers as null, and
+    # parses the integers that don't fit in 64 bits as float.
+    register_json_backend(JSONBackend('orjson', orjson.loads, orjson_dumps,
+        bytes_input=True, big_integers=False, allow_nan=False, separators=(',', ':')))
@@ -0,0 +1,399 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import struct
+from byteplug.document.tiering import track_specs
+from byteplug.document.traversal import MAXIMUM_RECURSIVE_DEPTH, adjust_node_iteratively
+from byteplug.document.object import adjust_node_map, check_node_map, validate_node
+from byteplug.document.arrays import ndarray, accepts_arrays, adjust_array_node
+from byteplug.document.utils import FailFastErrors, StopValidation
+from byteplug.document.exception import ValidationError
+
+# Notes:
+# - This module implements a compact binary encoding of the Python objects
+#   that is driven by the specs; nothing that the specs already tells (the
+#   types, the field names, the arity of the tuples and the values of the
+#   enums) is written. Both sides must use structurally equal specs.
+# - The nodes are encoded as follow.
+#   - flag: one byte (0 or 1)
+#   - integer: zigzag-encoded varint (of any size)
+#   - decimal: 8 bytes, IEEE 754 double precision, little-endian
+#   - string: varint length of its UTF-8 form followed by its UTF-8 form
+#   - enum: varint index of the value in the sorted values
+#   - list: varint length followed by the items
+#   - tuple: the items
+#   - map: the values of the fields, sorted by field name
+#   Nodes that are optional are prefixed with one byte, 0 if the node is null
+#   (and nothing follows), 1 otherwise.
+# - The enum values and the fields are sorted so the encoding doesn't depend on
+#   the order they're listed in the specs, just like the compiled specs (see
+#   the 'cache' module).
+# - Objects are validated like validate_object() does before being encoded,
+#   and the decoded objects are validated the same way; the encoder and the
+#   decoder only deal with valid objects. The encoders and decoders of the
+#   nodes are built on first use and kept in the compiled specs; the nodes
+#   that are nested too deeply to be built recursively (see the 'traversal'
+#   module) are built when they're first used by their parent.
+# - NumPy arrays (see the 'arrays' module) are converted to Python values
+#   before being encoded; their items can't be encoded as is (NumPy integers
+#   overflow, structured arrays have no fields by name, etc.).
+# - Binary data that doesn't match the specs raises a ValueError, like the
+#   JSON parser does with invalid JSON documents.
+
+__all__ = ['object_to_binary', 'binary_to_object']
+
+pack_double = struct.Struct('<d').pack
+unpack_double = struct.Struct('<d').unpack_from
+
+def encode_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    buffer.append(value)
+
+def decode_varint(data, offset):
+    byte = data[offset]
+    offset += 1
+    if byte < 0x80:
+        return byte, offset
+
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        byte = data[offset]
+        offset += 1
+
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+
+        shift += 7
+
+def make_child_encoder(specs):
+    # Same as make_encoder() for the children of the containers; the encoder
+    # of a child that is nested too deeply is built on its first use.
+    if specs.depth <= MAXIMUM_RECURSIVE_DEPTH:
+        return make_encoder(specs)
+
+    def encode(buffer, node):
+        encode_child = specs.binary_encoder
+        if encode_child is None:
+            encode_child = specs.binary_encoder = make_encoder(specs)
+
+        encode_child(buffer, node)
+
+    return encode
+
+def make_child_decoder(specs):
+    # Same as make_decoder() for the children of the containers; the decoder
+    # of a child that is nested too deeply is built on its first use.
+    if specs.depth <= MAXIMUM_RECURSIVE_DEPTH:
+        return make_decoder(specs)
+
+    def decode(data, offset):
+        decode_child = specs.binary_decoder
+        if decode_child is None:
+            decode_child = specs.binary_decoder = make_decoder(specs)
+
+        return decode_child(data, offset)
+
+    return decode
+
+def make_encoder(specs):
+    # Return a function that appends the binary form of a valid node to a
+    # bytearray.
+    type_ = specs.type
+
+    if type_ == 'flag':
+        def encode(buffer, node):
+            buffer.append(1 if node else 0)
+    elif type_ == 'integer':
+        def encode(buffer, node):
+            encode_varint(buffer, node << 1 if node >= 0 else (-node << 1) - 1)
+    elif type_ == 'decimal':
+        def encode(buffer, node):
+            buffer += pack_double(node)
+    elif type_ == 'string':
+        def encode(buffer, node):
+            data = node.encode('utf-8', 'surrogatepass')
+            encode_varint(buffer, len(data))
+            buffer += data
+    elif type_ == 'enum':
+        indexes = {value: index for index, value in enumerate(sorted(specs.values))}
+        def encode(buffer, node):
+            encode_varint(buffer, indexes[node])
+    elif type_ == 'list':
+        encode_item = make_child_encoder(specs.value)
+        is_array_accepted = ndarray is not None and accepts_arrays(specs)
+        def encode(buffer, node):
+            if is_array_accepted and type(node) is ndarray:
+                # The array is valid, there are no errors to collect.
+                node = adjust_array_node("root", node, specs, [], [])
+
+            encode_varint(buffer, len(node))
+            for item in node:
+                encode_item(buffer, item)
+    elif type_ == 'tuple':
+        encoders = tuple(make_child_encoder(value) for value in specs.values)
+        def encode(buffer, node):
+            for encode_item, item in zip(encoders, node):
+                encode_item(buffer, item)
+    elif type_ == 'map':
+        fields = tuple((key, make_child_encoder(specs.fields[key])) for key in sorted(specs.fields))
+        def encode(buffer, node):
+            for key, encode_field in fields:
+                encode_field(buffer, node[key])
+
+    if not specs.option:
+        return encode
+
+    def encode_option(buffer, node):
+        if node is None:
+            buffer.append(0)
+        else:
+            buffer.append(1)
+            encode(buffer, node)
+
+    return encode_option
+
+def make_decoder(specs):
+    # Return a function that decodes a node from the data at the given offset,
+    # and returns it along with the offset of what follows.
+    type_ = specs.type
+
+    if type_ == 'flag':
+        def decode(data, offset):
+            byte = data[offset]
+            if byte > 1:
+                raise ValueError(f"invalid flag at offset {offset}")
+
+            return byte == 1, offset + 1
+    elif type_ == 'integer':
+        # Small integers fit in one byte, they're decoded directly.
+        def decode(data, offset):
+            value = data[offset]
+            if value < 0x80:
+                offset += 1
+            else:
+                value, offset = decode_varint(data, offset)
+
+            return -((value + 1) >> 1) if value & 1 else value >> 1, offset
+    elif type_ == 'decimal':
+        def decode(data, offset):
+            return unpack_double(data, offset)[0], offset + 8
+    elif type_ == 'string':
+        def decode(data, offset):
+            length, offset = decode_varint(data, offset)
+            end = offset + length
+            if end > len(data):
+                raise IndexError
+
+            return str(data[offset:end], 'utf-8', 'surrogatepass'), end
+    elif type_ == 'enum':
+        values = tuple(sorted(specs.values))
+        def decode(data, offset):
+            index = data[offset]
+            if index < 0x80:
+                next_offset = offset + 1
+            else:
+                index, next_offset = decode_varint(data, offset)
+
+            if index >= len(values):
+                raise ValueError(f"invalid enum value at offset {offset}")
+
+            return values[index], next_offset
+    elif type_ == 'list':
+        decode_item = make_child_decoder(specs.value)
+        def decode(data, offset):
+            length, offset = decode_varint(data, offset)
+
+            # Each item takes one byte at least.
+            if length > len(data) - offset:
+                raise IndexError
+
+            node = []
+            append = node.append
+            for _ in range(length):
+                item, offset = decode_item(data, offset)
+                append(item)
+
+            return node, offset
+    elif type_ == 'tuple':
+        decoders = tuple(make_child_decoder(value) for value in specs.values)
+        def decode(data, offset):
+            node = []
+            for decode_item in decoders:
+                item, offset = decode_item(data, offset)
+                node.append(item)
+
+            return tuple(node), offset
+    elif type_ == 'map':
+        fields = tuple((key, make_child_decoder(specs.fields[key])) for key in sorted(specs.fields))
+        def decode(data, offset):
+            node = {}
+            for key, decode_field in fields:
+                node[key], offset = decode_field(data, offset)
+
+            return node, offset
+
+    if not specs.option:
+        return decode
+
+    def decode_option(data, offset):
+        byte = data[offset]
+        if byte == 0:
+            return None, offset + 1
+        elif byte == 1:
+            return decode(data, offset + 1)
+        else:
+            raise ValueError(f"invalid null marker at offset {offset}")
+
+    return decode_option
+
+def validate(object, specs, errors, warnings, fail_fast):
+    # Validate the object like validate_object() does; the specs is already
+    # tracked.
+    walk_errors = errors
+    if fail_fast:
+        walk_errors = FailFastErrors()
+
+    try:
+        validate_function = specs.validate_object_function
+        if validate_function is not None:
+            validate_function("root", object, walk_errors, warnings)
+        elif specs.depth > MAXIMUM_RECURSIVE_DEPTH:
+            adjust_node_iteratively("root", object, specs, walk_errors, warnings, adjust_node_map, check_node_map, list, validate_only=True)
+        else:
+            validate_node("root", object, specs, walk_errors, warnings)
+    except StopValidation:
+        pass
+
+    if fail_fast:
+        errors.extend(walk_errors)
+
+def object_to_binary(object, specs, errors=None, warnings=None, fail_fast=None):
+    """ Convert Python object to its binary form.
+
+    The object is validated like object_to_document() does (same errors and
+    warnings) and its binary form is returned as bytes; see the notes of
+    this module for the format. If the object is invalid and the errors
+    parameter is set, the errors are added to it and None is returned
+    (invalid objects have no binary form).
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+    assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
+
+    # We detect if users want lazy validation when they pass an empty list as
+    # the errors parameters.
+    lazy_validation = False
+    if errors is None:
+        errors = []
+    else:
+        lazy_validation = True
+
+    if warnings is None:
+        warnings = []
+
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    specs = track_specs(specs)
+    validate(object, specs, errors, warnings, fail_fast)
+
+    if len(errors) > 0:
+        # If we're not lazy-validating the specs, we raise the first error
+        # that occurred.
+        if not lazy_validation:
+            raise errors[0]
+
+        return
+
+    encode = specs.binary_encoder
+    if encode is None:
+        encode = specs.binary_encoder = make_encoder(specs)
+
+    buffer = bytearray()
+    try:
+        encode(buffer, object)
+    except RecursionError:
+        error = ValidationError("root", "document is nested too deeply")
+        if not lazy_validation:
+            raise error from None
+
+        errors.append(error)
+        return
+
+    return bytes(buffer)
+
+def binary_to_object(data, specs, errors=None, warnings=None, fail_fast=None):
+    """ Convert binary data to its Python object form.
+
+    The data is a bytes-like object produced by object_to_binary() with the
+    same specs (or a structurally equal one). A ValueError is raised if it
+    doesn't match the specs. The decoded object is validated like
+    validate_object() does (same errors and warnings); if it's invalid
+    and the errors parameter is set, the errors are added to it and None is
+    returned.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+    assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
+
+    # We detect if users want lazy validation when they pass an empty list as
+    # the errors parameters.
+    lazy_validation = False
+    if errors is None:
+        errors = []
+    else:
+        lazy_validation = True
+
+    if warnings is None:
+        warnings = []
+
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    specs = track_specs(specs)
+
+    decode = specs.binary_decoder
+    if decode is None:
+        decode = specs.binary_decoder = make_decoder(specs)
+
+    if type(data) is not bytes:
+        data = memoryview(data).cast('B')
+
+    try:
+        object, offset = decode(data, 0)
+    except (IndexError, struct.error):
+        raise ValueError("binary data is truncated") from None
+    except UnicodeDecodeError:
+        raise ValueError("binary data has an invalid string") from None
+    except RecursionError:
+        error = ValidationError("root", "document is nested too deeply")
+        if not lazy_validation:
+            raise error from None
+
+        errors.append(error)
+        return
+
+    if offset != len(data):
+        raise ValueError(f"extra data at offset {offset}")
+
+    validate(object, specs, errors, warnings, fail_fast)
+
+    if len(errors) > 0:
+        # If we're not lazy-validating the specs, we raise the first error
+        # that occurred.
+        if not lazy_validation:
+            raise errors[0]
+
+        return
+
+    return object
@@ -0,0 +1,174 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from byteplug.document.compiler import CompiledSpecs, compile_specs
+
+# Notes:
+# - This module implements a process-wide cache of compiled specs. Unlike the
+#   'tiering' module, specs are identified by their structure (and not their
+#   identity) so specs that are built over and over again (for instance with
+#   Map(...).to_object()) share the same compiled specs.
+# - The cache is bounded; the least recently used compiled specs are evicted
+#   first.
+# - Fingerprinting a specs costs about as much as validating a small document,
+#   so the fingerprint of the last specs objects seen is remembered (by
+#   identity, with a reference to the specs so its identity can't be reused
+#   by another object). Like with the 'tiering' module, a specs must not be
+#   modified once it has been used.
+# - Specs that are nested too deeply to be fingerprinted are compiled without
+#   going through the cache.
+
+__all__ = [
+    'fingerprint_specs',
+    'ValidatorCache',
+    'validator_cache',
+    'set_cache_size',
+    'get_cache_statistics',
+    'clear_cache'
+]
+
+def fingerprint_specs(specs):
+    """ Compute a fingerprint of the structure of the specs.
+
+    Specs that are structurally equal have the same fingerprint, regardless
+    of their identity and of the order of their keys.
+    """
+
+    canonical_specs = json.dumps(specs, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical_specs.encode('utf-8')).hexdigest()
+
+class ValidatorCache:
+    """ Bounded LRU cache of compiled specs keyed by their fingerprint. """
+
+    def __init__(self, maximum_size=256):
+        assert type(maximum_size) is int and maximum_size >= 0, "maximum size value is invalid"
+
+        self.maximum_size = maximum_size
+        self.entries = OrderedDict()
+        self.fingerprints = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def fingerprint(self, specs):
+        # Return the fingerprint of the specs (None if it's nested too deeply
+        # to be fingerprinted), computing it only if the specs object wasn't
+        # seen recently.
+        key = id(specs)
+
+        with self.lock:
+            entry = self.fingerprints.get(key)
+            if entry is not None and entry[0] is specs:
+                self.fingerprints.move_to_end(key)
+                return entry[1]
+
+        try:
+            fingerprint = fingerprint_specs(specs)
+        except RecursionError:
+            return None
+
+        with self.lock:
+            self.fingerprints[key] = (specs, fingerprint)
+            while len(self.fingerprints) > self.maximum_size:
+                self.fingerprints.popitem(last=False)
+
+        return fingerprint
+
+    def get(self, specs):
+        """ Return the compiled form of the specs, compiling it if needed. """
+
+        if isinstance(specs, CompiledSpecs):
+            return specs
+
+        fingerprint = self.fingerprint(specs)
+        if fingerprint is None:
+            with self.lock:
+                self.misses += 1
+
+            return compile_specs(specs)
+
+        with self.lock:
+            compiled = self.entries.get(fingerprint)
+            if compiled is not None:
+                self.entries.move_to_end(fingerprint)
+                self.hits += 1
+                return compiled
+
+            self.misses += 1
+
+            compiled = compile_specs(specs)
+            if self.maximum_size > 0:
+                self.entries[fingerprint] = compiled
+                self.evict()
+
+            return compiled
+
+    def evict(self):
+        while len(self.entries) > self.maximum_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+        while len(self.fingerprints) > self.maximum_size:
+            self.fingerprints.popitem(last=False)
+
+    def resize(self, maximum_size):
+        assert type(maximum_size) is int and maximum_size >= 0, "maximum size value is invalid"
+
+        with self.lock:
+            self.maximum_size = maximum_size
+            self.evict()
+
+    def statistics(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'maximum_size': self.maximum_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.fingerprints.clear()
+
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+# The cache used by document_to_object() and object_to_document().
+validator_cache = ValidatorCache()
+
+def set_cache_size(maximum_size):
+    """ Set the maximum number of compiled specs kept in the cache.
+
+    Setting it to zero disables the cache.
+    """
+
+    validator_cache.resize(maximum_size)
+
+def get_cache_statistics():
+    """ Return the statistics of the cache.
+
+    It returns a dict with the 'size', 'maximum_size', 'hits', 'misses' and
+    'evictions' keys.
+    """
+
+    return validator_cache.statistics()
+
+def clear_cache():
+    """ Empty the cache and reset its statistics. """
+
+    validator_cache.clear()
@@ -0,0 +1,305 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import struct
+from byteplug.document.document import decoded_document_to_object
+from byteplug.document.object import object_to_document
+from byteplug.document.exception import ValidationError
+
+# Notes:
+# - This module implements CBOR (RFC 8949) as an alternative to JSON for the
+#   documents. It's a pure-Python implementation of the format that only
+#   deals with the values a JSON document can have (null, booleans, integers,
+#   floats, text strings, arrays and maps); byte strings are decoded to bytes
+#   (which are then reported as invalid nodes), and tags and simple values
+#   are rejected, except the bignum tags (2 and 3).
+# - Decoded documents are converted and validated exactly like decoded JSON
+#   documents (see decoded_document_to_object()), and objects are converted
+#   and validated like object_to_document() does before being encoded.
+# - Integers are encoded in their smallest representation (as bignums if they
+#   don't fit in 64 bits) and floats in double precision. Indefinite-length
+#   strings, arrays and maps are accepted by the decoder, but never produced
+#   by the encoder.
+# - Data that is not valid CBOR raises a ValueError, like the JSON parser does
+#   with invalid JSON documents.
+
+__all__ = ['cbor_to_object', 'object_to_cbor']
+
+UNSIGNED_INTEGER = 0
+NEGATIVE_INTEGER = 1
+BYTE_STRING = 2
+TEXT_STRING = 3
+ARRAY = 4
+MAP = 5
+TAG = 6
+SIMPLE = 7
+
+POSITIVE_BIGNUM_TAG = 2
+NEGATIVE_BIGNUM_TAG = 3
+
+INDEFINITE_LENGTH = 31
+BREAK = 0xFF
+
+float16 = struct.Struct('>e')
+float32 = struct.Struct('>f')
+float64 = struct.Struct('>d')
+
+def pack_head(buffer, major_type, argument):
+    major_type <<= 5
+
+    if argument < 24:
+        buffer.append(major_type | argument)
+    elif argument <= 0xFF:
+        buffer.append(major_type | 24)
+        buffer.append(argument)
+    elif argument <= 0xFFFF:
+        buffer.append(major_type | 25)
+        buffer += argument.to_bytes(2, 'big')
+    elif argument <= 0xFFFFFFFF:
+        buffer.append(major_type | 26)
+        buffer += argument.to_bytes(4, 'big')
+    else:
+        buffer.append(major_type | 27)
+        buffer += argument.to_bytes(8, 'big')
+
+def pack_value(buffer, value):
+    value_type = type(value)
+
+    if value is None:
+        buffer.append(0xF6)
+    elif value_type is bool:
+        buffer.append(0xF5 if value else 0xF4)
+    elif value_type is int:
+        if value >= 0:
+            major_type, argument = UNSIGNED_INTEGER, value
+        else:
+            major_type, argument = NEGATIVE_INTEGER, -1 - value
+
+        if argument <= 0xFFFFFFFFFFFFFFFF:
+            pack_head(buffer, major_type, argument)
+        else:
+            data = argument.to_bytes((argument.bit_length() + 7) // 8, 'big')
+            pack_head(buffer, TAG, POSITIVE_BIGNUM_TAG + major_type)
+            pack_head(buffer, BYTE_STRING, len(data))
+            buffer += data
+    elif value_type is float:
+        buffer.append(0xFB)
+        buffer += float64.pack(value)
+    elif value_type is str:
+        data = value.encode('utf-8')
+        pack_head(buffer, TEXT_STRING, len(data))
+        buffer += data
+    elif value_type is list or value_type is tuple:
+        pack_head(buffer, ARRAY, len(value))
+        for item in value:
+            pack_value(buffer, item)
+    elif value_type is dict:
+        pack_head(buffer, MAP, len(value))
+        for key, item in value.items():
+            pack_value(buffer, key)
+            pack_value(buffer, item)
+    else:
+        raise TypeError(f"{value_type.__name__} values can't be encoded to CBOR")
+
+def unpack_argument(data, offset, additional_information):
+    if additional_information < 24:
+        return additional_information, offset
+    elif additional_information == 24:
+        return data[offset], offset + 1
+    elif additional_information == 25:
+        end = offset + 2
+    elif additional_information == 26:
+        end = offset + 4
+    elif additional_information == 27:
+        end = offset + 8
+    else:
+        raise ValueError(f"invalid CBOR argument at offset {offset - 1}")
+
+    if end > len(data):
+        raise IndexError
+
+    return int.from_bytes(data[offset:end], 'big'), end
+
+def unpack_chunks(data, offset, major_type):
+    # The chunks of an indefinite-length string are definite-length strings
+    # of the same type.
+    chunks = []
+    while data[offset] != BREAK:
+        byte = data[offset]
+        if byte >> 5 != major_type or byte & 0x1F == INDEFINITE_LENGTH:
+            raise ValueError(f"invalid CBOR string chunk at offset {offset}")
+
+        length, offset = unpack_argument(data, offset + 1, byte & 0x1F)
+        chunk, offset = unpack_bytes(data, offset, length)
+        chunks.append(chunk)
+
+    return b''.join(chunks), offset + 1
+
+def unpack_bytes(data, offset, length):
+    end = offset + length
+    if end > len(data):
+        raise IndexError
+
+    return bytes(data[offset:end]), end
+
+def unpack_value(data, offset):
+    byte = data[offset]
+    major_type = byte >> 5
+    additional_information = byte & 0x1F
+    offset += 1
+
+    if major_type == SIMPLE:
+        if byte == 0xF4:
+            return False, offset
+        elif byte == 0xF5:
+            return True, offset
+        elif byte == 0xF6:
+            return None, offset
+        elif byte == 0xF9:
+            return float16.unpack_from(data, offset)[0], offset + 2
+        elif byte == 0xFA:
+            return float32.unpack_from(data, offset)[0], offset + 4
+        elif byte == 0xFB:
+            return float64.unpack_from(data, offset)[0], offset + 8
+        else:
+            raise ValueError(f"unsupported CBOR simple value at offset {offset - 1}")
+
+    is_indefinite = additional_information == INDEFINITE_LENGTH and major_type in (BYTE_STRING, TEXT_STRING, ARRAY, MAP)
+    if not is_indefinite:
+        argument, offset = unpack_argument(data, offset, additional_information)
+
+    if major_type == UNSIGNED_INTEGER:
+        return argument, offset
+    elif major_type == NEGATIVE_INTEGER:
+        return -1 - argument, offset
+    elif major_type == BYTE_STRING or major_type == TEXT_STRING:
+        if is_indefinite:
+            value, offset = unpack_chunks(data, offset, major_type)
+        else:
+            value, offset = unpack_bytes(data, offset, argument)
+
+        if major_type == TEXT_STRING:
+            value = str(value, 'utf-8')
+
+        return value, offset
+    elif major_type == ARRAY:
+        value = []
+        if is_indefinite:
+            while data[offset] != BREAK:
+                item, offset = unpack_value(data, offset)
+                value.append(item)
+
+            return value, offset + 1
+
+        # Each item takes one byte at least.
+        if argument > len(data) - offset:
+            raise IndexError
+
+        for _ in range(argument):
+            item, offset = unpack_value(data, offset)
+            value.append(item)
+
+        return value, offset
+    elif major_type == MAP:
+        if not is_indefinite and argument * 2 > len(data) - offset:
+            raise IndexError
+
+        value = {}
+        count = 0
+        while (data[offset] != BREAK) if is_indefinite else (count < argument):
+            key, offset = unpack_value(data, offset)
+            if type(key) in (list, dict):
+                raise ValueError(f"unsupported CBOR map key at offset {offset}")
+
+            value[key], offset = unpack_value(data, offset)
+            count += 1
+
+        return value, offset + 1 if is_indefinite else offset
+    else:
+        if argument not in (POSITIVE_BIGNUM_TAG, NEGATIVE_BIGNUM_TAG):
+            raise ValueError(f"unsupported CBOR tag at offset {offset - 1}")
+
+        # The bignums are tagged byte strings.
+        tagged_offset = offset
+        content, offset = unpack_value(data, offset)
+        if type(content) is not bytes:
+            raise ValueError(f"invalid CBOR bignum at offset {tagged_offset}")
+
+        value = int.from_bytes(content, 'big')
+        if argument == NEGATIVE_BIGNUM_TAG:
+            value = -1 - value
+
+        return value, offset
+
+def load_cbor(data):
+    if type(data) is not bytes:
+        data = memoryview(data).cast('B')
+
+    try:
+        value, offset = unpack_value(data, 0)
+    except (IndexError, struct.error):
+        raise ValueError("CBOR document is truncated") from None
+
+    if offset != len(data):
+        raise ValueError(f"extra data at offset {offset}")
+
+    return value
+
+def dump_cbor(value):
+    buffer = bytearray()
+    pack_value(buffer, value)
+
+    return bytes(buffer)
+
+def cbor_to_object(document, specs, errors=None, warnings=None, fail_fast=None, copy_on_write=False):
+    """ Convert a CBOR document to its Python equivalent.
+
+    The document is a bytes-like object. It's the same as document_to_object()
+    (same result, errors and warnings) except that the document is encoded in
+    CBOR instead of JSON. A ValueError is raised if it's not valid CBOR.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+
+    # The decoder is recursive, too deeply nested documents are reported like
+    # any other error.
+    try:
+        value = load_cbor(document)
+    except RecursionError:
+        error = ValidationError("root", "document is nested too deeply")
+        if errors is None:
+            raise error from None
+
+        errors.append(error)
+        return
+
+    return decoded_document_to_object(value, specs, errors, warnings, fail_fast, copy_on_write)
+
+def object_to_cbor(object, specs, errors=None, warnings=None, fail_fast=None):
+    """ Convert Python object to its CBOR equivalent.
+
+    It's the same as object_to_document() (same errors and warnings) except
+    that the document is encoded in CBOR instead of JSON and returned as
+    bytes.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+
+    document = object_to_document(object, specs, errors, warnings, no_dump=True, fail_fast=fail_fast)
+
+    # The encoder is recursive, too deeply nested objects are reported like
+    # any other error.
+    try:
+        return dump_cbor(document)
+    except RecursionError:
+        error = ValidationError("root", "document is nested too deeply")
+        if errors is None:
+            raise error from None
+
+        errors.append(error)
+        return
@@ -0,0 +1,599 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from json.encoder import encode_basestring_ascii
+from byteplug.document.arrays import ndarray, accepts_arrays
+from byteplug.document.arrays import adjust_array_node, validate_array_node, encode_array_node
+from byteplug.document.utils import LIST_ITEM_SEGMENT, TUPLE_ITEM_SEGMENT, FIELD_SEGMENT, render_path
+from byteplug.document.exception import ValidationError, ValidationWarning
+
+# Notes:
+# - This module generates (and executes) the Python source of a function that
+#   is specialized for a given specs. The type checks, the bound and length
+#   comparisons and the map field loops are inlined in the function so there
+#   is no dispatching through 'adjust_node_map' anymore.
+# - The generated functions have the same signature as adjust_node() minus the
+#   specs parameter, and must produce exactly the same result, errors and
+#   warnings (in the same order) as the 'document' and 'object' modules. Any
+#   change there must be reflected here.
+# - Paths are only built when an error or a warning is emitted, in the same
+#   (parent, template, value) form as in the 'document' and 'object' modules.
+# - Python limits how deeply blocks can be nested; nodes that are nested too
+#   deeply are spilled into a function of their own.
+# - In validate-only mode, the generated functions are drop-in replacements of
+#   validate_node() instead; the adjusted containers are not constructed and
+#   they return None. Likewise, in share mode (documents only), they're
+#   drop-in replacements of share_node().
+# - In encode mode (objects only), the generated functions validate the node
+#   and return its JSON document directly, exactly as the standard library
+#   json.dumps() would encode the adjusted node (invalid nodes are encoded as
+#   null). The keys of the maps and the values of the enums are encoded once,
+#   when the function is generated.
+# - NumPy arrays that are accepted in place of lists (objects only) are
+#   handed to the 'arrays' module as a whole.
+
+__all__ = ['generate_document_function', 'generate_object_function']
+
+# Maximum number of nested containers (lists, tuples and maps) that are
+# inlined in a single function.
+MAXIMUM_INLINE_DEPTH = 6
+
+# Maximum number of fields of a map that are looked up by comparing the keys
+# to their name in turn; the fields of wider maps are found by index (which is
+# only faster beyond about ten fields).
+MAXIMUM_FIELD_CHAIN = 8
+
+# The error messages that differ between the two directions.
+document_messages = {
+    'flag'   : "was expecting a JSON boolean",
+    'integer': "was expecting a JSON number",
+    'decimal': "was expecting a JSON number",
+    'string' : "was expecting a JSON string",
+    'enum'   : "was expecting a JSON string",
+    'list'   : "was expecting a JSON array",
+    'tuple'  : "was expecting a JSON array",
+    'map'    : "was expecting a JSON object",
+    'tuple-length': "length of the array must be {}"
+}
+
+object_messages = {
+    'flag'   : "was expecting a boolean",
+    'integer': "was expecting an integer",
+    'decimal': "was expecting a float",
+    'string' : "was expecting a string",
+    'enum'   : "was expecting a string",
+    'list'   : "was expecting a list",
+    'tuple'  : "was expecting a tuple",
+    'map'    : "was expecting a dict",
+    'tuple-length': "length of the tuple must be {}"
+}
+
+def encode_float(value):
+    # Same as the standard library JSON encoder.
+    if value != value:
+        return 'NaN'
+    elif value > 0:
+        return 'Infinity'
+    else:
+        return '-Infinity'
+
+class Generator:
+    def __init__(self, is_document, validate_only=False, share=False, encode=False):
+        self.is_document = is_document
+        self.validate_only = validate_only
+        self.share = share
+        self.encode = encode
+        self.messages = document_messages if is_document else object_messages
+
+        # The value of the nodes that are null or invalid.
+        self.null = repr('null') if encode else 'None'
+
+        self.constants = {}
+        self.functions = []
+        self.counter = 0
+
+    def name(self, prefix):
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def constant(self, value):
+        name = self.name('c')
+        self.constants[name] = value
+        return name
+
+    def function(self, specs):
+        # Generate a function for the node and return its name.
+        if self.validate_only:
+            name = self.name('validate')
+        elif self.share:
+            name = self.name('share')
+        elif self.encode:
+            name = self.name('encode')
+        else:
+            name = self.name('adjust')
+        lines = [f'def {name}(path, node, errors, warnings):']
+        self.node(lines, 1, specs, 'node', 'result', 'path', 0)
+        lines.append('    return result')
+
+        self.functions.append(lines)
+        return name
+
+    def error(self, lines, indent, path, message, dst):
+        # The message is either a string, or a Python expression when it's
+        # wrapped in a tuple.
+        if type(message) is tuple:
+            message = message[0]
+        else:
+            message = repr(message)
+
+        pad = '    ' * indent
+        lines.append(f'{pad}errors.append(ValidationError({path}, {message}))')
+        if dst:
+            lines.append(f'{pad}{dst} = {self.null}')
+
+    def node(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        if specs.type in ('list', 'tuple', 'map'):
+            if depth >= MAXIMUM_INLINE_DEPTH:
+                name = self.function(specs)
+                lines.append(f'{pad}{dst} = {name}({path}, {src}, errors, warnings)')
+                return
+
+            depth += 1
+
+        lines.append(f'{pad}if {src} is None:')
+        if not specs.option:
+            lines.append(f'{pad}    errors.append(ValueError(render_path({path}), "value cant be null"))')
+        lines.append(f'{pad}    {dst} = {self.null}')
+        lines.append(f'{pad}else:')
+
+        method = getattr(self, specs.type)
+        method(lines, indent + 1, specs, src, dst, path, depth)
+
+    def flag(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        lines.append(f'{pad}if type({src}) is not bool:')
+        self.error(lines, indent + 1, path, self.messages['flag'], dst)
+        lines.append(f'{pad}else:')
+        if self.encode:
+            lines.append(f"{pad}    {dst} = 'true' if {src} else 'false'")
+        else:
+            lines.append(f'{pad}    {dst} = {src}')
+
+    def bounds(self, lines, indent, specs, src, dst, path):
+        pad = '    ' * indent
+
+        if specs.minimum:
+            is_exclusive, value = specs.minimum
+            value_name = self.constant(value)
+            if is_exclusive:
+                lines.append(f'{pad}if not ({src} > {value_name}):')
+                message = f"value must be strictly greater than {value}"
+            else:
+                lines.append(f'{pad}if not ({src} >= {value_name}):')
+                message = f"value must be equal or greater than {value}"
+            self.error(lines, indent + 1, path, message, dst)
+
+        if specs.maximum:
+            is_exclusive, value = specs.maximum
+            value_name = self.constant(value)
+            if is_exclusive:
+                lines.append(f'{pad}if not ({src} < {value_name}):')
+                message = f"value must be strictly lower than {value}"
+            else:
+                lines.append(f'{pad}if not ({src} <= {value_name}):')
+                message = f"value must be equal or lower than {value}"
+            self.error(lines, indent + 1, path, message, dst)
+
+    def integer(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        if self.is_document:
+            type_ = self.name('t')
+            lines.append(f'{pad}{type_} = type({src})')
+            lines.append(f'{pad}if {type_} is not int and {type_} is not float:')
+            self.error(lines, indent + 1, path, self.messages['integer'], dst)
+            lines.append(f'{pad}else:')
+            lines.append(f'{pad}    if {type_} is float:')
+            lines.append(f'{pad}        warnings.append(ValidationWarning({path}, "may lose precision"))')
+            lines.append(f'{pad}        {dst} = int({src})')
+            lines.append(f'{pad}    else:')
+            lines.append(f'{pad}        {dst} = {src}')
+        else:
+            lines.append(f'{pad}if type({src}) is not int:')
+            self.error(lines, indent + 1, path, self.messages['integer'], dst)
+            lines.append(f'{pad}else:')
+            if self.encode:
+                lines.append(f'{pad}    {dst} = int_repr({src})')
+            else:
+                lines.append(f'{pad}    {dst} = {src}')
+
+        # The bounds are checked against the adjusted value, which is reset
+        # to None as soon as one of them fails; we keep it around. Python
+        # nodes are not adjusted so they're checked directly when encoding.
+        if self.encode and (specs.minimum or specs.maximum):
+            self.bounds(lines, indent + 1, specs, src, dst, path)
+        elif specs.minimum or specs.maximum:
+            value = self.name('v')
+            lines.append(f'{pad}    {value} = {dst}')
+            self.bounds(lines, indent + 1, specs, value, dst, path)
+
+    def decimal(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        if self.is_document:
+            type_ = self.name('t')
+            lines.append(f'{pad}{type_} = type({src})')
+            lines.append(f'{pad}if {type_} is not int and {type_} is not float:')
+            self.error(lines, indent + 1, path, self.messages['decimal'], dst)
+            lines.append(f'{pad}else:')
+            lines.append(f'{pad}    if {type_} is int:')
+            lines.append(f'{pad}        {dst} = float({src})')
+            lines.append(f'{pad}    else:')
+            lines.append(f'{pad}        {dst} = {src}')
+        else:
+            lines.append(f'{pad}if type({src}) is not float:')
+            self.error(lines, indent + 1, path, self.messages['decimal'], dst)
+            lines.append(f'{pad}else:')
+            if self.encode:
+                # The difference is only 0 for finite numbers.
+                lines.append(f'{pad}    {dst} = float_repr({src}) if {src} - {src} == 0 else encode_float({src})')
+            else:
+                lines.append(f'{pad}    {dst} = {src}')
+
+        if self.encode and (specs.minimum or specs.maximum):
+            self.bounds(lines, indent + 1, specs, src, dst, path)
+        elif specs.minimum or specs.maximum:
+            value = self.name('v')
+            lines.append(f'{pad}    {value} = {dst}')
+            self.bounds(lines, indent + 1, specs, value, dst, path)
+
+    def string(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        lines.append(f'{pad}if type({src}) is not str:')
+        self.error(lines, indent + 1, path, self.messages['string'], dst)
+        lines.append(f'{pad}else:')
+        if self.encode:
+            lines.append(f'{pad}    {dst} = encode_string({src})')
+        else:
+            lines.append(f'{pad}    {dst} = {src}')
+
+        pad = '    ' * (indent + 1)
+        if specs.length is not None:
+            lines.append(f'{pad}if len({src}) != {specs.length}:')
+            self.error(lines, indent + 2, path, f"length must be equal to {specs.length}", dst)
+
+        if specs.minimum_length is not None:
+            lines.append(f'{pad}if not (len({src}) >= {specs.minimum_length}):')
+            self.error(lines, indent + 2, path, f"length must be equal or greater than {specs.minimum_length}", dst)
+
+        if specs.maximum_length is not None:
+            lines.append(f'{pad}if not (len({src}) <= {specs.maximum_length}):')
+            self.error(lines, indent + 2, path, f"length must be equal or lower than {specs.maximum_length}", dst)
+
+        if specs.pattern is not None:
+            pattern = self.constant(specs.pattern)
+            lines.append(f'{pad}if not {pattern}.match({src}):')
+            self.error(lines, indent + 2, path, "value did not match the pattern", dst)
+
+    def enum(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        lines.append(f'{pad}if type({src}) is not str:')
+        self.error(lines, indent + 1, path, self.messages['enum'], dst)
+
+        # The encoded values are looked up instead of the values.
+        if self.encode:
+            literals = self.constant({value: encode_basestring_ascii(value) for value in specs.values})
+            lines.append(f'{pad}else:')
+            lines.append(f'{pad}    {dst} = {literals}.get({src})')
+            lines.append(f'{pad}    if {dst} is None:')
+            self.error(lines, indent + 2, path, "enum value is invalid", dst)
+            return
+
+        values = self.constant(specs.values)
+        lines.append(f'{pad}elif {src} not in {values}:')
+        self.error(lines, indent + 1, path, "enum value is invalid", dst)
+        lines.append(f'{pad}else:')
+        lines.append(f'{pad}    {dst} = {src}')
+
+    def list(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        if not self.is_document and ndarray is not None and accepts_arrays(specs):
+            if self.validate_only:
+                function = 'validate_array_node'
+            elif self.encode:
+                function = 'encode_array_node'
+            else:
+                function = 'adjust_array_node'
+
+            lines.append(f'{pad}if type({src}) is ndarray:')
+            lines.append(f'{pad}    {dst} = {function}({path}, {src}, {self.constant(specs)}, errors, warnings)')
+            lines.append(f'{pad}elif type({src}) is not list:')
+        else:
+            lines.append(f'{pad}if type({src}) is not list:')
+        self.error(lines, indent + 1, path, self.messages['list'], dst)
+
+        if specs.length is not None:
+            lines.append(f'{pad}elif len({src}) != {specs.length}:')
+            self.error(lines, indent + 1, path, f"length must be equal to {specs.length}", dst)
+
+        if specs.minimum_length is not None:
+            lines.append(f'{pad}elif not (len({src}) >= {specs.minimum_length}):')
+            self.error(lines, indent + 1, path, f"length must be equal or greater than {specs.minimum_length}", dst)
+
+        if specs.maximum_length is not None:
+            lines.append(f'{pad}elif not (len({src}) <= {specs.maximum_length}):')
+            self.error(lines, indent + 1, path, f"length must be equal or lower than {specs.maximum_length}", dst)
+
+        index = self.name('i')
+        item = self.name('n')
+        adjusted_item = self.name('r')
+        append = self.name('append')
+        item_path = f"({path}, {LIST_ITEM_SEGMENT!r}, {index})"
+
+        lines.append(f'{pad}else:')
+        if self.validate_only:
+            lines.append(f'{pad}    {dst} = None')
+            lines.append(f'{pad}    for {index}, {item} in enumerate({src}):')
+            self.node(lines, indent + 2, specs.value, item, adjusted_item, item_path, depth)
+            return
+
+        # In share mode, the node is only copied once one of its items was
+        # changed.
+        if self.share:
+            lines.append(f'{pad}    {dst} = None')
+            lines.append(f'{pad}    for {index}, {item} in enumerate({src}):')
+            self.node(lines, indent + 2, specs.value, item, adjusted_item, item_path, depth)
+            lines.append(f'{pad}        if {dst} is not None:')
+            lines.append(f'{pad}            {dst}.append({adjusted_item})')
+            lines.append(f'{pad}        elif {adjusted_item} is not {item}:')
+            lines.append(f'{pad}            {dst} = {src}[:{index}]')
+            lines.append(f'{pad}            {dst}.append({adjusted_item})')
+            lines.append(f'{pad}    if {dst} is None:')
+            lines.append(f'{pad}        {dst} = {src}')
+            return
+
+        # In encode mode, the encoded items are joined once they're all
+        # encoded.
+        if self.encode:
+            items = self.name('l')
+            lines.append(f'{pad}    {items} = []')
+            lines.append(f'{pad}    {append} = {items}.append')
+        else:
+            lines.append(f'{pad}    {dst} = []')
+            lines.append(f'{pad}    {append} = {dst}.append')
+
+        lines.append(f'{pad}    for {index}, {item} in enumerate({src}):')
+        self.node(lines, indent + 2, specs.value, item, adjusted_item, item_path, depth)
+        lines.append(f'{pad}        {append}({adjusted_item})')
+
+        if self.encode:
+            lines.append(f"{pad}    {dst} = '[' + ', '.join({items}) + ']'")
+
+    def tuple(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        lines.append(f'{pad}if type({src}) is not {"list" if self.is_document else "tuple"}:')
+        self.error(lines, indent + 1, path, self.messages['tuple'], dst)
+        lines.append(f'{pad}elif len({src}) != {len(specs.values)}:')
+        self.error(lines, indent + 1, path, self.messages['tuple-length'].format(len(specs.values)), dst)
+        lines.append(f'{pad}else:')
+
+        adjusted_items = []
+        for index, value in enumerate(specs.values):
+            item = self.name('n')
+            adjusted_item = self.name('r')
+            item_path = f"({path}, {TUPLE_ITEM_SEGMENT!r}, {index})"
+            lines.append(f'{pad}    {item} = {src}[{index}]')
+            self.node(lines, indent + 1, value, item, adjusted_item, item_path, depth)
+            adjusted_items.append(adjusted_item)
+
+        if self.validate_only:
+            lines.append(f'{pad}    {dst} = None')
+        elif self.encode:
+            encoded_items = " + ', ' + ".join(adjusted_items)
+            lines.append(f"{pad}    {dst} = '[' + {encoded_items} + ']'")
+        elif self.is_document:
+            lines.append(f'{pad}    {dst} = ({", ".join(adjusted_items)},)')
+        else:
+            lines.append(f'{pad}    {dst} = [{", ".join(adjusted_items)}]')
+
+    def map(self, lines, indent, specs, src, dst, path, depth):
+        pad = '    ' * indent
+
+        lines.append(f'{pad}if type({src}) is not dict:')
+        self.error(lines, indent + 1, path, self.messages['map'], dst)
+        lines.append(f'{pad}else:')
+
+        key = self.name('k')
+        value = self.name('n')
+        adjusted_value = self.name('r')
+        count = self.name('c')
+        changed_fields = self.name('m')
+
+        # In validate-only mode, the fields are counted instead of being added
+        # to the adjusted node. In share mode, they're also counted and the
+        # changed ones are collected aside.
+        if self.validate_only:
+            lines.append(f'{pad}    {dst} = None')
+            lines.append(f'{pad}    {count} = 0')
+        elif self.share:
+            lines.append(f'{pad}    {changed_fields} = None')
+            lines.append(f'{pad}    {count} = 0')
+        elif self.encode:
+            items = self.name('l')
+            lines.append(f'{pad}    {items} = []')
+            lines.append(f'{pad}    {count} = 0')
+        else:
+            lines.append(f'{pad}    {dst} = {{}}')
+
+        # Unlike JSON objects, dicts can have keys that are not strings.
+        inner = indent + 1
+        if not self.is_document:
+            lines.append(f'{pad}    for {key} in {src}:')
+            lines.append(f'{pad}        if type({key}) is not str:')
+            self.error(lines, indent + 3, path, "keys of the dict must be string exclusively", dst)
+            lines.append(f'{pad}            break')
+            lines.append(f'{pad}    else:')
+            inner += 1
+
+        pad = '    ' * inner
+        lines.append(f'{pad}for {key}, {value} in {src}.items():')
+
+        def field_lines(indent, field_key, field_specs):
+            pad = '    ' * indent
+            field_path = f"({path}, {FIELD_SEGMENT!r}, {field_key!r})"
+            self.node(lines, indent, field_specs, value, adjusted_value, field_path, depth)
+            if self.validate_only:
+                lines.append(f'{pad}{count} += 1')
+            elif self.share:
+                lines.append(f'{pad}if {adjusted_value} is not {value}:')
+                lines.append(f'{pad}    if {changed_fields} is None:')
+                lines.append(f'{pad}        {changed_fields} = {{}}')
+                lines.append(f'{pad}    {changed_fields}[{key}] = {adjusted_value}')
+                lines.append(f'{pad}{count} += 1')
+            elif self.encode:
+                fragment = encode_basestring_ascii(field_key) + ': '
+                lines.append(f'{pad}{items}.append({fragment!r} + {adjusted_value})')
+                lines.append(f'{pad}{count} += 1')
+            else:
+                lines.append(f'{pad}{dst}[{key}] = {adjusted_value}')
+
+        fields = list(specs.fields.items())
+        if len(fields) <= MAXIMUM_FIELD_CHAIN:
+            keyword = 'if'
+            for field_key, field_specs in fields:
+                lines.append(f'{pad}    {keyword} {key} == {field_key!r}:')
+                field_lines(inner + 2, field_key, field_specs)
+                keyword = 'elif'
+
+            lines.append(f'{pad}    else:')
+            self.error(lines, inner + 2, path, (f'''f"'{{{key}}}' field was unexpected"''',), None)
+        else:
+            # The field of a key is found from its index with a binary search
+            # (rather than comparing the key to all field names in turn).
+            indexes = self.constant({field_key: index for (index, (field_key, _)) in enumerate(fields)})
+            index = self.name('i')
+
+            def search_lines(indent, start, end):
+                pad = '    ' * indent
+                if end - start <= MAXIMUM_FIELD_CHAIN:
+                    for position in range(start, end):
+                        if position == start:
+                            lines.append(f'{pad}if {index} == {position}:')
+                        elif position < end - 1:
+                            lines.append(f'{pad}elif {index} == {position}:')
+                        else:
+                            lines.append(f'{pad}else:')
+                        field_lines(indent + 1, *fields[position])
+                else:
+                    middle = (start + end) // 2
+                    lines.append(f'{pad}if {index} < {middle}:')
+                    search_lines(indent + 1, start, middle)
+                    lines.append(f'{pad}else:')
+                    search_lines(indent + 1, middle, end)
+
+            lines.append(f'{pad}    {index} = {indexes}.get({key})')
+            lines.append(f'{pad}    if {index} is None:')
+            self.error(lines, inner + 2, path, (f'''f"'{{{key}}}' field was unexpected"''',), None)
+            lines.append(f'{pad}    else:')
+            search_lines(inner + 2, 0, len(fields))
+
+        # Unexpected fields are never added to the adjusted node (or counted),
+        # so if it has as many fields as required, none of them is missing.
+        required = self.constant(specs.required)
+        missing_key = self.name('k')
+        if self.validate_only or self.share or self.encode:
+            lines.append(f'{pad}if {count} != {len(specs.required)}:')
+            lines.append(f'{pad}    for {missing_key} in {required} - {src}.keys():')
+        else:
+            lines.append(f'{pad}if len({dst}) != {len(specs.required)}:')
+            lines.append(f'{pad}    for {missing_key} in {required} - {dst}.keys():')
+        self.error(lines, inner + 2, path, (f'''f"'{{{missing_key}}}' field was missing"''',), None)
+
+        if self.encode:
+            lines.append(f"{pad}{dst} = '{{' + ', '.join({items}) + '}}'")
+
+        # The node is shared unless some of its fields were changed or
+        # unexpected.
+        if self.share:
+            fields = self.constant(frozenset(specs.fields))
+            lines.append(f'{pad}if {changed_fields} is None and {count} == len({src}):')
+            lines.append(f'{pad}    {dst} = {src}')
+            lines.append(f'{pad}else:')
+            lines.append(f'{pad}    if {changed_fields} is None:')
+            lines.append(f'{pad}        {changed_fields} = {{}}')
+            lines.append(f'{pad}    {dst} = {{}}')
+            lines.append(f'{pad}    for {key}, {value} in {src}.items():')
+            lines.append(f'{pad}        if {key} in {fields}:')
+            lines.append(f'{pad}            {dst}[{key}] = {changed_fields}.get({key}, {value})')
+
+    def generate(self, specs):
+        name = self.function(specs)
+
+        # The constants are passed as parameters of a factory function so the
+        # generated functions access them as closure variables.
+        parameters = ', '.join(self.constants.keys())
+        source = [f'def make({parameters}):']
+        for lines in reversed(self.functions):
+            source.extend('    ' + line for line in lines)
+        source.append(f'    return {name}')
+        source = '\n'.join(source) + '\n'
+
+        namespace = {
+            'ValidationError': ValidationError,
+            'ValidationWarning': ValidationWarning,
+            'render_path': render_path,
+            'int_repr': int.__repr__,
+            'float_repr': float.__repr__,
+            'encode_float': encode_float,
+            'encode_string': encode_basestring_ascii,
+            'ndarray': ndarray,
+            'adjust_array_node': adjust_array_node,
+            'validate_array_node': validate_array_node,
+            'encode_array_node': encode_array_node
+        }
+        code = compile(source, f'<byteplug.document.codegen:{specs.type}>', 'exec')
+        exec(code, namespace)
+
+        function = namespace['make'](**self.constants)
+        function.source = source
+
+        return function
+
+def generate_document_function(specs, validate_only=False, share=False):
+    """ Generate a function that converts a JSON node to its Python equivalent.
+
+    The generated function is specialized for the compiled specs and is a
+    drop-in replacement of adjust_node() of the 'document' module; it takes
+    the path, the node, the errors and warnings lists and returns the adjusted
+    node. With the validate_only (or share) parameter, it's a drop-in
+    replacement of validate_node() (or share_node()) instead.
+    """
+
+    assert not (validate_only and share), "validate_only and share parameters are mutually exclusive"
+
+    return Generator(True, validate_only, share).generate(specs)
+
+def generate_object_function(specs, validate_only=False, encode=False):
+    """ Generate a function that converts a Python node to its JSON equivalent.
+
+    Like generate_document_function(), but a drop-in replacement of
+    adjust_node() (or validate_node()) of the 'object' module. With the encode
+    parameter, the generated function returns the JSON document of the node
+    (as encoded by json.dumps()) instead of the adjusted node.
+    """
+
+    assert not (validate_only and encode), "validate_only and encode parameters are mutually exclusive"
+
+    return Generator(False, validate_only, encode=encode).generate(specs)
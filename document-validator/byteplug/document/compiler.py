@@ -0,0 +1,246 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document.utils import read_minimum_value, read_maximum_value
+from byteplug.document.utils import compile_pattern
+from byteplug.document.codegen import generate_document_function, generate_object_function
+from byteplug.document.traversal import MAXIMUM_RECURSIVE_DEPTH
+
+# Notes:
+# - This module turns specs (Python object form) into a tree of CompiledSpecs
+#   nodes. Everything the 'document' and 'object' modules need to know about
+#   a node is resolved once here (bounds, lengths, regexes, enum values, etc.)
+#   instead of being re-read from the specs dicts for every single node of
+#   every single document.
+# - Like the 'document' and 'object' modules, it assumes the specs are valid
+#   (see validate_specs()).
+
+__all__ = ['CompiledSpecs', 'compile_specs']
+
+class CompiledSpecs:
+    """ Pre-processed specs node.
+
+    The attributes that are not relevant to the type of the node are left to
+    None.
+
+    - type: the type of the node ('flag', 'integer', etc.)
+    - option: whether the node can be null
+    - minimum, maximum: (is_exclusive, value) tuple of integers and decimals
+    - length: exact length of strings and lists
+    - minimum_length, maximum_length: length range of strings and lists
+    - pattern: compiled regex of strings
+    - values: frozenset of the values of enums, or tuple of the compiled value
+              nodes of tuples
+    - value: compiled value node of lists
+    - fields: dict of the compiled field nodes of maps
+    - required: frozenset of the field names of maps
+    - depth: the number of nested containers (lists, tuples and maps) of the
+      node, including itself
+    - specs: the specs this node was compiled from
+    - document_function, object_function: the generated functions of the
+      node, if any (see the 'codegen' module)
+    - validate_document_function, validate_object_function: the generated
+      functions of the node in validate-only mode, if any
+    - share_document_function: the generated function of the node in share
+      mode, if any
+    - encode_object_function: the generated function of the node in encode
+      mode, if any
+    - binary_encoder, binary_decoder: the functions that encode and decode
+      the node in its binary form, built on first use (see the 'binary'
+      module)
+    - record_class: the class of the records of maps, built on first use
+      (see the 'records' module)
+    - calls: the number of times the specs was used (see the 'tiering'
+      module)
+    """
+
+    __slots__ = (
+        'type', 'option',
+        'minimum', 'maximum',
+        'length', 'minimum_length', 'maximum_length',
+        'pattern',
+        'values', 'value',
+        'fields', 'required',
+        'depth',
+        'specs',
+        'document_function', 'object_function',
+        'validate_document_function', 'validate_object_function',
+        'share_document_function',
+        'encode_object_function',
+        'binary_encoder', 'binary_decoder',
+        'record_class',
+        'calls'
+    )
+
+    def __init__(self, specs):
+        self.type = specs['type']
+        self.option = specs.get('option', False)
+
+        self.minimum = None
+        self.maximum = None
+        self.length = None
+        self.minimum_length = None
+        self.maximum_length = None
+        self.pattern = None
+        self.values = None
+        self.value = None
+        self.fields = None
+        self.required = None
+
+        self.depth = 0
+
+        self.specs = specs
+
+        self.document_function = None
+        self.object_function = None
+        self.validate_document_function = None
+        self.validate_object_function = None
+        self.share_document_function = None
+        self.encode_object_function = None
+        self.binary_encoder = None
+        self.binary_decoder = None
+        self.record_class = None
+
+        self.calls = 0
+
+def compile_bound(bound, is_integer):
+    if bound is None:
+        return None
+
+    is_exclusive, value = bound
+
+    # Decimal bounds are accepted for integers (they raise warnings tho), we
+    # normalize them.
+    if is_integer:
+        value = int(value)
+
+    return (is_exclusive, value)
+
+def compile_length(compiled, specs):
+    length = specs.get('length')
+    if length is None:
+        return
+
+    if type(length) in (int, float):
+        compiled.length = int(length)
+    else:
+        minimum = length.get('minimum')
+        if minimum is not None:
+            compiled.minimum_length = int(minimum)
+
+        maximum = length.get('maximum')
+        if maximum is not None:
+            compiled.maximum_length = int(maximum)
+
+def compile_node(specs):
+    # The nodes are compiled with an explicit stack of nodes (instead of
+    # recursively), like the 'traversal' module walks them, so specs can be
+    # nested arbitrarily deeply. The depth of the containers is computed once
+    # all their children are compiled.
+    root = CompiledSpecs(specs)
+
+    nodes = [root]
+    containers = []
+
+    while nodes:
+        compiled = nodes.pop()
+        specs = compiled.specs
+        type_ = compiled.type
+
+        if type_ in ('integer', 'decimal'):
+            is_integer = type_ == 'integer'
+            compiled.minimum = compile_bound(read_minimum_value(specs), is_integer)
+            compiled.maximum = compile_bound(read_maximum_value(specs), is_integer)
+        elif type_ == 'string':
+            compile_length(compiled, specs)
+
+            pattern = specs.get('pattern')
+            if pattern is not None:
+                compiled.pattern = compile_pattern(pattern)
+        elif type_ == 'enum':
+            compiled.values = frozenset(specs['values'])
+        elif type_ == 'list':
+            compile_length(compiled, specs)
+            compiled.value = CompiledSpecs(specs['value'])
+            nodes.append(compiled.value)
+            containers.append(compiled)
+        elif type_ == 'tuple':
+            compiled.values = tuple(CompiledSpecs(value) for value in specs['values'])
+            nodes.extend(compiled.values)
+            containers.append(compiled)
+        elif type_ == 'map':
+            fields = specs['fields']
+            compiled.fields = {key: CompiledSpecs(value) for key, value in fields.items()}
+            compiled.required = frozenset(fields.keys())
+            nodes.extend(compiled.fields.values())
+            containers.append(compiled)
+
+    # The containers are listed after their parent, so in reverse order, their
+    # children are done before them.
+    for compiled in reversed(containers):
+        type_ = compiled.type
+        if type_ == 'list':
+            compiled.depth = compiled.value.depth + 1
+        elif type_ == 'tuple':
+            compiled.depth = max(value.depth for value in compiled.values) + 1
+        else:
+            compiled.depth = max(field.depth for field in compiled.fields.values()) + 1
+
+    return root
+
+def generate_functions(compiled):
+    # The specs that are nested too deeply are always walked iteratively (see
+    # the 'traversal' module).
+    if compiled.depth > MAXIMUM_RECURSIVE_DEPTH:
+        return
+
+    if compiled.document_function is None:
+        compiled.document_function = generate_document_function(compiled)
+
+    if compiled.object_function is None:
+        compiled.object_function = generate_object_function(compiled)
+
+    if compiled.validate_document_function is None:
+        compiled.validate_document_function = generate_document_function(compiled, validate_only=True)
+
+    if compiled.validate_object_function is None:
+        compiled.validate_object_function = generate_object_function(compiled, validate_only=True)
+
+    if compiled.share_document_function is None:
+        compiled.share_document_function = generate_document_function(compiled, share=True)
+
+    if compiled.encode_object_function is None:
+        compiled.encode_object_function = generate_object_function(compiled, encode=True)
+
+def compile_specs(specs, generate=False):
+    """ Compile the specs into a reusable validator tree.
+
+    The returned object can be passed to document_to_object() and
+    object_to_document() in place of the specs. It's worth keeping it around
+    when the same specs is used to validate many documents as it saves the
+    work of interpreting the specs each time.
+
+    If the generate parameter is set, Python functions specialized for the
+    specs are also generated and used in place of the validator tree (unless
+    the specs is nested too deeply). It's more expensive up front but it's
+    the fastest way to validate documents against a specs that is used over
+    and over again.
+
+    Passing an already compiled specs is allowed, it's returned as is (with
+    its functions generated if requested).
+    """
+
+    if isinstance(specs, CompiledSpecs):
+        compiled = specs
+    else:
+        compiled = compile_node(specs)
+
+    if generate:
+        generate_functions(compiled)
+
+    return compiled
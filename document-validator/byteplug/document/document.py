@@ -6,11 +6,22 @@
 #
 # Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
 
-import re
 import json
-from byteplug.document.utils import read_minimum_value, read_maximum_value
+import array
+from byteplug.document.backends import get_json_backend, load_json
+from byteplug.document.tiering import track_specs
+from byteplug.document.traversal import MAXIMUM_RECURSIVE_DEPTH, adjust_node_iteratively
+from byteplug.document.arrays import compare_array
+from byteplug.document.records import get_record_class
+from byteplug.document.utils import FailFastErrors, StopValidation
+from byteplug.document.utils import LIST_ITEM_SEGMENT, TUPLE_ITEM_SEGMENT, FIELD_SEGMENT, render_path
 from byteplug.document.exception import ValidationError, ValidationWarning
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Notes:
 # - This module handles validation and conversion from JSON document to Python
 #   object. It must be kept in sync with the 'object' module.
@@ -20,8 +31,22 @@ from byteplug.document.exception import ValidationError, ValidationWarning
 # - For each node type, we refer to the standard document that describes how
 #   the augmented type is implemented in its JSON form; we care about validity
 #   of its JSON form, its Python form is not defined by the standard.
-
-__all__ = ['document_to_object']
+# - With the numeric_lists parameter, the lists of (non-optional) integers and
+#   decimals are converted to NumPy arrays (int64 and float64) as a whole; see
+#   process_numpy_list_node(). Without NumPy, they can be converted to arrays
+#   of the 'array' module instead (and the lists of flags to bytearrays); see
+#   process_array_list_node(). Likewise, with the columnar parameter, the
+#   lists of maps are converted to one array per field; see
+#   process_columnar_list_node(). NumPy is an optional dependency.
+# - With the records parameter, the maps are converted to records instead of
+#   dicts; see the 'records' module.
+
+__all__ = [
+    'decoded_document_to_object',
+    'document_to_object',
+    'validate_decoded_document',
+    'validate_document'
+]
 
 def process_flag_node(path, node, specs, errors, warnings):
     if type(node) is not bool:
@@ -45,12 +70,11 @@ def process_integer_node(path, node, specs, errors, warnings):
 
     node_errors = []
 
-    minimum = read_minimum_value(specs)
-    maximum = read_maximum_value(specs)
+    minimum = specs.minimum
+    maximum = specs.maximum
 
     if minimum:
         is_exclusive, value = minimum
-        value = int(value)
 
         if is_exclusive:
             if not (node > value):
@@ -63,7 +87,6 @@ def process_integer_node(path, node, specs, errors, warnings):
 
     if maximum:
         is_exclusive, value = maximum
-        value = int(value)
 
         if is_exclusive:
             if not (node < value):
@@ -91,8 +114,8 @@ def process_decimal_node(path, node, specs, errors, warnings):
 
     node_errors = []
 
-    minimum = read_minimum_value(specs)
-    maximum = read_maximum_value(specs)
+    minimum = specs.minimum
+    maximum = specs.maximum
 
     if minimum:
         is_exclusive, value = minimum
@@ -131,38 +154,27 @@ def process_string_node(path, node, specs, errors, warnings):
 
     node_errors = []
 
-    length = specs.get('length')
+    length = specs.length
     if length is not None:
-        if type(length) in (int, float):
-
-            # Decimal values are accepted in the specs (they raise warnings
-            # tho), we normalize them.
-            length = int(length)
-
-            if len(node) != length:
-                error = ValidationError(path, f"length must be equal to {length}")
-                node_errors.append(error)
-        else:
-            minimum = length.get("minimum")
-            maximum = length.get("maximum")
-
-            if minimum is not None:
-                minimum = int(minimum)
-
-                if not (len(node) >= minimum):
-                    error = ValidationError(path, f"length must be equal or greater than {minimum}")
-                    node_errors.append(error)
+        if len(node) != length:
+            error = ValidationError(path, f"length must be equal to {length}")
+            node_errors.append(error)
 
-            if maximum is not None:
-                maximum = int(maximum)
+    minimum = specs.minimum_length
+    if minimum is not None:
+        if not (len(node) >= minimum):
+            error = ValidationError(path, f"length must be equal or greater than {minimum}")
+            node_errors.append(error)
 
-                if not (len(node) <= maximum):
-                    error = ValidationError(path, f"length must be equal or lower than {maximum}")
-                    node_errors.append(error)
+    maximum = specs.maximum_length
+    if maximum is not None:
+        if not (len(node) <= maximum):
+            error = ValidationError(path, f"length must be equal or lower than {maximum}")
+            node_errors.append(error)
 
-    pattern = specs.get('pattern')
+    pattern = specs.pattern
     if pattern is not None:
-        if not re.match(pattern, node):
+        if not pattern.match(node):
             error = ValidationError(path, "value did not match the pattern")
             node_errors.append(error)
 
@@ -178,100 +190,337 @@ def process_enum_node(path, node, specs, errors, warnings):
         errors.append(error)
         return
 
-    values = specs['values']
-    if node not in values:
+    if node not in specs.values:
         error = ValidationError(path, "enum value is invalid")
         errors.append(error)
         return
 
     return node
 
-def process_list_node(path, node, specs, errors, warnings):
-    value = specs['value']
-
+def check_list_node(path, node, specs, errors):
     if type(node) is not list:
         error = ValidationError(path, "was expecting a JSON array")
         errors.append(error)
-        return
+        return False
 
-    length = specs.get('length')
+    length = specs.length
     if length is not None:
-        if type(length) in (int, float):
-            length = int(length)
+        if len(node) != length:
+            error = ValidationError(path, f"length must be equal to {length}")
+            errors.append(error)
+            return False
 
-            if len(node) != length:
-                error = ValidationError(path, f"length must be equal to {length}")
-                errors.append(error)
-                return
-        else:
-            minimum = length.get("minimum")
-            maximum = length.get("maximum")
+    minimum = specs.minimum_length
+    if minimum is not None:
+        if not (len(node) >= minimum):
+            error = ValidationError(path, f"length must be equal or greater than {minimum}")
+            errors.append(error)
+            return False
 
-            if minimum is not None:
-                minimum = int(minimum)
+    maximum = specs.maximum_length
+    if maximum is not None:
+        if not (len(node) <= maximum):
+            error = ValidationError(path, f"length must be equal or lower than {maximum}")
+            errors.append(error)
+            return False
 
-                if not (len(node) >= minimum):
-                    error = ValidationError(path, f"length must be equal or greater than {minimum}")
-                    errors.append(error)
-                    return
+    return True
 
-            if maximum is not None:
-                maximum = int(maximum)
+def process_list_node(path, node, specs, errors, warnings):
+    if not check_list_node(path, node, specs, errors):
+        return
 
-                if not (len(node) <= maximum):
-                    error = ValidationError(path, f"length must be equal or lower than {maximum}")
-                    errors.append(error)
-                    return
+    value = specs.value
 
     adjusted_node = []
     for (index, item) in enumerate(node):
-        adjusted_item = adjust_node(path + '.[' + str(index) + ']', item, value, errors, warnings)
+        adjusted_item = adjust_node((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings)
         adjusted_node.append(adjusted_item)
 
     return adjusted_node
 
-def process_tuple_node(path, node, specs, errors, warnings):
-    values = specs['values']
+INT64_MINIMUM = -2 ** 63
+INT64_MAXIMUM = 2 ** 63 - 1
+
+def convert_column(items, specs):
+    # Return the NumPy array of the items (of a list, or of a field of the
+    # items of a list) of a scalar type along with the indexes of the invalid
+    # items, of the items that raise a warning, and of the integers that don't
+    # fit in 64 bits (which are invalid items too). The items are checked as a
+    # whole; None is returned if one of them is not of the right type.
+    type_ = specs.type
+    item_types = set(map(type, items))
+
+    masks = []
+    warning_indexes = []
+    overflow_indexes = []
+
+    if type_ == 'flag':
+        if not item_types <= {bool}:
+            return
+
+        values = numpy.array(items, dtype=numpy.bool_)
+    elif type_ == 'integer' or type_ == 'decimal':
+        if not item_types <= {int, float}:
+            return
+
+        if type_ == 'decimal':
+            values = numpy.array(items, dtype=numpy.float64)
+        else:
+            if float in item_types:
+                warning_indexes = [index for (index, item) in enumerate(items) if type(item) is float]
+                items = [int(item) for item in items]
+
+            try:
+                values = numpy.array(items, dtype=numpy.int64)
+            except OverflowError:
+                overflow_indexes = [index for (index, item) in enumerate(items) if not (INT64_MINIMUM <= item <= INT64_MAXIMUM)]
+                overflow_items = set(overflow_indexes)
+                values = numpy.array([0 if index in overflow_items else item for (index, item) in enumerate(items)], dtype=numpy.int64)
+
+        if specs.minimum:
+            masks.append(compare_array(values, specs.minimum, True))
+        if specs.maximum:
+            masks.append(compare_array(values, specs.maximum, False))
+    elif type_ == 'string':
+        if not item_types <= {str}:
+            return
+
+        values = numpy.array(items, dtype=numpy.object_)
+        lengths = numpy.fromiter(map(len, items), numpy.int64, len(items))
+
+        if specs.length is not None:
+            masks.append(lengths != specs.length)
+        if specs.minimum_length is not None:
+            masks.append(~(lengths >= specs.minimum_length))
+        if specs.maximum_length is not None:
+            masks.append(~(lengths <= specs.maximum_length))
+        if specs.pattern is not None:
+            match = specs.pattern.match
+            masks.append(numpy.fromiter((match(item) is None for item in items), numpy.bool_, len(items)))
+    elif type_ == 'enum':
+        if not item_types <= {str}:
+            return
+
+        # The enum values are encoded as their index in the sorted values;
+        # only the distinct items are looked up.
+        indexes = {value: index for (index, value) in enumerate(sorted(specs.values))}
+        distinct_items, inverse = numpy.unique(numpy.array(items, dtype=numpy.object_), return_inverse=True)
+        codes = numpy.array([indexes.get(item, -1) for item in distinct_items], dtype=numpy.int64)[inverse.reshape(-1)]
+
+        masks.append(codes < 0)
+        values = codes.astype(numpy.min_scalar_type(max(len(indexes) - 1, 0)))
+
+    invalid_indexes = set(overflow_indexes)
+    for mask in masks:
+        invalid_indexes.update(numpy.flatnonzero(mask).tolist())
+
+    return values, invalid_indexes, warning_indexes, set(overflow_indexes)
+
+def process_numpy_list_node(path, node, specs, errors, warnings):
+    # Same as process_list_node() for lists of (non-optional) integers or
+    # decimals, except that the adjusted node is an int64 or float64 NumPy
+    # array. The items are checked as a whole (see convert_column()), and
+    # only the offending items are processed one by one to report the same
+    # errors and warnings (in the same order) as process_list_node() does.
+    # Integers that don't fit in 64 bits are reported as errors too. If any
+    # item is invalid, None is returned.
+    if not check_list_node(path, node, specs, errors):
+        return
+
+    value = specs.value
+
+    column = convert_column(node, value)
+    if column is None:
+        # Items that are not numbers are processed one by one.
+        count = len(errors)
+        node = [adjust_node((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings) for (index, item) in enumerate(node)]
+        if len(errors) != count:
+            return
+
+        column = convert_column(node, value)
 
+    values, invalid_indexes, warning_indexes, overflow_indexes = column
+
+    # The order matters in fail-fast mode.
+    for index in sorted(invalid_indexes.union(warning_indexes)):
+        item_path = (path, LIST_ITEM_SEGMENT, index)
+
+        count = len(errors)
+        adjust_node(item_path, node[index], value, errors, warnings)
+        if index in overflow_indexes and len(errors) == count:
+            error = ValidationError(item_path, "value does not fit in 64 bits")
+            errors.append(error)
+
+    if len(invalid_indexes) > 0:
+        return
+
+    return values
+
+def process_columnar_list_node(path, node, specs, errors, warnings, structured):
+    # Same as process_list_node() for lists of (non-optional) maps of
+    # (non-optional) scalar fields, except that the adjusted node is made of
+    # one NumPy array per field (see convert_column()), either as a dict or
+    # merged into a structured array. The fields are checked as a whole, and
+    # only the offending items are processed one by one to report the same
+    # errors and warnings (in the same order) as process_list_node() does. If
+    # any item is invalid, None is returned.
+    if not check_list_node(path, node, specs, errors):
+        return
+
+    value = specs.value
+    fields = value.fields
+
+    columns = None
+    if all(type(item) is dict and item.keys() == fields.keys() for item in node):
+        columns = {}
+        for key, field in fields.items():
+            column = convert_column([item[key] for item in node], field)
+            if column is None:
+                columns = None
+                break
+
+            columns[key] = column
+
+    if columns is None:
+        # Items that are not valid objects (or fields that are not of the
+        # right type) are processed one by one.
+        count = len(errors)
+        node = [adjust_node((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings) for (index, item) in enumerate(node)]
+        if len(errors) != count:
+            return
+
+        columns = {key: convert_column([item[key] for item in node], field) for key, field in fields.items()}
+
+    invalid_indexes = set()
+    warning_indexes = set()
+    for _, column_invalid_indexes, column_warning_indexes, _ in columns.values():
+        invalid_indexes.update(column_invalid_indexes)
+        warning_indexes.update(column_warning_indexes)
+
+    # The order matters in fail-fast mode.
+    for index in sorted(invalid_indexes.union(warning_indexes)):
+        item_path = (path, LIST_ITEM_SEGMENT, index)
+
+        count = len(errors)
+        adjust_node(item_path, node[index], value, errors, warnings)
+        if index in invalid_indexes and len(errors) == count:
+            for key, (_, _, _, overflow_indexes) in columns.items():
+                if index in overflow_indexes:
+                    error = ValidationError((item_path, FIELD_SEGMENT, key), "value does not fit in 64 bits")
+                    errors.append(error)
+
+    if len(invalid_indexes) > 0:
+        return
+
+    arrays = {key: column[0] for key, column in columns.items()}
+    if not structured:
+        return arrays
+
+    adjusted_node = numpy.empty(len(node), dtype=[(key, values.dtype) for key, values in arrays.items()])
+    for key, values in arrays.items():
+        adjusted_node[key] = values
+
+    return adjusted_node
+
+def process_structured_list_node(path, node, specs, errors, warnings):
+    return process_columnar_list_node(path, node, specs, errors, warnings, True)
+
+def process_dict_list_node(path, node, specs, errors, warnings):
+    return process_columnar_list_node(path, node, specs, errors, warnings, False)
+
+# The typecodes of the arrays of the 'array' module for each type; flags are
+# stored in bytearrays.
+array_typecodes = {
+    'integer': 'q',
+    'decimal': 'd'
+}
+
+def process_array_list_node(path, node, specs, errors, warnings):
+    # Same as process_list_node() for lists of (non-optional) flags, integers
+    # or decimals, except that the adjusted node is a bytearray (one byte per
+    # flag, 0 or 1) or an array of the 'array' module (signed 64-bit integers
+    # and doubles). Integers that don't fit in 64 bits are reported as errors.
+    # If any item is invalid, None is returned.
+    if not check_list_node(path, node, specs, errors):
+        return
+
+    value = specs.value
+
+    count = len(errors)
+    items = [adjust_node((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings) for (index, item) in enumerate(node)]
+    if len(errors) != count:
+        return
+
+    if value.type == 'flag':
+        return bytearray(items)
+
+    try:
+        return array.array(array_typecodes[value.type], items)
+    except OverflowError:
+        for (index, item) in enumerate(items):
+            if not (INT64_MINIMUM <= item <= INT64_MAXIMUM):
+                error = ValidationError((path, LIST_ITEM_SEGMENT, index), "value does not fit in 64 bits")
+                errors.append(error)
+
+def check_tuple_node(path, node, specs, errors):
     if type(node) is not list:
         error = ValidationError(path, "was expecting a JSON array")
         errors.append(error)
-        return
+        return False
 
-    if len(node) != len(values):
-        error = ValidationError(path, f"length of the array must be {len(values)}")
+    if len(node) != len(specs.values):
+        error = ValidationError(path, f"length of the array must be {len(specs.values)}")
         errors.append(error)
+        return False
+
+    return True
+
+def process_tuple_node(path, node, specs, errors, warnings):
+    if not check_tuple_node(path, node, specs, errors):
         return
 
+    values = specs.values
+
     adjusted_node = []
     for (index, item) in enumerate(node):
-        adjusted_item = adjust_node(path + '.(' + str(index) + ')', item, values[index], errors, warnings)
+        adjusted_item = adjust_node((path, TUPLE_ITEM_SEGMENT, index), item, values[index], errors, warnings)
         adjusted_node.append(adjusted_item)
 
     return tuple(adjusted_node)
 
-def process_map_node(path, node, specs, errors, warnings):
-    fields = specs['fields']
-
+def check_map_node(path, node, specs, errors):
     if type(node) is not dict:
         error = ValidationError(path, "was expecting a JSON object")
         errors.append(error)
+        return False
+
+    return True
+
+def process_map_node(path, node, specs, errors, warnings):
+    if not check_map_node(path, node, specs, errors):
         return
 
+    fields = specs.fields
+
     node_errors = []
 
     adjusted_node = {}
     for key, value in node.items():
-        if key in fields.keys():
-            adjusted_node[key] = adjust_node(path + f'.{key}', value, fields[key], errors, warnings)
+        field = fields.get(key)
+        if field is not None:
+            adjusted_node[key] = adjust_node((path, FIELD_SEGMENT, key), value, field, errors, warnings)
         else:
             error = ValidationError(path, f"'{key}' field was unexpected")
             errors.append(error)
 
-    missing_keys = set(fields.keys()) - set(adjusted_node.keys())
-    for key in missing_keys:
-        error = ValidationError(path, f"'{key}' field was missing")
-        errors.append(error)
+    # Unexpected fields are never added to the adjusted node, so if it has as
+    # many fields as required, none of them is missing.
+    if len(adjusted_node) != len(specs.required):
+        missing_keys = specs.required - adjusted_node.keys()
+        for key in missing_keys:
+            error = ValidationError(path, f"'{key}' field was missing")
+            errors.append(error)
 
     if len(node_errors) > 0:
         errors.extend(node_errors)
@@ -290,22 +539,278 @@ adjust_node_map = {
     'map'    : process_map_node
 }
 
+check_node_map = {
+    'list' : check_list_node,
+    'tuple': check_tuple_node,
+    'map'  : check_map_node
+}
+
 def adjust_node(path, node, specs, errors, warnings):
-    optional = specs.get('option', False)
+    optional = specs.option
     if not optional and node is None:
-        error = ValueError(path, "value cant be null")
+        error = ValueError(render_path(path), "value cant be null")
         errors.append(error)
         return
     elif optional and node is None:
         return None
     else:
-        return adjust_node_map[specs['type']](path, node, specs, errors, warnings)
+        return adjust_node_map[specs.type](path, node, specs, errors, warnings)
+
+def validate_list_node(path, node, specs, errors, warnings):
+    if not check_list_node(path, node, specs, errors):
+        return
+
+    value = specs.value
+    for (index, item) in enumerate(node):
+        validate_node((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings)
+
+def validate_tuple_node(path, node, specs, errors, warnings):
+    if not check_tuple_node(path, node, specs, errors):
+        return
+
+    values = specs.values
+    for (index, item) in enumerate(node):
+        validate_node((path, TUPLE_ITEM_SEGMENT, index), item, values[index], errors, warnings)
+
+def validate_map_node(path, node, specs, errors, warnings):
+    if not check_map_node(path, node, specs, errors):
+        return
+
+    fields = specs.fields
+
+    count = 0
+    for key, value in node.items():
+        field = fields.get(key)
+        if field is not None:
+            validate_node((path, FIELD_SEGMENT, key), value, field, errors, warnings)
+            count += 1
+        else:
+            error = ValidationError(path, f"'{key}' field was unexpected")
+            errors.append(error)
+
+    # Unexpected keys are never required, so they don't affect the missing
+    # keys.
+    if count != len(specs.required):
+        missing_keys = specs.required - node.keys()
+        for key in missing_keys:
+            error = ValidationError(path, f"'{key}' field was missing")
+            errors.append(error)
+
+validate_node_map = {
+    'flag'   : process_flag_node,
+    'integer': process_integer_node,
+    'decimal': process_decimal_node,
+    'string' : process_string_node,
+    'enum'   : process_enum_node,
+    'list'   : validate_list_node,
+    'tuple'  : validate_tuple_node,
+    'map'    : validate_map_node
+}
+
+def validate_node(path, node, specs, errors, warnings):
+    # Same as adjust_node() except that the adjusted nodes of the containers
+    # are not constructed (the scalar nodes are still processed, but their
+    # adjusted value is discarded).
+    if node is None:
+        if not specs.option:
+            error = ValueError(render_path(path), "value cant be null")
+            errors.append(error)
+    else:
+        validate_node_map[specs.type](path, node, specs, errors, warnings)
+
+def share_list_node(path, node, specs, errors, warnings):
+    if not check_list_node(path, node, specs, errors):
+        return
+
+    value = specs.value
+
+    # The node is only copied once one of its items was changed.
+    adjusted_node = None
+    for (index, item) in enumerate(node):
+        adjusted_item = share_node((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings)
+        if adjusted_node is not None:
+            adjusted_node.append(adjusted_item)
+        elif adjusted_item is not item:
+            adjusted_node = node[:index]
+            adjusted_node.append(adjusted_item)
+
+    if adjusted_node is None:
+        return node
+
+    return adjusted_node
+
+def share_tuple_node(path, node, specs, errors, warnings):
+    if not check_tuple_node(path, node, specs, errors):
+        return
+
+    values = specs.values
+
+    # JSON arrays are always converted to tuples, but their items can still
+    # be shared.
+    adjusted_node = []
+    for (index, item) in enumerate(node):
+        adjusted_item = share_node((path, TUPLE_ITEM_SEGMENT, index), item, values[index], errors, warnings)
+        adjusted_node.append(adjusted_item)
+
+    return tuple(adjusted_node)
+
+def share_map_node(path, node, specs, errors, warnings):
+    if not check_map_node(path, node, specs, errors):
+        return
+
+    fields = specs.fields
+
+    # The changed fields are collected aside, and the node is only copied if
+    # there are some (or if it has unexpected fields).
+    changed_fields = None
+    count = 0
+    for key, value in node.items():
+        field = fields.get(key)
+        if field is not None:
+            adjusted_value = share_node((path, FIELD_SEGMENT, key), value, field, errors, warnings)
+            if adjusted_value is not value:
+                if changed_fields is None:
+                    changed_fields = {}
+                changed_fields[key] = adjusted_value
+            count += 1
+        else:
+            error = ValidationError(path, f"'{key}' field was unexpected")
+            errors.append(error)
+
+    # Unexpected keys are never required, so they don't affect the missing
+    # keys.
+    if count != len(specs.required):
+        missing_keys = specs.required - node.keys()
+        for key in missing_keys:
+            error = ValidationError(path, f"'{key}' field was missing")
+            errors.append(error)
+
+    if changed_fields is None and count == len(node):
+        return node
+
+    if changed_fields is None:
+        changed_fields = {}
+
+    adjusted_node = {}
+    for key, value in node.items():
+        if key in fields:
+            adjusted_node[key] = changed_fields.get(key, value)
+
+    return adjusted_node
+
+share_node_map = {
+    'flag'   : process_flag_node,
+    'integer': process_integer_node,
+    'decimal': process_decimal_node,
+    'string' : process_string_node,
+    'enum'   : process_enum_node,
+    'list'   : share_list_node,
+    'tuple'  : share_tuple_node,
+    'map'    : share_map_node
+}
+
+def share_node(path, node, specs, errors, warnings):
+    # Same as adjust_node() except that the lists and the dicts of the node
+    # are returned as is (instead of being copied) when none of their items
+    # was changed.
+    if node is None:
+        if not specs.option:
+            error = ValueError(render_path(path), "value cant be null")
+            errors.append(error)
+    else:
+        return share_node_map[specs.type](path, node, specs, errors, warnings)
+
+numeric_list_converters = {
+    'numpy': process_numpy_list_node,
+    'array': process_array_list_node
+}
 
-def document_to_object(document, specs, errors=None, warnings=None):
-    """ Convert a JSON document to its Python equivalent. """
+# The types of the items of the lists that are converted.
+numeric_list_types = {
+    'numpy': ('integer', 'decimal'),
+    'array': ('flag', 'integer', 'decimal')
+}
+
+columnar_list_converters = {
+    'structured': process_structured_list_node,
+    'dict'      : process_dict_list_node
+}
+
+SCALAR_TYPES = ('flag', 'integer', 'decimal', 'string', 'enum')
+
+def is_columnar_specs(specs):
+    # Lists of maps with scalar fields can be converted to columns, unless the
+    # maps or their fields are optional.
+    if specs.type != 'map' or specs.option:
+        return False
+
+    return all(field.type in SCALAR_TYPES and not field.option for field in specs.fields.values())
+
+def make_walk_maps(specs, numeric_lists, columnar, records):
+    # Return the convert map and the map types map (see
+    # adjust_node_iteratively()) of the lists of numbers, the lists of maps
+    # and the maps of the specs.
+    convert_map = {}
+    map_types = {}
+
+    walked_specs = set()
+
+    pending_specs = [specs]
+    while len(pending_specs) > 0:
+        specs = pending_specs.pop()
+
+        # Structurally equal specs may be the same compiled specs.
+        if id(specs) in walked_specs:
+            continue
+        walked_specs.add(id(specs))
+
+        if specs.type == 'list':
+            value = specs.value
+            if numeric_lists is not None and value.type in numeric_list_types[numeric_lists] and not value.option:
+                convert_map[id(specs)] = numeric_list_converters[numeric_lists]
+            elif columnar is not None and is_columnar_specs(value):
+                convert_map[id(specs)] = columnar_list_converters[columnar]
+            else:
+                pending_specs.append(value)
+        elif specs.type == 'tuple':
+            pending_specs.extend(specs.values)
+        elif specs.type == 'map':
+            if records:
+                record_class = get_record_class(specs)
+                if record_class is not None:
+                    map_types[id(specs)] = record_class
+
+            pending_specs.extend(specs.fields.values())
+
+    return convert_map, map_types
+
+def load_document(document, backend):
+    # Bytes-like documents are decoded straight from their buffer (the same
+    # way the 'json' module decodes bytes), unless the backend can parse them
+    # as is.
+    if not isinstance(document, str):
+        document = memoryview(document)
+        encoding = json.detect_encoding(document[:4].tobytes())
+        if not (backend.bytes_input and encoding == 'utf-8'):
+            document = str(document, encoding, 'surrogatepass')
+
+    return load_json(document, backend)
+
+def decoded_document_to_object(value, specs, errors=None, warnings=None, fail_fast=None, copy_on_write=False, numeric_lists=None, columnar=None, records=False):
+    """ Convert an already decoded JSON document to its Python equivalent.
+
+    It's the same as document_to_object() except that the document was
+    already parsed (by the 'json' module or an equivalent parser) into JSON
+    values (dict, list, str, int, float, bool and None); this avoids parsing
+    the document twice when it's decoded elsewhere.
+    """
 
     assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
     assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
+    assert numeric_lists in (None, *numeric_list_converters), f"'{numeric_lists}' numeric lists are not supported"
+    assert numeric_lists != 'numpy' or numpy is not None, "NumPy must be installed for 'numpy' numeric lists"
+    assert columnar in (None, *columnar_list_converters), f"'{columnar}' columnar lists are not supported"
+    assert columnar is None or numpy is not None, "NumPy must be installed for columnar lists"
 
     # We detect if users want lazy validation when they pass an empty list as
     # the errors parameters.
@@ -318,8 +823,38 @@ def document_to_object(document, specs, errors=None, warnings=None):
     if warnings is None:
         warnings = []
 
-    object = json.loads(document)
-    adjusted_object = adjust_node("root", object, specs, errors, warnings)
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    # In fail-fast mode, the errors are collected in a list that aborts the
+    # walk as soon as an error is added.
+    walk_errors = errors
+    if fail_fast:
+        walk_errors = FailFastErrors()
+
+    specs = track_specs(specs)
+
+    try:
+        adjust_function = specs.document_function
+        if copy_on_write:
+            adjust_function = specs.share_document_function
+
+        if numeric_lists is not None or columnar is not None or records:
+            convert_map, map_types = make_walk_maps(specs, numeric_lists, columnar, records)
+            adjusted_object = adjust_node_iteratively("root", value, specs, walk_errors, warnings, adjust_node_map, check_node_map, tuple, convert_map=convert_map, map_types=map_types)
+        elif adjust_function is not None:
+            adjusted_object = adjust_function("root", value, walk_errors, warnings)
+        elif specs.depth > MAXIMUM_RECURSIVE_DEPTH:
+            adjusted_object = adjust_node_iteratively("root", value, specs, walk_errors, warnings, adjust_node_map, check_node_map, tuple)
+        elif copy_on_write:
+            adjusted_object = share_node("root", value, specs, walk_errors, warnings)
+        else:
+            adjusted_object = adjust_node("root", value, specs, walk_errors, warnings)
+    except StopValidation:
+        adjusted_object = None
+
+    if fail_fast:
+        errors.extend(walk_errors)
 
     # If we're not lazy-validating the specs, we raise the first error that
     # occurred.
@@ -327,3 +862,152 @@ def document_to_object(document, specs, errors=None, warnings=None):
         raise errors[0]
 
     return adjusted_object
+
+def document_to_object(document, specs, errors=None, warnings=None, fail_fast=None, copy_on_write=False, backend=None, numeric_lists=None, columnar=None, records=False):
+    """ Convert a JSON document to its Python equivalent.
+
+    The document can be a str or a bytes-like object (bytes, bytearray,
+    memoryview, etc.) encoded in UTF-8, UTF-16 or UTF-32. The specs can either
+    be in its Python object form, or compiled with compile_specs().
+
+    In fail-fast mode, the document is not walked any further once an error
+    occurred, and only that error is reported. It's the default when the
+    errors parameter is not set since only the first error is raised.
+
+    In copy-on-write mode, the lists and dicts of the decoded document are
+    part of the returned object unless something in them was adjusted (a
+    number that was converted, a JSON array converted to a tuple, or an
+    unexpected field that was dropped); only the changed ones are copied.
+    Specs that are nested too deeply to be walked recursively are always
+    copied.
+
+    The backend parameter is the JSON backend (or its name) that parses the
+    document, see the 'backends' module; the default one is used if it's not
+    set.
+
+    With the numeric_lists parameter set to 'numpy', the lists of integers
+    and decimals (unless they're optional) are converted to int64 and float64
+    NumPy arrays instead of lists; their items are validated as a whole, but
+    with the same errors and warnings. Integers that don't fit in 64 bits are
+    reported as invalid, and lists with invalid items are converted to None.
+    It requires NumPy, and copy-on-write mode is ignored.
+
+    With the numeric_lists parameter set to 'array', it's the same except
+    that the lists are converted to arrays of the 'array' module ('q' and 'd'
+    typecodes), and the lists of flags to bytearrays (one byte per flag, 0 or
+    1); it doesn't require NumPy but the items are validated one by one.
+
+    With the columnar parameter, the lists of maps whose fields are scalars
+    (unless the maps or their fields are optional) are converted to one NumPy
+    array per field instead of a list of dicts; 'dict' returns the arrays in
+    a dict, and 'structured' merges them into a structured array. Flags are
+    converted to bool arrays, integers and decimals like numeric lists are,
+    strings are kept in object arrays, and enums are encoded as the index of
+    their value in the sorted values of the enum (in the smallest unsigned
+    integer type). The fields are validated as a whole, with the same errors
+    and warnings. It requires NumPy too.
+
+    With the records parameter, the maps are converted to records instead of
+    dicts, with one attribute per field (see the 'records' module); the
+    record class of a map is generated once for its specs. Maps with fields
+    that can't be attributes are still converted to dicts.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+
+    backend = get_json_backend(backend)
+
+    # The JSON parser is recursive, too deeply nested documents are reported
+    # like any other error.
+    try:
+        value = load_document(document, backend)
+    except RecursionError:
+        error = ValidationError("root", "document is nested too deeply")
+        if errors is None:
+            raise error from None
+
+        errors.append(error)
+        return
+
+    return decoded_document_to_object(value, specs, errors, warnings, fail_fast, copy_on_write, numeric_lists, columnar, records)
+
+def validate_decoded_document(value, specs, errors=None, warnings=None, fail_fast=None):
+    """ Validate an already decoded JSON document without converting it.
+
+    It's the same as validate_document() except that the document was already
+    parsed, see decoded_document_to_object().
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+    assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
+
+    # We detect if users want lazy validation when they pass an empty list as
+    # the errors parameters.
+    lazy_validation = False
+    if errors is None:
+        errors = []
+    else:
+        lazy_validation = True
+
+    if warnings is None:
+        warnings = []
+
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    # In fail-fast mode, the errors are collected in a list that aborts the
+    # walk as soon as an error is added.
+    walk_errors = errors
+    if fail_fast:
+        walk_errors = FailFastErrors()
+
+    specs = track_specs(specs)
+
+    try:
+        validate_function = specs.validate_document_function
+        if validate_function is not None:
+            validate_function("root", value, walk_errors, warnings)
+        elif specs.depth > MAXIMUM_RECURSIVE_DEPTH:
+            adjust_node_iteratively("root", value, specs, walk_errors, warnings, adjust_node_map, check_node_map, tuple, validate_only=True)
+        else:
+            validate_node("root", value, specs, walk_errors, warnings)
+    except StopValidation:
+        pass
+
+    if fail_fast:
+        errors.extend(walk_errors)
+
+    # If we're not lazy-validating the specs, we raise the first error that
+    # occurred.
+    if not lazy_validation and len(errors) > 0:
+        raise errors[0]
+
+    return len(errors) == 0
+
+def validate_document(document, specs, errors=None, warnings=None, fail_fast=None, backend=None):
+    """ Validate a JSON document without converting it.
+
+    It's the same as document_to_object() except that the Python object is not
+    constructed, which is cheaper when only the validity of the document
+    matters. It returns True if the document is valid (and raises the first
+    error otherwise, unless the errors parameter is set, in which case it
+    returns False).
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+
+    backend = get_json_backend(backend)
+
+    # The JSON parser is recursive, too deeply nested documents are reported
+    # like any other error.
+    try:
+        value = load_document(document, backend)
+    except RecursionError:
+        error = ValidationError("root", "document is nested too deeply")
+        if errors is None:
+            raise error from None
+
+        errors.append(error)
+        return False
+
+    return validate_decoded_document(value, specs, errors, warnings, fail_fast)
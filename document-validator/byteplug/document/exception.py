@@ -6,12 +6,19 @@
 #
 # Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
 
+from byteplug.document.utils import render_path
+
+# The path is rendered to its string form (see the 'utils' module), and the
+# arguments of the exception are updated accordingly.
+
 class ValidationError(Exception):
     def __init__(self, path, message):
-        self.path = path
+        self.path = render_path(path)
         self.message = message
+        self.args = (self.path, message)
 
 class ValidationWarning(Warning):
     def __init__(self, path, message):
-        self.path = path
+        self.path = render_path(path)
         self.message = message
+        self.args = (self.path, message)
@@ -0,0 +1,110 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import io
+import os
+import mmap
+from byteplug.document.document import document_to_object
+from byteplug.document.streaming import validate_document_stream, iter_documents_to_objects
+
+# Notes:
+# - This module implements the conversion of JSON documents stored in files.
+#   The files are memory-mapped instead of being read, so the document is
+#   parsed from the mapped pages and never copied into a Python bytes object.
+#   It only saves memory if the JSON backend accepts bytes-like documents;
+#   otherwise (like with the standard library), the whole document is decoded
+#   to a str first, which takes as much memory as reading the file.
+# - The mappings are closed as soon as the documents are converted, unless
+#   views of them are still referenced (by the traceback of an exception for
+#   instance); they're then unmapped once they're no longer referenced.
+# - Empty files can't be memory-mapped; an empty buffer is used instead.
+
+__all__ = [
+    'document_file_to_object',
+    'validate_document_file',
+    'iter_document_file_to_objects'
+]
+
+def map_file(path, sequential=False):
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return io.BytesIO()
+
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # Tell the kernel the file is read from the start to the end so it reads
+    # ahead (and drops the pages that were read) more aggressively.
+    if sequential and hasattr(buffer, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        buffer.madvise(mmap.MADV_SEQUENTIAL)
+
+    return buffer
+
+def unmap_file(buffer):
+    try:
+        buffer.close()
+    except BufferError:
+        # Views of the mapping are still referenced.
+        pass
+
+def close_after(iterator, buffer):
+    # Yield the items of the iterator and unmap the file once it's exhausted
+    # (or closed).
+    try:
+        yield from iterator
+    finally:
+        unmap_file(buffer)
+
+def document_file_to_object(path, specs, errors=None, warnings=None, fail_fast=None, copy_on_write=False, backend=None):
+    """ Convert a JSON document stored in a file into its Python equivalent.
+
+    It's the same as document_to_object() except that the document is read
+    from the file at the given path, which is memory-mapped. The file is
+    encoded in UTF-8, UTF-16 or UTF-32.
+
+    Note that it only saves memory (compared to reading the file) with a JSON
+    backend that accepts bytes-like documents, such as 'orjson'; with the
+    standard library, the document is decoded into a str as a whole.
+    """
+
+    buffer = map_file(path)
+    if isinstance(buffer, io.BytesIO):
+        return document_to_object(buffer.getvalue(), specs, errors, warnings, fail_fast, copy_on_write, backend)
+
+    try:
+        return document_to_object(buffer, specs, errors, warnings, fail_fast, copy_on_write, backend)
+    finally:
+        unmap_file(buffer)
+
+def validate_document_file(path, specs, errors=None, warnings=None, fail_fast=None, chunk_size=65536):
+    """ Validate a JSON document stored in a file.
+
+    It's the same as validate_document_stream() except that the document is
+    read from the file at the given path, which is memory-mapped. The file is
+    encoded in UTF-8. If the specs is a list, the memory that is used doesn't
+    depend on the size of the file.
+    """
+
+    buffer = map_file(path, sequential=True)
+    try:
+        return validate_document_stream(buffer, specs, errors, warnings, fail_fast, chunk_size)
+    finally:
+        unmap_file(buffer)
+
+def iter_document_file_to_objects(path, specs, on_invalid='yield', fail_fast=False, backend=None, statistics=None):
+    """ Convert the newline-delimited JSON documents stored in a file.
+
+    It's the same as iter_documents_to_objects() except that the documents
+    are read from the file at the given path, which is memory-mapped. The
+    file is encoded in UTF-8. The file is unmapped once the generator is
+    exhausted (or closed).
+    """
+
+    buffer = map_file(path, sequential=True)
+    lines = iter(buffer.readline, b'')
+
+    return close_after(iter_documents_to_objects(lines, specs, on_invalid, fail_fast, backend, statistics), buffer)
@@ -0,0 +1,275 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import struct
+from byteplug.document.document import decoded_document_to_object
+from byteplug.document.object import object_to_document
+from byteplug.document.exception import ValidationError
+
+# Notes:
+# - This module implements MessagePack as an alternative to JSON for the
+#   documents. It's a pure-Python implementation of the format that only
+#   deals with the values a JSON document can have (nil, booleans, integers,
+#   floats, strings, arrays and maps); binary strings are decoded to bytes
+#   (which are then reported as invalid nodes) and extension types are
+#   rejected.
+# - Decoded documents are converted and validated exactly like decoded JSON
+#   documents (see decoded_document_to_object()), and objects are converted
+#   and validated like object_to_document() does before being encoded.
+# - Integers are encoded in their smallest representation and floats in
+#   double precision; integers that don't fit in 64 bits can't be encoded.
+# - Data that is not valid MessagePack raises a ValueError, like the JSON
+#   parser does with invalid JSON documents.
+
+__all__ = ['msgpack_to_object', 'object_to_msgpack']
+
+INTEGER_FORMATS = {
+    0xCC: struct.Struct('>B'),
+    0xCD: struct.Struct('>H'),
+    0xCE: struct.Struct('>I'),
+    0xCF: struct.Struct('>Q'),
+    0xD0: struct.Struct('>b'),
+    0xD1: struct.Struct('>h'),
+    0xD2: struct.Struct('>i'),
+    0xD3: struct.Struct('>q')
+}
+
+LENGTH_FORMATS = {
+    0xD9: struct.Struct('>B'), # str 8
+    0xDA: struct.Struct('>H'), # str 16
+    0xDB: struct.Struct('>I'), # str 32
+    0xC4: struct.Struct('>B'), # bin 8
+    0xC5: struct.Struct('>H'), # bin 16
+    0xC6: struct.Struct('>I'), # bin 32
+    0xDC: struct.Struct('>H'), # array 16
+    0xDD: struct.Struct('>I'), # array 32
+    0xDE: struct.Struct('>H'), # map 16
+    0xDF: struct.Struct('>I')  # map 32
+}
+
+float32 = struct.Struct('>f')
+float64 = struct.Struct('>d')
+
+def pack_length(buffer, length, fixed_marker, fixed_maximum, markers):
+    # The markers are the ones of the 8 (if any), 16 and 32 bits lengths.
+    if length <= fixed_maximum:
+        buffer.append(fixed_marker | length)
+    elif len(markers) == 3 and length <= 0xFF:
+        buffer.append(markers[0])
+        buffer.append(length)
+    elif length <= 0xFFFF:
+        buffer.append(markers[-2])
+        buffer += length.to_bytes(2, 'big')
+    elif length <= 0xFFFFFFFF:
+        buffer.append(markers[-1])
+        buffer += length.to_bytes(4, 'big')
+    else:
+        raise ValueError("value is too long for MessagePack")
+
+def pack_value(buffer, value):
+    value_type = type(value)
+
+    if value is None:
+        buffer.append(0xC0)
+    elif value_type is bool:
+        buffer.append(0xC3 if value else 0xC2)
+    elif value_type is int:
+        if 0 <= value < 0x80 or -32 <= value < 0:
+            buffer.append(value & 0xFF)
+        elif value > 0:
+            for marker in (0xCC, 0xCD, 0xCE, 0xCF):
+                integer_format = INTEGER_FORMATS[marker]
+                if value < 1 << (integer_format.size * 8):
+                    buffer.append(marker)
+                    buffer += integer_format.pack(value)
+                    break
+            else:
+                raise ValueError("integer does not fit in 64 bits")
+        else:
+            for marker in (0xD0, 0xD1, 0xD2, 0xD3):
+                integer_format = INTEGER_FORMATS[marker]
+                if value >= -(1 << (integer_format.size * 8 - 1)):
+                    buffer.append(marker)
+                    buffer += integer_format.pack(value)
+                    break
+            else:
+                raise ValueError("integer does not fit in 64 bits")
+    elif value_type is float:
+        buffer.append(0xCB)
+        buffer += float64.pack(value)
+    elif value_type is str:
+        data = value.encode('utf-8')
+        pack_length(buffer, len(data), 0xA0, 31, (0xD9, 0xDA, 0xDB))
+        buffer += data
+    elif value_type is list or value_type is tuple:
+        pack_length(buffer, len(value), 0x90, 15, (0xDC, 0xDD))
+        for item in value:
+            pack_value(buffer, item)
+    elif value_type is dict:
+        pack_length(buffer, len(value), 0x80, 15, (0xDE, 0xDF))
+        for key, item in value.items():
+            pack_value(buffer, key)
+            pack_value(buffer, item)
+    else:
+        raise TypeError(f"{value_type.__name__} values can't be encoded to MessagePack")
+
+def unpack_value(data, offset):
+    byte = data[offset]
+    offset += 1
+
+    # Fixed-size integers, strings, arrays and maps first.
+    if byte < 0x80:
+        return byte, offset
+    elif byte >= 0xE0:
+        return byte - 0x100, offset
+    elif byte >= 0xA0 and byte <= 0xBF:
+        return unpack_string(data, offset, byte & 0x1F)
+    elif byte >= 0x90 and byte <= 0x9F:
+        return unpack_array(data, offset, byte & 0x0F)
+    elif byte <= 0x8F:
+        return unpack_map(data, offset, byte & 0x0F)
+
+    if byte == 0xC0:
+        return None, offset
+    elif byte == 0xC2:
+        return False, offset
+    elif byte == 0xC3:
+        return True, offset
+    elif byte == 0xCA:
+        return float32.unpack_from(data, offset)[0], offset + 4
+    elif byte == 0xCB:
+        return float64.unpack_from(data, offset)[0], offset + 8
+
+    integer_format = INTEGER_FORMATS.get(byte)
+    if integer_format is not None:
+        return integer_format.unpack_from(data, offset)[0], offset + integer_format.size
+
+    length_format = LENGTH_FORMATS.get(byte)
+    if length_format is None:
+        raise ValueError(f"unsupported MessagePack type at offset {offset - 1}")
+
+    length = length_format.unpack_from(data, offset)[0]
+    offset += length_format.size
+
+    if byte in (0xD9, 0xDA, 0xDB):
+        return unpack_string(data, offset, length)
+    elif byte in (0xC4, 0xC5, 0xC6):
+        return unpack_bytes(data, offset, length)
+    elif byte in (0xDC, 0xDD):
+        return unpack_array(data, offset, length)
+    else:
+        return unpack_map(data, offset, length)
+
+def unpack_bytes(data, offset, length):
+    end = offset + length
+    if end > len(data):
+        raise IndexError
+
+    return bytes(data[offset:end]), end
+
+def unpack_string(data, offset, length):
+    end = offset + length
+    if end > len(data):
+        raise IndexError
+
+    return str(data[offset:end], 'utf-8'), end
+
+def unpack_array(data, offset, length):
+    # Each item takes one byte at least.
+    if length > len(data) - offset:
+        raise IndexError
+
+    value = []
+    for _ in range(length):
+        item, offset = unpack_value(data, offset)
+        value.append(item)
+
+    return value, offset
+
+def unpack_map(data, offset, length):
+    if length * 2 > len(data) - offset:
+        raise IndexError
+
+    value = {}
+    for _ in range(length):
+        key, offset = unpack_value(data, offset)
+        if type(key) in (list, dict):
+            raise ValueError(f"unsupported MessagePack map key at offset {offset}")
+
+        value[key], offset = unpack_value(data, offset)
+
+    return value, offset
+
+def load_msgpack(data):
+    if type(data) is not bytes:
+        data = memoryview(data).cast('B')
+
+    try:
+        value, offset = unpack_value(data, 0)
+    except (IndexError, struct.error):
+        raise ValueError("MessagePack document is truncated") from None
+
+    if offset != len(data):
+        raise ValueError(f"extra data at offset {offset}")
+
+    return value
+
+def dump_msgpack(value):
+    buffer = bytearray()
+    pack_value(buffer, value)
+
+    return bytes(buffer)
+
+def msgpack_to_object(document, specs, errors=None, warnings=None, fail_fast=None, copy_on_write=False):
+    """ Convert a MessagePack document to its Python equivalent.
+
+    The document is a bytes-like object. It's the same as document_to_object()
+    (same result, errors and warnings) except that the document is encoded in
+    MessagePack instead of JSON. A ValueError is raised if it's not valid
+    MessagePack.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+
+    # The decoder is recursive, too deeply nested documents are reported like
+    # any other error.
+    try:
+        value = load_msgpack(document)
+    except RecursionError:
+        error = ValidationError("root", "document is nested too deeply")
+        if errors is None:
+            raise error from None
+
+        errors.append(error)
+        return
+
+    return decoded_document_to_object(value, specs, errors, warnings, fail_fast, copy_on_write)
+
+def object_to_msgpack(object, specs, errors=None, warnings=None, fail_fast=None):
+    """ Convert Python object to its MessagePack equivalent.
+
+    It's the same as object_to_document() (same errors and warnings) except
+    that the document is encoded in MessagePack instead of JSON and returned
+    as bytes. A ValueError is raised if an integer doesn't fit in 64 bits.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+
+    document = object_to_document(object, specs, errors, warnings, no_dump=True, fail_fast=fail_fast)
+
+    # The encoder is recursive, too deeply nested objects are reported like
+    # any other error.
+    try:
+        return dump_msgpack(document)
+    except RecursionError:
+        error = ValidationError("root", "document is nested too deeply")
+        if errors is None:
+            raise error from None
+
+        errors.append(error)
+        return
@@ -6,9 +6,13 @@
 #
 # Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
 
-import re
 import json
-from byteplug.document.utils import read_minimum_value, read_maximum_value
+from byteplug.document.backends import get_json_backend, dump_json
+from byteplug.document.tiering import track_specs
+from byteplug.document.traversal import MAXIMUM_RECURSIVE_DEPTH, adjust_node_iteratively
+from byteplug.document.arrays import ndarray, accepts_arrays, adjust_array_node, validate_array_node
+from byteplug.document.utils import FailFastErrors, StopValidation
+from byteplug.document.utils import LIST_ITEM_SEGMENT, TUPLE_ITEM_SEGMENT, FIELD_SEGMENT, render_path
 from byteplug.document.exception import ValidationError
 
 # Notes:
@@ -20,8 +24,15 @@ from byteplug.document.exception import ValidationError
 # - For each node type, we refer to the standard document that describes how
 #   the augmented type is implemented in its JSON form; we care about validity
 #   of its JSON form, its Python form is not defined by the standard.
+# - NumPy arrays are accepted in place of some lists, see the 'arrays'
+#   module.
 
-__all__ = ['object_to_document']
+__all__ = [
+    'object_to_document',
+    'iter_object_to_document',
+    'write_object_to_document',
+    'validate_object'
+]
 
 def process_flag_node(path, node, specs, errors, warnings):
     if type(node) is not bool:
@@ -39,12 +50,11 @@ def process_integer_node(path, node, specs, errors, warnings):
 
     node_errors = []
 
-    minimum = read_minimum_value(specs)
-    maximum = read_maximum_value(specs)
+    minimum = specs.minimum
+    maximum = specs.maximum
 
     if minimum:
         is_exclusive, value = minimum
-        value = int(value)
 
         if is_exclusive:
             if not (node > value):
@@ -57,7 +67,6 @@ def process_integer_node(path, node, specs, errors, warnings):
 
     if maximum:
         is_exclusive, value = maximum
-        value = int(value)
 
         if is_exclusive:
             if not (node < value):
@@ -82,8 +91,8 @@ def process_decimal_node(path, node, specs, errors, warnings):
 
     node_errors = []
 
-    minimum = read_minimum_value(specs)
-    maximum = read_maximum_value(specs)
+    minimum = specs.minimum
+    maximum = specs.maximum
 
     if minimum:
         is_exclusive, value = minimum
@@ -121,35 +130,27 @@ def process_string_node(path, node, specs, errors, warnings):
 
     node_errors = []
 
-    length = specs.get('length')
+    length = specs.length
     if length is not None:
-        if type(length) in (int, float):
-            length = int(length)
-
-            if len(node) != length:
-                error = ValidationError(path, f"length must be equal to {length}")
-                node_errors.append(error)
-        else:
-            minimum = length.get("minimum")
-            maximum = length.get("maximum")
-
-            if minimum is not None:
-                minimum = int(minimum)
-
-                if not (len(node) >= minimum):
-                    error = ValidationError(path, f"length must be equal or greater than {minimum}")
-                    node_errors.append(error)
+        if len(node) != length:
+            error = ValidationError(path, f"length must be equal to {length}")
+            node_errors.append(error)
 
-            if maximum is not None:
-                maximum = int(maximum)
+    minimum = specs.minimum_length
+    if minimum is not None:
+        if not (len(node) >= minimum):
+            error = ValidationError(path, f"length must be equal or greater than {minimum}")
+            node_errors.append(error)
 
-                if not (len(node) <= maximum):
-                    error = ValidationError(path, f"length must be equal or lower than {maximum}")
-                    node_errors.append(error)
+    maximum = specs.maximum_length
+    if maximum is not None:
+        if not (len(node) <= maximum):
+            error = ValidationError(path, f"length must be equal or lower than {maximum}")
+            node_errors.append(error)
 
-    pattern = specs.get('pattern')
+    pattern = specs.pattern
     if pattern is not None:
-        if not re.match(pattern, node):
+        if not pattern.match(node):
             error = ValidationError(path, "value did not match the pattern")
             node_errors.append(error)
 
@@ -165,106 +166,122 @@ def process_enum_node(path, node, specs, errors, warnings):
         errors.append(error)
         return
 
-    values = specs['values']
-    if node not in values:
+    if node not in specs.values:
         error = ValidationError(path, "enum value is invalid")
         errors.append(error)
         return
 
     return node
 
-def process_list_node(path, node, specs, errors, warnings):
-    value = specs['value']
-
+def check_list_node(path, node, specs, errors):
     if type(node) is not list:
         error = ValidationError(path, "was expecting a list")
         errors.append(error)
-        return
+        return False
 
-    length = specs.get('length')
+    length = specs.length
     if length is not None:
-        if type(length) in (int, float):
-            length = int(length)
+        if len(node) != length:
+            error = ValidationError(path, f"length must be equal to {length}")
+            errors.append(error)
+            return False
 
-            if len(node) != length:
-                error = ValidationError(path, f"length must be equal to {length}")
-                errors.append(error)
-                return
-        else:
-            minimum = length.get("minimum")
-            maximum = length.get("maximum")
+    minimum = specs.minimum_length
+    if minimum is not None:
+        if not (len(node) >= minimum):
+            error = ValidationError(path, f"length must be equal or greater than {minimum}")
+            errors.append(error)
+            return False
 
-            if minimum is not None:
-                minimum = int(minimum)
+    maximum = specs.maximum_length
+    if maximum is not None:
+        if not (len(node) <= maximum):
+            error = ValidationError(path, f"length must be equal or lower than {maximum}")
+            errors.append(error)
+            return False
 
-                if not (len(node) >= minimum):
-                    error = ValidationError(path, f"length must be equal or greater than {minimum}")
-                    errors.append(error)
-                    return
+    return True
 
-            if maximum is not None:
-                maximum = int(maximum)
+def process_list_node(path, node, specs, errors, warnings):
+    if type(node) is ndarray and accepts_arrays(specs):
+        return adjust_array_node(path, node, specs, errors, warnings)
 
-                if not (len(node) <= maximum):
-                    error = ValidationError(path, f"length must be equal or lower than {maximum}")
-                    errors.append(error)
-                    return
+    if not check_list_node(path, node, specs, errors):
+        return
+
+    value = specs.value
 
     adjusted_node = []
     for (index, item) in enumerate(node):
-        adjusted_item = adjust_node(path + '.[' + str(index) + ']', item, value, errors, warnings)
+        adjusted_item = adjust_node((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings)
         adjusted_node.append(adjusted_item)
 
     return adjusted_node
 
-def process_tuple_node(path, node, specs, errors, warnings):
-    values = specs['values']
-
+def check_tuple_node(path, node, specs, errors):
     if type(node) is not tuple:
         error = ValidationError(path, "was expecting a tuple")
         errors.append(error)
-        return
+        return False
 
-    if len(node) != len(values):
-        error = ValidationError(path, f"length of the tuple must be {len(values)}")
+    if len(node) != len(specs.values):
+        error = ValidationError(path, f"length of the tuple must be {len(specs.values)}")
         errors.append(error)
+        return False
+
+    return True
+
+def process_tuple_node(path, node, specs, errors, warnings):
+    if not check_tuple_node(path, node, specs, errors):
         return
 
+    values = specs.values
+
     adjusted_node = []
     for (index, item) in enumerate(node):
-        adjusted_item = adjust_node(path + '.(' + str(index) + ')', item, values[index], errors, warnings)
+        adjusted_item = adjust_node((path, TUPLE_ITEM_SEGMENT, index), item, values[index], errors, warnings)
         adjusted_node.append(adjusted_item)
 
     return adjusted_node
 
-def process_map_node(path, node, specs, errors, warnings):
-    fields = specs['fields']
-
+def check_map_node(path, node, specs, errors):
     if type(node) is not dict:
         error = ValidationError(path, "was expecting a dict")
         errors.append(error)
-        return
+        return False
 
     for key in node.keys():
         if type(key) is not str:
             error = ValidationError(path, "keys of the dict must be string exclusively")
             errors.append(error)
-            return
+            return False
+
+    return True
+
+def process_map_node(path, node, specs, errors, warnings):
+    if not check_map_node(path, node, specs, errors):
+        return
+
+    fields = specs.fields
 
     node_errors = []
 
     adjusted_node = {}
     for key, value in node.items():
-        if key in fields.keys():
-            adjusted_node[key] = adjust_node(path + f'.{key}', value, fields[key], errors, warnings)
+        field = fields.get(key)
+        if field is not None:
+            adjusted_node[key] = adjust_node((path, FIELD_SEGMENT, key), value, field, errors, warnings)
         else:
             error = ValidationError(path, f"'{key}' field was unexpected")
             errors.append(error)
 
-    missing_keys = set(fields.keys()) - set(adjusted_node.keys())
-    for key in missing_keys:
-        error = ValidationError(path, f"'{key}' field was missing")
-        errors.append(error)
+    # Unexpected fields are never added to the adjusted node, so if it has as
+    # many fields as required, none of them is missing.
+    if len(adjusted_node) != len(specs.required):
+        missing_keys = specs.required - adjusted_node.keys()
+        for key in missing_keys:
+            error = ValidationError(path, f"'{key}' field was missing")
+            errors.append(error)
 
     if len(node_errors) > 0:
         errors.extend(node_errors)
@@ -283,21 +300,105 @@ adjust_node_map = {
     'map'    : process_map_node
 }
 
+check_node_map = {
+    'list' : check_list_node,
+    'tuple': check_tuple_node,
+    'map'  : check_map_node
+}
+
 def adjust_node(path, node, specs, errors, warnings):
-    optional = specs.get('option', False)
+    optional = specs.option
     if not optional and node is None:
-        error = ValueError(path, "value cant be null")
+        error = ValueError(render_path(path), "value cant be null")
         errors.append(error)
         return
     elif optional and node is None:
         return None
     else:
-        return adjust_node_map[specs['type']](path, node, specs, errors, warnings)
+        return adjust_node_map[specs.type](path, node, specs, errors, warnings)
 
-def object_to_document(object, specs, errors=None, warnings=None, no_dump=False):
-    """ Convert Python object to its JSON equivalent. """
+def validate_list_node(path, node, specs, errors, warnings):
+    if type(node) is ndarray and accepts_arrays(specs):
+        validate_array_node(path, node, specs, errors, warnings)
+        return
+
+    if not check_list_node(path, node, specs, errors):
+        return
+
+    value = specs.value
+    for (index, item) in enumerate(node):
+        validate_node((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings)
+
+def validate_tuple_node(path, node, specs, errors, warnings):
+    if not check_tuple_node(path, node, specs, errors):
+        return
+
+    values = specs.values
+    for (index, item) in enumerate(node):
+        validate_node((path, TUPLE_ITEM_SEGMENT, index), item, values[index], errors, warnings)
+
+def validate_map_node(path, node, specs, errors, warnings):
+    if not check_map_node(path, node, specs, errors):
+        return
+
+    fields = specs.fields
+
+    count = 0
+    for key, value in node.items():
+        field = fields.get(key)
+        if field is not None:
+            validate_node((path, FIELD_SEGMENT, key), value, field, errors, warnings)
+            count += 1
+        else:
+            error = ValidationError(path, f"'{key}' field was unexpected")
+            errors.append(error)
 
-    # Assume specs is valid (Python object form)
+    # Unexpected keys are never required, so they don't affect the missing
+    # keys.
+    if count != len(specs.required):
+        missing_keys = specs.required - node.keys()
+        for key in missing_keys:
+            error = ValidationError(path, f"'{key}' field was missing")
+            errors.append(error)
+
+validate_node_map = {
+    'flag'   : process_flag_node,
+    'integer': process_integer_node,
+    'decimal': process_decimal_node,
+    'string' : process_string_node,
+    'enum'   : process_enum_node,
+    'list'   : validate_list_node,
+    'tuple'  : validate_tuple_node,
+    'map'    : validate_map_node
+}
+
+def validate_node(path, node, specs, errors, warnings):
+    # Same as adjust_node() except that the adjusted nodes of the containers
+    # are not constructed (the scalar nodes are still processed, but their
+    # adjusted value is discarded).
+    if node is None:
+        if not specs.option:
+            error = ValueError(render_path(path), "value cant be null")
+            errors.append(error)
+    else:
+        validate_node_map[specs.type](path, node, specs, errors, warnings)
+
+def object_to_document(object, specs, errors=None, warnings=None, no_dump=False, fail_fast=None, backend=None):
+    """ Convert Python object to its JSON equivalent.
+
+    The specs can either be in its Python object form, or compiled with
+    compile_specs().
+
+    In fail-fast mode, the object is not walked any further once an error
+    occurred, and only that error is reported. It's the default when the
+    errors parameter is not set since only the first error is raised.
+
+    The backend parameter is the JSON backend (or its name) that encodes the
+    document, see the 'backends' module; the default one is used if it's not
+    set.
+    """
+
+    # Assume specs is valid
 
     assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
     assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
@@ -313,8 +414,56 @@ def object_to_document(object, specs, errors=None, warnings=None, no_dump=False)
     if warnings is None:
         warnings = []
 
-    document = adjust_node("root", object, specs, errors, warnings)
-    dumped_document = json.dumps(document)
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    # In fail-fast mode, the errors are collected in a list that aborts the
+    # walk as soon as an error is added.
+    walk_errors = errors
+    if fail_fast:
+        walk_errors = FailFastErrors()
+
+    specs = track_specs(specs)
+    backend = get_json_backend(backend)
+
+    # The generated encoder validates and encodes the object in the same walk;
+    # it produces the same document as the standard library JSON encoder, so
+    # it's only used with that backend.
+    encode_function = specs.encode_object_function
+    if no_dump or backend.dumps is not json.dumps:
+        encode_function = None
+
+    document = None
+    dumped_document = None
+
+    try:
+        adjust_function = specs.object_function
+        if encode_function is not None:
+            dumped_document = encode_function("root", object, walk_errors, warnings)
+        elif adjust_function is not None:
+            document = adjust_function("root", object, walk_errors, warnings)
+        elif specs.depth > MAXIMUM_RECURSIVE_DEPTH:
+            document = adjust_node_iteratively("root", object, specs, walk_errors, warnings, adjust_node_map, check_node_map, list)
+        else:
+            document = adjust_node("root", object, specs, walk_errors, warnings)
+    except StopValidation:
+        pass
+
+    if fail_fast:
+        errors.extend(walk_errors)
+
+    # The JSON encoder is recursive, too deeply nested objects are reported
+    # like any other error.
+    if not no_dump and dumped_document is None:
+        try:
+            dumped_document = dump_json(document, backend)
+        except RecursionError:
+            error = ValidationError("root", "document is nested too deeply")
+            if not lazy_validation:
+                raise error from None
+
+            errors.append(error)
+            return
 
     # If we're not lazy-validating the specs, we raise the first error that
     # occurred.
@@ -324,4 +473,231 @@ def object_to_document(object, specs, errors=None, warnings=None, no_dump=False)
     if no_dump:
         return document
     else:
-        return dumped_document
\ No newline at end of file
+        return dumped_document
+
+def adjust_item(path, node, specs, errors, warnings):
+    adjust_function = specs.object_function
+    if adjust_function is not None:
+        return adjust_function(path, node, errors, warnings)
+    elif specs.depth > MAXIMUM_RECURSIVE_DEPTH:
+        return adjust_node_iteratively(path, node, specs, errors, warnings, adjust_node_map, check_node_map, list)
+    else:
+        return adjust_node(path, node, specs, errors, warnings)
+
+def encode_item(path, node, specs, errors, warnings, backend):
+    encode_function = specs.encode_object_function
+    if encode_function is not None and backend.dumps is json.dumps:
+        return encode_function(path, node, errors, warnings)
+    else:
+        return dump_json(adjust_item(path, node, specs, errors, warnings), backend)
+
+def encode_node(path, node, specs, errors, warnings, backend):
+    # Yield the pieces of the JSON document of a node. The items of a list
+    # are converted and encoded one at a time (each of them as a whole), and
+    # maps and tuples are encoded field by field, so only one item of each
+    # list is converted at once.
+    node_type = specs.type
+    if node is None or node_type not in check_node_map or specs.depth > MAXIMUM_RECURSIVE_DEPTH or type(node) is ndarray:
+        yield encode_item(path, node, specs, errors, warnings, backend)
+        return
+
+    if not check_node_map[node_type](path, node, specs, errors):
+        yield backend.dumps(None)
+        return
+
+    item_separator, key_separator = backend.separators
+
+    if node_type == 'list':
+        # The specs of the items is tracked on its own since the items are
+        # converted one at a time; it's resolved once for the whole list.
+        value = track_specs(specs.value)
+
+        yield '['
+        for (index, item) in enumerate(node):
+            if index > 0:
+                yield item_separator
+
+            yield encode_item((path, LIST_ITEM_SEGMENT, index), item, value, errors, warnings, backend)
+        yield ']'
+    elif node_type == 'tuple':
+        values = specs.values
+
+        yield '['
+        for (index, item) in enumerate(node):
+            if index > 0:
+                yield item_separator
+
+            yield from encode_node((path, TUPLE_ITEM_SEGMENT, index), item, values[index], errors, warnings, backend)
+        yield ']'
+    else:
+        fields = specs.fields
+
+        yield '{'
+        count = 0
+        for key, value in node.items():
+            field = fields.get(key)
+            if field is not None:
+                if count > 0:
+                    yield item_separator
+
+                yield backend.dumps(key) + key_separator
+                yield from encode_node((path, FIELD_SEGMENT, key), value, field, errors, warnings, backend)
+                count += 1
+            else:
+                error = ValidationError(path, f"'{key}' field was unexpected")
+                errors.append(error)
+        yield '}'
+
+        if count != len(specs.required):
+            missing_keys = specs.required - node.keys()
+            for key in missing_keys:
+                error = ValidationError(path, f"'{key}' field was missing")
+                errors.append(error)
+
+def iter_object_to_document(object, specs, errors=None, warnings=None, fail_fast=None, chunk_size=65536, backend=None):
+    """ Convert Python object to its JSON equivalent, chunk by chunk.
+
+    It's a generator that yields the JSON document that object_to_document()
+    would return, as str chunks of about chunk_size characters. The object is
+    validated and encoded in the same walk; the items of the lists are
+    converted one at a time, so neither the whole converted object nor the
+    whole document is ever in memory.
+
+    Unless the errors parameter is set, the first error is raised as soon as
+    it occurs. In fail-fast mode, the generator stops at the first error.
+    The chunks that were yielded before an error can't be taken back, so the
+    output must be discarded if there are errors.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+    assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
+
+    # We detect if users want lazy validation when they pass an empty list as
+    # the errors parameters.
+    lazy_validation = False
+    if errors is None:
+        errors = []
+    else:
+        lazy_validation = True
+
+    if warnings is None:
+        warnings = []
+
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    # The walk is aborted as soon as an error is added in fail-fast mode, and
+    # also when the first error is raised since nothing more can be output.
+    is_aborted = fail_fast or not lazy_validation
+
+    walk_errors = errors
+    if is_aborted:
+        walk_errors = FailFastErrors()
+
+    specs = track_specs(specs)
+    backend = get_json_backend(backend)
+
+    chunk = []
+    chunk_length = 0
+
+    try:
+        for piece in encode_node("root", object, specs, walk_errors, warnings, backend):
+            chunk.append(piece)
+            chunk_length += len(piece)
+
+            if chunk_length >= chunk_size:
+                yield ''.join(chunk)
+
+                chunk = []
+                chunk_length = 0
+    except StopValidation:
+        pass
+    except RecursionError:
+        # The JSON encoder is recursive, too deeply nested items are reported
+        # like any other error.
+        error = ValidationError("root", "document is nested too deeply")
+        if not lazy_validation:
+            raise error from None
+
+        errors.append(error)
+        return
+
+    if is_aborted:
+        errors.extend(walk_errors)
+
+    if len(errors) > 0:
+        # If we're not lazy-validating the specs, we raise the first error
+        # that occurred.
+        if not lazy_validation:
+            raise errors[0]
+        elif fail_fast:
+            return
+
+    if chunk_length > 0:
+        yield ''.join(chunk)
+
+def write_object_to_document(object, specs, stream, errors=None, warnings=None, fail_fast=None, chunk_size=65536, backend=None):
+    """ Convert Python object to its JSON equivalent and write it to a stream.
+
+    It's the same as iter_object_to_document() except that the chunks are
+    written to the stream (a text file-like object) as they're produced.
+    """
+
+    for chunk in iter_object_to_document(object, specs, errors, warnings, fail_fast, chunk_size, backend):
+        stream.write(chunk)
+
+def validate_object(object, specs, errors=None, warnings=None, fail_fast=None):
+    """ Validate a Python object without converting it.
+
+    It's the same as object_to_document() except that the JSON document is not
+    constructed, which is cheaper when only the validity of the object
+    matters. It returns True if the object is valid (and raises the first
+    error otherwise, unless the errors parameter is set, in which case it
+    returns False).
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+    assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
+
+    # We detect if users want lazy validation when they pass an empty list as
+    # the errors parameters.
+    lazy_validation = False
+    if errors is None:
+        errors = []
+    else:
+        lazy_validation = True
+
+    if warnings is None:
+        warnings = []
+
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    # In fail-fast mode, the errors are collected in a list that aborts the
+    # walk as soon as an error is added.
+    walk_errors = errors
+    if fail_fast:
+        walk_errors = FailFastErrors()
+
+    specs = track_specs(specs)
+
+    try:
+        validate_function = specs.validate_object_function
+        if validate_function is not None:
+            validate_function("root", object, walk_errors, warnings)
+        elif specs.depth > MAXIMUM_RECURSIVE_DEPTH:
+            adjust_node_iteratively("root", object, specs, walk_errors, warnings, adjust_node_map, check_node_map, list, validate_only=True)
+        else:
+            validate_node("root", object, specs, walk_errors, warnings)
+    except StopValidation:
+        pass
+
+    if fail_fast:
+        errors.extend(walk_errors)
+
+    # If we're not lazy-validating the specs, we raise the first error that
+    # occurred.
+    if not lazy_validation and len(errors) > 0:
+        raise errors[0]
+
+    return len(errors) == 0
@@ -0,0 +1,143 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import copy
+import keyword
+import threading
+import weakref
+from byteplug.document.cache import fingerprint_specs
+from byteplug.document.compiler import CompiledSpecs, compile_specs
+from byteplug.document.traversal import MAXIMUM_RECURSIVE_DEPTH
+
+# Notes:
+# - This module implements the records that maps are converted to (instead
+#   of dicts) when the records parameter of document_to_object() is set.
+#   Each map specs node has its own record class, with one slot per field;
+#   records have no instance dict, so they're a fraction of the size of the
+#   equivalent dicts.
+# - The record classes are generated once per structure of the map specs
+#   (they're registered by the fingerprint of the specs, and kept in the
+#   compiled specs); structurally equal specs share the same record class.
+#   Each class is named after the fingerprint so records of different specs
+#   can be told apart.
+# - The record classes aren't module attributes; records are pickled along
+#   with the specs of their map, and the record class is looked up (or
+#   generated again) when they're unpickled.
+# - The fields become attributes, so maps with fields that are not valid
+#   attribute names (not identifiers, Python keywords, or names starting with
+#   an underscore which are reserved for the record methods) are kept as
+#   dicts. So are the maps that are nested too deeply to be fingerprinted
+#   (and pickled) recursively.
+
+__all__ = ['Record', 'get_record_class']
+
+class Record:
+    """ Base class of the records maps are converted to.
+
+    The fields of the map are the attributes of the record, and are listed
+    (in the order of the specs) by the _fields attribute of its class.
+    Fields that were missing are set to None.
+    """
+
+    __slots__ = ()
+
+    _fields = ()
+
+    def _asdict(self):
+        """ Return the fields of the record as a dict. """
+
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    # Records are mutable.
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({fields})'
+
+    def __reduce__(self):
+        values = tuple(getattr(self, name) for name in self._fields)
+        return (load_record, (self._fingerprint, self._specs, values))
+
+# The record classes by the fingerprint of their specs; they're kept alive by
+# the compiled specs and the records that use them.
+record_classes = weakref.WeakValueDictionary()
+record_classes_lock = threading.Lock()
+
+def is_attribute_name(name):
+    return name.isidentifier() and not keyword.iskeyword(name) and not name.startswith('_')
+
+def make_record_class(specs, fingerprint):
+    names = tuple(specs.fields.keys())
+
+    # The constructor takes the adjusted dict of the map as keyword
+    # arguments; it's generated so the fields are set without a loop. Its
+    # first parameter starts with an underscore so it can't be a field.
+    parameters = ''.join(f', {name}=None' for name in names)
+    source = [f'def __init__(_record{parameters}):']
+    source.extend(f'    _record.{name} = {name}' for name in names)
+    source.append('    pass')
+
+    namespace = {}
+    exec(compile('\n'.join(source) + '\n', '<byteplug.document.records>', 'exec'), namespace)
+
+    name = f'Record_{fingerprint[:12]}'
+    return type(name, (Record,), {
+        '__slots__': names,
+        '__init__': namespace['__init__'],
+        '_fields': names,
+        '_fingerprint': fingerprint,
+        '_specs': copy.deepcopy(specs.specs)
+    })
+
+def lookup_record_class(specs, fingerprint):
+    # Return the record class of the specs (compiled or not) with the given
+    # fingerprint, generating it if it's not registered.
+    with record_classes_lock:
+        record_class = record_classes.get(fingerprint)
+        if record_class is None:
+            if not isinstance(specs, CompiledSpecs):
+                specs = compile_specs(specs)
+
+            record_class = make_record_class(specs, fingerprint)
+            record_classes[fingerprint] = record_class
+
+    return record_class
+
+def load_record(fingerprint, specs, values):
+    # Unpickle a record (see Record.__reduce__()).
+    record_class = lookup_record_class(specs, fingerprint)
+    return record_class(*values)
+
+def get_record_class(specs):
+    """ Return the record class of a compiled map specs.
+
+    None is returned if the fields of the map can't be attributes, or if the
+    map is nested too deeply.
+    """
+
+    assert specs.type == 'map', "only maps have a record class"
+
+    record_class = specs.record_class
+    if record_class is None:
+        record_class = dict
+        if specs.depth <= MAXIMUM_RECURSIVE_DEPTH and all(is_attribute_name(name) for name in specs.fields.keys()):
+            record_class = lookup_record_class(specs, fingerprint_specs(specs.specs))
+
+        specs.record_class = record_class
+
+    if record_class is dict:
+        return None
+
+    return record_class
@@ -7,6 +7,7 @@
 # Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
 
 import re
+from byteplug.document.utils import compile_pattern
 from byteplug.document.exception import ValidationError, ValidationWarning
 
 __all__ = ['validate_specs']
@@ -156,12 +157,20 @@ def validate_string_type(path, block, errors, warnings):
     if 'length' in block:
         validate_length_property(path, block['length'], errors, warnings)
 
-    # TODO; Check validity of the regex.
     pattern = block.get('pattern')
     if pattern != None:
         if type(pattern) is not str:
             error = ValidationError(path + '.pattern', "value must be a string")
             errors.append(error)
+            return
+
+        # Compiling the regex also puts it in the cache, ready to be used when
+        # the specs are compiled.
+        try:
+            compile_pattern(pattern)
+        except re.error:
+            error = ValidationError(path + '.pattern', "value must be a valid regex")
+            errors.append(error)
 
 def validate_enum_type(path, block, errors, warnings):
     values = block.get('values')
@@ -322,6 +331,7 @@ def validate_specs(specs, errors=None, warnings=None):
     - '<foo>' value is duplicated
     - must contain at least one field
     - '<foo>' is an incorrect key name
+    - value must be a valid regex
 
     Possible warning messages.
 
@@ -0,0 +1,525 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import re
+import json
+import time
+import codecs
+from byteplug.document.backends import get_json_backend, load_json
+from byteplug.document.tiering import track_specs
+from byteplug.document.traversal import MAXIMUM_RECURSIVE_DEPTH, adjust_node_iteratively
+from byteplug.document.document import adjust_node, adjust_node_map, check_node_map, validate_node
+from byteplug.document.document import document_to_object, validate_document
+from byteplug.document.utils import FailFastErrors, StopValidation
+from byteplug.document.utils import LIST_ITEM_SEGMENT
+from byteplug.document.exception import ValidationError
+
+# Notes:
+# - This module implements the conversion of JSON documents that are read
+#   incrementally from a file-like object, so the whole document (and the
+#   whole converted object) never has to be in memory at once.
+# - The items of the top-level JSON array are parsed one at a time with the
+#   raw_decode() method of the standard library JSON decoder; the JSON
+#   backends of the 'backends' module are not used.
+# - Items are converted exactly like document_to_object() converts the items
+#   of a list (same result, errors and warnings), and the length of the list
+#   is checked once its end is reached (or as soon as it's known to be too
+#   long).
+# - An item that fails to decode is only read further if the error is at the
+#   end of the buffer (where the item may be truncated); other errors are
+#   raised right away, with their position in the whole document.
+# - It also implements the conversion of newline-delimited JSON documents
+#   (NDJSON, also known as JSON Lines) where each line is a document on its
+#   own; the specs is compiled once for all of them.
+
+__all__ = [
+    'iter_document_items',
+    'validate_document_stream',
+    'iter_documents_to_objects'
+]
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+DELIMITER = re.compile(r'[ \t\n\r]*([,\]])')
+
+# Characters a number could still be followed by if it was truncated at the
+# end of the buffer.
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+
+# Decoding errors of a truncated value are reported at most this number of
+# characters before the end of the buffer (for '-Infinit'), except for
+# unterminated strings which are reported at their start.
+TRUNCATION_MARGIN = 8
+
+decoder = json.JSONDecoder()
+
+class DocumentReader:
+    # A JSON document being read from a file-like object; the buffer holds the
+    # text that was read and not consumed yet (starting at the index). The
+    # offset, the number of lines and the offset of the last line of the text
+    # that was consumed are kept to report errors.
+
+    __slots__ = (
+        'stream', 'chunk_size', 'text_decoder', 'buffer', 'index', 'eof',
+        'offset', 'line_count', 'line_offset'
+    )
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.index = 0
+        self.eof = False
+
+        self.offset = 0
+        self.line_count = 0
+        self.line_offset = 0
+
+    def read(self, size):
+        # Binary streams are expected to be encoded in UTF-8.
+        chunk = self.stream.read(size)
+        eof = len(chunk) == 0
+        if not isinstance(chunk, str):
+            chunk = self.text_decoder.decode(chunk, eof)
+
+        self.line_count += self.buffer.count('\n', 0, self.index)
+        line_start = self.buffer.rfind('\n', 0, self.index)
+        if line_start != -1:
+            self.line_offset = self.offset + line_start + 1
+        self.offset += self.index
+
+        self.buffer = self.buffer[self.index:] + chunk
+        self.index = 0
+        self.eof = eof
+
+    def read_all(self):
+        while not self.eof:
+            self.read(self.chunk_size)
+
+        return self.buffer[self.index:]
+
+    def peek(self):
+        # Skip the whitespaces and return the next character, or an empty
+        # string at the end of the document.
+        while True:
+            self.index = WHITESPACE.match(self.buffer, self.index).end()
+            if self.index < len(self.buffer) or self.eof:
+                return self.buffer[self.index:self.index + 1]
+
+            self.read(self.chunk_size)
+
+    def decode(self):
+        # Decode the next value; if it's (or may be) truncated, more text is
+        # read and it's decoded again. Reads are at least as big as the text
+        # being decoded so decoding a large value stays linear.
+        while True:
+            self.index = WHITESPACE.match(self.buffer, self.index).end()
+
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.index)
+            except json.JSONDecodeError as error:
+                is_truncated = (
+                    error.pos >= len(self.buffer) - TRUNCATION_MARGIN or
+                    error.msg.startswith("Unterminated string")
+                )
+                if self.eof or not is_truncated:
+                    raise self.error(error.msg, error.pos) from None
+            else:
+                if self.eof or not NUMBER_TAIL.match(self.buffer, end):
+                    self.index = end
+                    return value
+
+            self.read(max(self.chunk_size, len(self.buffer) - self.index))
+
+    def delimiter(self):
+        # Consume the delimiter that follows an item of the array and return
+        # it, or an empty string if there is none.
+        match = DELIMITER.match(self.buffer, self.index)
+        if match is None:
+            if self.peek() not in (',', ']'):
+                return ''
+
+            match = DELIMITER.match(self.buffer, self.index)
+
+        self.index = match.end()
+        return match.group(1)
+
+    def error(self, message, index=None):
+        # Return the error at the given index of the buffer (the current index
+        # by default); its position is the one in the whole document but its
+        # doc attribute is the buffer.
+        if index is None:
+            index = self.index
+
+        error = json.JSONDecodeError(message, self.buffer, index)
+        error.pos = self.offset + index
+        if error.lineno == 1:
+            error.colno = error.pos - self.line_offset + 1
+        error.lineno += self.line_count
+        error.args = (f"{message}: line {error.lineno} column {error.colno} (char {error.pos})",)
+
+        return error
+
+def adjust_item(path, node, specs, errors, warnings):
+    adjust_function = specs.document_function
+    if adjust_function is not None:
+        return adjust_function(path, node, errors, warnings)
+    elif specs.depth > MAXIMUM_RECURSIVE_DEPTH:
+        return adjust_node_iteratively(path, node, specs, errors, warnings, adjust_node_map, check_node_map, tuple)
+    else:
+        return adjust_node(path, node, specs, errors, warnings)
+
+def validate_item(path, node, specs, errors, warnings):
+    validate_function = specs.validate_document_function
+    if validate_function is not None:
+        validate_function(path, node, errors, warnings)
+    elif specs.depth > MAXIMUM_RECURSIVE_DEPTH:
+        adjust_node_iteratively(path, node, specs, errors, warnings, adjust_node_map, check_node_map, tuple, validate_only=True)
+    else:
+        validate_node(path, node, specs, errors, warnings)
+
+def check_length(count, specs, is_complete):
+    # Return the error message if the number of items is invalid; unless the
+    # list is complete, only a list that is already too long is invalid.
+    length = specs.length
+    if length is not None:
+        if count > length or (is_complete and count != length):
+            return f"length must be equal to {length}"
+
+    minimum = specs.minimum_length
+    if minimum is not None and is_complete:
+        if not (count >= minimum):
+            return f"length must be equal or greater than {minimum}"
+
+    maximum = specs.maximum_length
+    if maximum is not None:
+        if not (count <= maximum):
+            return f"length must be equal or lower than {maximum}"
+
+def iter_document_items(stream, specs, errors=None, warnings=None, fail_fast=None, chunk_size=65536):
+    """ Convert a JSON array read from a file-like object, item by item.
+
+    The specs must be a list. It's a generator that yields the items of the
+    list converted to their Python equivalent (like document_to_object()
+    would do) as soon as they're read. The stream is either a text stream or
+    a binary stream encoded in UTF-8, and it's read by chunks of chunk_size.
+
+    Unless the errors parameter is set, the first error is raised and the
+    generator stops (invalid items are never yielded). With lazy validation,
+    all items are yielded and the errors are added to the errors list as they
+    occur; in fail-fast mode, the generator stops at the first error.
+
+    The length of the list is checked at the end of the array, except when
+    the list is too long which is reported as soon as it's known. Note that a
+    document that is not a JSON array is read entirely before being reported.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+    assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
+
+    # We detect if users want lazy validation when they pass an empty list as
+    # the errors parameters.
+    lazy_validation = False
+    if errors is None:
+        errors = []
+    else:
+        lazy_validation = True
+
+    if warnings is None:
+        warnings = []
+
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    # In fail-fast mode, the errors are collected in a list that aborts the
+    # walk as soon as an error is added.
+    walk_errors = errors
+    if fail_fast:
+        walk_errors = FailFastErrors()
+
+    specs = track_specs(specs)
+    assert specs.type == 'list', "specs must be a list"
+
+    reader = DocumentReader(stream, chunk_size)
+
+    # If the document is not an array (or is null), it's converted at once so
+    # it's reported the same way as document_to_object() does.
+    if reader.peek() != '[':
+        document_to_object(reader.read_all(), specs, errors if lazy_validation else None, warnings, fail_fast)
+        return
+
+    reader.index += 1
+
+    has_maximum_length = specs.length is not None or specs.maximum_length is not None
+
+    try:
+        count = 0
+        is_complete = reader.peek() == ']'
+        if is_complete:
+            reader.index += 1
+
+        while not is_complete:
+            path = ("root", LIST_ITEM_SEGMENT, count)
+
+            try:
+                node = reader.decode()
+            except RecursionError:
+                error = ValidationError(path, "document is nested too deeply")
+                walk_errors.append(error)
+                break
+
+            # The specs of the items is tracked on its own since the items are
+            # converted one at a time.
+            item_errors_count = len(walk_errors)
+            item = adjust_item(path, node, track_specs(specs.value), walk_errors, warnings)
+
+            count += 1
+
+            if has_maximum_length:
+                message = check_length(count, specs, False)
+                if message is not None:
+                    error = ValidationError("root", message)
+                    walk_errors.append(error)
+                    break
+
+            if not lazy_validation and len(walk_errors) > item_errors_count:
+                break
+
+            yield item
+
+            delimiter = reader.delimiter()
+            if delimiter == ']':
+                is_complete = True
+            elif delimiter != ',':
+                raise reader.error("Expecting ',' delimiter")
+
+        if is_complete:
+            if reader.peek() != '':
+                raise reader.error("Extra data")
+
+            message = check_length(count, specs, True)
+            if message is not None:
+                error = ValidationError("root", message)
+                walk_errors.append(error)
+    except StopValidation:
+        pass
+
+    if fail_fast:
+        errors.extend(walk_errors)
+
+    # If we're not lazy-validating the specs, we raise the first error that
+    # occurred.
+    if not lazy_validation and len(errors) > 0:
+        raise errors[0]
+
+def validate_document_stream(stream, specs, errors=None, warnings=None, fail_fast=None, chunk_size=65536):
+    """ Validate a JSON document read from a file-like object.
+
+    It's the same as validate_document() (same result, errors and warnings)
+    except that the document is read from a stream, like with
+    iter_document_items(). If the specs is a list, the items of the JSON array
+    are read and validated one at a time, so the memory that is used doesn't
+    depend on the size of the document; otherwise, the document is read
+    entirely.
+    """
+
+    assert errors is None or errors == [], "if the errors parameter is set, it must be an empty list"
+    assert warnings is None or warnings == [], "if the warnings parameter is set, it must be an empty list"
+
+    # We detect if users want lazy validation when they pass an empty list as
+    # the errors parameters.
+    lazy_validation = False
+    if errors is None:
+        errors = []
+    else:
+        lazy_validation = True
+
+    if warnings is None:
+        warnings = []
+
+    if fail_fast is None:
+        fail_fast = not lazy_validation
+
+    reader = DocumentReader(stream, chunk_size)
+
+    compiled = track_specs(specs)
+    if compiled.type != 'list' or reader.peek() != '[':
+        return validate_document(reader.read_all(), compiled, errors if lazy_validation else None, warnings, fail_fast)
+
+    reader.index += 1
+
+    # In fail-fast mode, the errors are collected in a list that aborts the
+    # walk as soon as an error is added.
+    walk_errors = errors
+    if fail_fast:
+        walk_errors = FailFastErrors()
+
+    # The items of a list are not validated if its length is invalid, and
+    # nothing is reported if the document is not valid JSON, which isn't
+    # known until the end of the array; the errors and warnings of the items
+    # are put aside until then.
+    item_errors = FailFastErrors() if fail_fast else []
+    item_warnings = []
+
+    has_maximum_length = compiled.length is not None or compiled.maximum_length is not None
+
+    try:
+        count = 0
+        is_complete = reader.peek() == ']'
+        if is_complete:
+            reader.index += 1
+
+        # The items are still read once they don't need to be validated
+        # anymore, so invalid JSON documents are reported.
+        validate_items = True
+
+        while not is_complete:
+            try:
+                node = reader.decode()
+            except RecursionError:
+                error = ValidationError("root", "document is nested too deeply")
+                if not lazy_validation:
+                    raise error from None
+
+                errors.append(error)
+                return False
+
+            if validate_items:
+                try:
+                    path = ("root", LIST_ITEM_SEGMENT, count)
+                    validate_item(path, node, track_specs(compiled.value), item_errors, item_warnings)
+                except StopValidation:
+                    validate_items = False
+
+            count += 1
+
+            if has_maximum_length and validate_items:
+                if check_length(count, compiled, False) is not None:
+                    validate_items = False
+
+            delimiter = reader.delimiter()
+            if delimiter == ']':
+                is_complete = True
+            elif delimiter != ',':
+                raise reader.error("Expecting ',' delimiter")
+
+        if reader.peek() != '':
+            raise reader.error("Extra data")
+
+        message = check_length(count, compiled, True)
+        if message is not None:
+            error = ValidationError("root", message)
+            walk_errors.append(error)
+        else:
+            warnings.extend(item_warnings)
+            walk_errors.extend(item_errors)
+    except StopValidation:
+        pass
+
+    if fail_fast:
+        errors.extend(walk_errors)
+
+    # If we're not lazy-validating the specs, we raise the first error that
+    # occurred.
+    if not lazy_validation and len(errors) > 0:
+        raise errors[0]
+
+    return len(errors) == 0
+
+def iter_documents_to_objects(stream, specs, on_invalid='yield', fail_fast=False, backend=None, statistics=None):
+    """ Convert the newline-delimited JSON documents read from a stream.
+
+    The stream is a binary (encoded in UTF-8) or text file-like object with
+    one JSON document per line; empty lines are ignored. It's a generator
+    that yields a (line_no, object, errors, warnings) tuple for each
+    document, where the line numbers start at 1, and the object is converted
+    like document_to_object() with lazy validation would do. Lines that are
+    not valid JSON are reported with a 'document is not valid JSON' error.
+
+    The on_invalid parameter tells what to do with the documents that have
+    errors; they're either yielded ('yield'), skipped ('skip'), or yielded
+    and no more documents are read ('stop'). In fail-fast mode, only the first
+    error of each document is reported.
+
+    If the statistics parameter is set (to an empty dict), it's updated after
+    each document with the 'documents', 'invalid_documents', 'bytes' (the
+    size of the lines, in bytes once encoded in UTF-8 for text streams) and
+    'seconds' keys; the time that is spent outside of the generator is not
+    counted.
+    """
+
+    assert on_invalid in ('yield', 'skip', 'stop'), "on_invalid value is invalid"
+    assert statistics is None or statistics == {}, "if the statistics parameter is set, it must be an empty dict"
+
+    if statistics is None:
+        statistics = {}
+
+    statistics['documents'] = 0
+    statistics['invalid_documents'] = 0
+    statistics['bytes'] = 0
+    statistics['seconds'] = 0.0
+
+    specs = track_specs(specs)
+    backend = get_json_backend(backend)
+
+    for line_no, line in enumerate(stream, 1):
+        start_time = time.perf_counter()
+
+        if isinstance(line, str):
+            statistics['bytes'] += len(line.encode('utf-8', 'surrogatepass'))
+        else:
+            statistics['bytes'] += len(line)
+
+        if len(line) == 0 or line.isspace():
+            statistics['seconds'] += time.perf_counter() - start_time
+            continue
+
+        errors, warnings = [], []
+
+        # In fail-fast mode, the errors are collected in a list that aborts
+        # the walk as soon as an error is added.
+        walk_errors = errors
+        if fail_fast:
+            walk_errors = FailFastErrors()
+
+        object = None
+        try:
+            # The lines of a binary stream are encoded in UTF-8.
+            if not (isinstance(line, str) or backend.bytes_input):
+                line = str(line, 'utf-8')
+
+            node = load_json(line, backend)
+        except ValueError:
+            error = ValidationError("root", "document is not valid JSON")
+            errors.append(error)
+        except RecursionError:
+            error = ValidationError("root", "document is nested too deeply")
+            errors.append(error)
+        else:
+            # Each document counts as a use of the specs.
+            specs = track_specs(specs)
+
+            try:
+                object = adjust_item("root", node, specs, walk_errors, warnings)
+            except StopValidation:
+                pass
+
+            if fail_fast:
+                errors.extend(walk_errors)
+
+        statistics['documents'] += 1
+        if len(errors) > 0:
+            statistics['invalid_documents'] += 1
+
+        statistics['seconds'] += time.perf_counter() - start_time
+
+        if len(errors) == 0 or on_invalid == 'yield':
+            yield (line_no, object, errors, warnings)
+        elif on_invalid == 'stop':
+            yield (line_no, object, errors, warnings)
+            return
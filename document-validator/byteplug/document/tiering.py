@@ -0,0 +1,161 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+import threading
+from collections import OrderedDict
+from byteplug.document.compiler import CompiledSpecs, generate_functions
+from byteplug.document.cache import validator_cache
+
+# Notes:
+# - This module keeps track of how often each specs object is used by
+#   document_to_object() and object_to_document(). Specs start on the
+#   'interpreted' tier (the validator tree is walked by adjust_node()), and
+#   are promoted to the 'generated' tier (see the 'codegen' module) once they
+#   have been used often enough.
+# - Specs are tracked by identity (looking them up must be cheap since it's
+#   done on every call), and a reference to them is kept so their identity
+#   can't be reused by another object while they're tracked. It also means
+#   that a specs must not be modified once it has been used; a modified specs
+#   must be a new specs object (or be compiled again with compile_specs()).
+# - The number of tracked specs is bounded; the least recently used ones are
+#   forgotten first.
+# - Specs that are seen for the first time are compiled through the cache of
+#   the 'cache' module, so structurally equal specs share the same compiled
+#   specs; the calls are counted on the compiled specs, hence they're counted
+#   together. Only the specs that are seen for the first time are
+#   fingerprinted.
+# - Compiled specs are not tracked, they carry their own number of calls.
+
+__all__ = [
+    'set_promotion_threshold',
+    'get_specs_tier',
+    'get_specs_tiers',
+    'reset_specs_tiers'
+]
+
+INTERPRETED_TIER = 'interpreted'
+GENERATED_TIER = 'generated'
+
+# Number of calls after which a specs is promoted to the generated tier (None
+# to never promote specs).
+promotion_threshold = 100
+
+# Maximum number of specs being tracked at the same time.
+maximum_tracked_specs = 1024
+
+class TrackedSpecs:
+    __slots__ = ('specs', 'compiled')
+
+    def __init__(self, specs, compiled):
+        self.specs = specs
+        self.compiled = compiled
+
+    def to_object(self):
+        return make_tier_object(self.specs, self.compiled)
+
+def make_tier_object(specs, compiled):
+    if compiled.document_function is not None:
+        tier = GENERATED_TIER
+    else:
+        tier = INTERPRETED_TIER
+
+    return {
+        'specs': specs,
+        'tier': tier,
+        'calls': compiled.calls
+    }
+
+tracked_specs = OrderedDict()
+tracked_specs_lock = threading.Lock()
+
+def track_specs(specs):
+    """ Count a use of the specs and return its compiled form.
+
+    The returned compiled specs has its functions generated if the specs is
+    (or just became) hot.
+    """
+
+    if isinstance(specs, CompiledSpecs):
+        compiled = specs
+    else:
+        key = id(specs)
+
+        with tracked_specs_lock:
+            tracked = tracked_specs.get(key)
+            if tracked is not None and tracked.specs is specs:
+                tracked_specs.move_to_end(key)
+            else:
+                tracked = None
+
+        if tracked is None:
+            # Fingerprinting (and compiling) the specs is done out of the lock.
+            tracked = TrackedSpecs(specs, validator_cache.get(specs))
+
+            with tracked_specs_lock:
+                tracked_specs[key] = tracked
+                if len(tracked_specs) > maximum_tracked_specs:
+                    tracked_specs.popitem(last=False)
+
+        compiled = tracked.compiled
+
+    # Note that the number of calls is not exact when the same specs is used
+    # concurrently, which is fine.
+    compiled.calls += 1
+
+    if promotion_threshold is not None and compiled.calls >= promotion_threshold:
+        if compiled.document_function is None:
+            with tracked_specs_lock:
+                generate_functions(compiled)
+
+    return compiled
+
+def set_promotion_threshold(threshold):
+    """ Set the number of calls after which a specs is promoted.
+
+    Once a specs has been used that many times by document_to_object() and
+    object_to_document(), Python functions specialized for it are generated
+    and used from then on. Pass None to never promote specs.
+    """
+
+    assert threshold is None or (type(threshold) is int and threshold > 0), "threshold value is invalid"
+
+    global promotion_threshold
+    promotion_threshold = threshold
+
+def get_specs_tier(specs):
+    """ Return the tier and the number of calls of a specs.
+
+    It returns a dict with the 'specs', 'tier' ('interpreted' or 'generated')
+    and 'calls' keys, or None if the specs isn't tracked.
+    """
+
+    if isinstance(specs, CompiledSpecs):
+        return make_tier_object(specs, specs)
+
+    with tracked_specs_lock:
+        tracked = tracked_specs.get(id(specs))
+        if tracked is None or tracked.specs is not specs:
+            return None
+
+        return tracked.to_object()
+
+def get_specs_tiers():
+    """ Return the tier and the number of calls of all tracked specs. """
+
+    with tracked_specs_lock:
+        return [tracked.to_object() for tracked in tracked_specs.values()]
+
+def reset_specs_tiers():
+    """ Forget about all tracked specs.
+
+    Note that structurally equal specs that are still in the cache of the
+    'cache' module keep their tier and number of calls.
+    """
+
+    with tracked_specs_lock:
+        tracked_specs.clear()
@@ -0,0 +1,180 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document.utils import LIST_ITEM_SEGMENT, TUPLE_ITEM_SEGMENT, FIELD_SEGMENT, render_path
+from byteplug.document.exception import ValidationError
+
+# Notes:
+# - This module implements a non-recursive version of adjust_node() which
+#   walks the nodes with an explicit stack of containers instead of Python
+#   function calls. It's used for the specs that are nested too deeply to be
+#   walked recursively.
+# - It's shared by the 'document' and 'object' modules which provide their
+#   process_<type>_node() functions for the scalar nodes and their
+#   check_<type>_node() functions for the containers; it must produce exactly
+#   the same result, errors and warnings (in the same order) as adjust_node()
+#   (or validate_node() in validate-only mode).
+# - It's also the walk of the alternative output modes (NumPy arrays for
+#   numeric lists, etc.); a convert map tells which container nodes are
+#   converted as a whole by a function of their own instead of being walked,
+#   and a map types map tells which maps are adjusted to something else than a
+#   dict (records, etc.).
+
+__all__ = ['MAXIMUM_RECURSIVE_DEPTH', 'adjust_node_iteratively']
+
+# Specs with more nested containers than this are walked with this module
+# rather than recursively.
+MAXIMUM_RECURSIVE_DEPTH = 100
+
+# Maximum number of nested containers that can be walked; deeper nodes are
+# reported as errors.
+MAXIMUM_DEPTH = 10000
+
+def list_items(path, node, specs, errors):
+    value = specs.value
+    for (index, item) in enumerate(node):
+        yield ((path, LIST_ITEM_SEGMENT, index), item, value, None)
+
+def tuple_items(path, node, specs, errors):
+    values = specs.values
+    for (index, item) in enumerate(node):
+        yield ((path, TUPLE_ITEM_SEGMENT, index), item, values[index], None)
+
+def map_items(path, node, specs, errors):
+    fields = specs.fields
+    for key, value in node.items():
+        field = fields.get(key)
+        if field is not None:
+            yield ((path, FIELD_SEGMENT, key), value, field, key)
+        else:
+            error = ValidationError(path, f"'{key}' field was unexpected")
+            errors.append(error)
+
+items_map = {
+    'list' : list_items,
+    'tuple': tuple_items,
+    'map'  : map_items
+}
+
+class Container:
+    # A container being walked; its items are generated one at a time and its
+    # adjusted node (if any) is filled as they're adjusted.
+
+    __slots__ = ('path', 'node', 'specs', 'key', 'items', 'count', 'adjusted_node')
+
+    def __init__(self, path, node, specs, key, errors, validate_only):
+        self.path = path
+        self.node = node
+        self.specs = specs
+        self.key = key
+        self.items = items_map[specs.type](path, node, specs, errors)
+        self.count = 0
+
+        if validate_only:
+            self.adjusted_node = None
+        else:
+            self.adjusted_node = {} if specs.type == 'map' else []
+
+    def add(self, key, adjusted_item):
+        self.count += 1
+
+        adjusted_node = self.adjusted_node
+        if adjusted_node is None:
+            return
+
+        if key is None:
+            adjusted_node.append(adjusted_item)
+        else:
+            adjusted_node[key] = adjusted_item
+
+    def finish(self, errors, tuple_type, map_types):
+        specs = self.specs
+        adjusted_node = self.adjusted_node
+
+        if specs.type == 'tuple':
+            if adjusted_node is not None:
+                return tuple_type(adjusted_node)
+        elif specs.type == 'map':
+            # Unexpected keys are never required, so they don't affect the
+            # missing keys.
+            if self.count != len(specs.required):
+                missing_keys = specs.required - self.node.keys()
+                for key in missing_keys:
+                    error = ValidationError(self.path, f"'{key}' field was missing")
+                    errors.append(error)
+
+            if adjusted_node is not None and map_types is not None:
+                map_type = map_types.get(id(specs))
+                if map_type is not None:
+                    return map_type(**adjusted_node)
+
+        return adjusted_node
+
+def adjust_node_iteratively(path, node, specs, errors, warnings, adjust_node_map, check_node_map, tuple_type, validate_only=False, convert_map=None, map_types=None):
+    """ Non-recursive version of adjust_node().
+
+    The adjust_node_map parameter provides the functions that process the
+    scalar nodes, and the check_node_map parameter the functions that check
+    the containers (before their items are walked). The tuple_type parameter
+    is the type of the adjusted tuple nodes.
+
+    With the validate_only parameter, it's the non-recursive version of
+    validate_node() instead; the adjusted nodes of the containers are not
+    constructed and None is returned.
+
+    The convert_map parameter maps the identity of compiled container specs
+    to the function that processes their nodes as a whole (with the same
+    signature as the process_<type>_node() functions); their items are not
+    walked. The map_types parameter maps the identity of compiled map specs to
+    the type of their adjusted nodes, which is constructed with the fields of
+    the adjusted dict as keyword arguments.
+    """
+
+    containers = []
+    item = (path, node, specs, None)
+
+    while True:
+        if item is not None:
+            # Adjust the item, unless it's a valid container in which case we
+            # walk its items first.
+            path, node, specs, key = item
+
+            adjusted_node = None
+            if node is None:
+                if not specs.option:
+                    error = ValueError(render_path(path), "value cant be null")
+                    errors.append(error)
+            elif specs.type not in items_map:
+                adjusted_node = adjust_node_map[specs.type](path, node, specs, errors, warnings)
+                if validate_only:
+                    adjusted_node = None
+            elif convert_map is not None and id(specs) in convert_map:
+                adjusted_node = convert_map[id(specs)](path, node, specs, errors, warnings)
+            elif check_node_map[specs.type](path, node, specs, errors):
+                if len(containers) < MAXIMUM_DEPTH:
+                    container = Container(path, node, specs, key, errors, validate_only)
+                    containers.append(container)
+
+                    item = next(container.items, None)
+                    continue
+                else:
+                    error = ValidationError(path, "document is nested too deeply")
+                    errors.append(error)
+        else:
+            # All items of the current container were walked.
+            container = containers.pop()
+            adjusted_node = container.finish(errors, tuple_type, map_types)
+            key = container.key
+
+        if len(containers) == 0:
+            return adjusted_node
+
+        container = containers[-1]
+        container.add(key, adjusted_node)
+
+        item = next(container.items, None)
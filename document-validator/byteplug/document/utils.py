@@ -6,6 +6,13 @@
 #
 # Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
 
+import re
+import functools
+
+# Maximum number of compiled regexes kept by compile_pattern(); unlike the
+# internal cache of the 're' module, it's sized for the patterns of many specs.
+PATTERN_CACHE_SIZE = 4096
+
 def read_minimum_value(specs):
     assert specs['type'] in ('integer', 'decimal')
 
@@ -29,3 +36,46 @@ def read_maximum_value(specs):
             exclusive = maximum.get('exclusive', False)
             value = maximum['value']
             return (exclusive, value)
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern):
+    # Statistics of the cache are available with compile_pattern.cache_info().
+    return re.compile(pattern)
+
+class StopValidation(Exception):
+    # Raised to abort the walk of a document (see FailFastErrors).
+    pass
+
+class FailFastErrors(list):
+    """ List of errors that aborts the walk as soon as an error is added.
+
+    It's passed in place of the errors list in fail-fast mode; the walk is
+    aborted by raising StopValidation, and the list is left with the first
+    error that occurred.
+    """
+
+    def append(self, error):
+        list.append(self, error)
+        raise StopValidation
+
+    def extend(self, errors):
+        for error in errors:
+            self.append(error)
+
+# Paths of the nodes are not built as strings while walking a document since
+# they're only needed when an error or a warning is created. Instead, a path is
+# a chain of (parent, template, value) tuples going up to the root path, which
+# is a plain string, and is rendered with render_path().
+LIST_ITEM_SEGMENT = '.[{}]'
+TUPLE_ITEM_SEGMENT = '.({})'
+FIELD_SEGMENT = '.{}'
+
+def render_path(path):
+    segments = []
+    while type(path) is tuple:
+        parent, template, value = path
+        segments.append(template.format(value))
+        path = parent
+    segments.append(path)
+
+    return ''.join(reversed(segments))
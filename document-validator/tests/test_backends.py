@@ -0,0 +1,156 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import document_to_object, object_to_document, iter_object_to_document
+from byteplug.document import validate_document
+from byteplug.document import ValidationError
+from byteplug.document.backends import JSONBackend
+from byteplug.document.backends import register_json_backend, unregister_json_backend
+from byteplug.document.backends import get_json_backend, get_json_backends, set_json_backend
+import json
+import math
+import pytest
+
+# Notes:
+# - The tests of this file are the conformance tests that all registered
+#   backends must pass; they're run for each of them.
+#
+
+specs = {
+    'type': 'map',
+    'fields': {
+        'integer': {'type': 'integer'},
+        'decimal': {'type': 'decimal'},
+        'tuple': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'string'}]},
+        'list': {'type': 'list', 'value': {'type': 'decimal', 'option': True}}
+    }
+}
+
+@pytest.fixture(params=get_json_backends())
+def backend(request):
+    return get_json_backend(request.param)
+
+def test_numbers(backend):
+    document = '{"integer": 42, "decimal": 42, "tuple": [true, "foo"], "list": [1, 1.5, null]}'
+    object = document_to_object(document, specs, backend=backend)
+    assert object == {'integer': 42, 'decimal': 42.0, 'tuple': (True, 'foo'), 'list': [1.0, 1.5, None]}
+    assert type(object['integer']) is int
+    assert type(object['decimal']) is float
+    assert type(object['list'][0]) is float
+
+    warnings = []
+    document = '{"integer": 42.0, "decimal": 42.5, "tuple": [true, "foo"], "list": []}'
+    object = document_to_object(document, specs, warnings=warnings, backend=backend.name)
+    assert object['integer'] == 42
+    assert type(object['integer']) is int
+    assert len(warnings) == 1
+    assert warnings[0].path == "root.integer"
+    assert warnings[0].message == "may lose precision"
+
+    with pytest.raises(ValidationError) as e_info:
+        object_to_document({'integer': 42, 'decimal': 42, 'tuple': (True, 'foo'), 'list': []}, specs, backend=backend)
+    assert e_info.value.path == "root.decimal"
+    assert e_info.value.message == "was expecting a float"
+
+def test_round_trip(backend):
+    object = {'integer': -42, 'decimal': 0.1, 'tuple': (False, 'bär "quz"\n'), 'list': [1e100, None]}
+
+    document = object_to_document(object, specs, backend=backend)
+    assert type(document) is str
+    assert json.loads(document) == {'integer': -42, 'decimal': 0.1, 'tuple': [False, 'bär "quz"\n'], 'list': [1e100, None]}
+    assert document_to_object(document, specs, backend=backend) == object
+
+    # the document is the same when it's encoded chunk by chunk
+    assert ''.join(iter_object_to_document(object, specs, chunk_size=1, backend=backend)) == document
+
+def test_bytes_input(backend):
+    document = '{"integer": 42, "decimal": 1.5, "tuple": [true, "bär"], "list": []}'
+    expected = {'integer': 42, 'decimal': 1.5, 'tuple': (True, 'bär'), 'list': []}
+
+    for encoding in ['utf-8', 'utf-8-sig', 'utf-16', 'utf-32']:
+        encoded_document = document.encode(encoding)
+        assert document_to_object(encoded_document, specs, backend=backend) == expected
+        assert document_to_object(bytearray(encoded_document), specs, backend=backend) == expected
+        assert document_to_object(memoryview(encoded_document), specs, backend=backend) == expected
+        assert validate_document(memoryview(encoded_document), specs, backend=backend) == True
+
+def test_invalid_document(backend):
+    for document in ['{"integer": 42', '', '[1,]', b'\xff']:
+        with pytest.raises(ValueError):
+            document_to_object(document, specs, backend=backend)
+
+def test_big_integers(backend):
+    specs = {'type': 'integer'}
+
+    for document, object in [('18446744073709551616', 2 ** 64), ('-9223372036854775809', -2 ** 63 - 1), ('-9223372036854775808', -2 ** 63)]:
+        warnings = []
+        assert document_to_object(document, specs, warnings=warnings, backend=backend) == object
+        assert document_to_object(document.encode('utf-8'), specs, warnings=warnings, backend=backend) == object
+        assert warnings == []
+
+        assert object_to_document(object, specs, backend=backend) == document
+
+    # big integers nested in a document
+    list_specs = {'type': 'list', 'value': specs}
+    assert document_to_object('[1, 123456789012345678901234567890]', list_specs, backend=backend) == [1, 123456789012345678901234567890]
+    assert json.loads(object_to_document([1, 2 ** 100], list_specs, backend=backend)) == [1, 2 ** 100]
+    assert ''.join(iter_object_to_document([1, 2 ** 100], list_specs, chunk_size=1, backend=backend)) == \
+        object_to_document([1, 2 ** 100], list_specs, backend=backend)
+
+def test_nan(backend):
+    specs = {'type': 'decimal'}
+
+    assert math.isnan(document_to_object('NaN', specs, backend=backend))
+    assert document_to_object('-Infinity', specs, backend=backend) == -math.inf
+    assert document_to_object(b'Infinity', specs, backend=backend) == math.inf
+    assert document_to_object('1e400', specs, backend=backend) == math.inf
+
+    assert object_to_document(math.inf, specs, backend=backend) == 'Infinity'
+    assert object_to_document(-math.inf, specs, backend=backend) == '-Infinity'
+    assert object_to_document(math.nan, specs, backend=backend) == 'NaN'
+
+    list_specs = {'type': 'list', 'value': specs}
+    assert json.loads(object_to_document([1.5, math.inf], list_specs, backend=backend)) == [1.5, math.inf]
+
+def test_nested_too_deeply(backend):
+    node = []
+    for _ in range(100000):
+        node = [node]
+
+    with pytest.raises(RecursionError):
+        backend.dumps(node)
+
+def test_set_json_backend():
+    calls = []
+    def loads(document):
+        calls.append(document)
+        return json.loads(document)
+
+    backend = JSONBackend('test', loads, json.dumps)
+    register_json_backend(backend)
+    assert 'test' in get_json_backends()
+
+    try:
+        set_json_backend('test')
+        assert get_json_backend() is backend
+        assert document_to_object('true', {'type': 'flag'}) == True
+        assert calls == ['true']
+
+        # bytes-like documents are decoded for backends that can't parse them
+        assert document_to_object(b'false', {'type': 'flag'}) == False
+        assert calls == ['true', 'false']
+
+        # the backend passed to the call has precedence
+        assert document_to_object('true', {'type': 'flag'}, backend='json') == True
+        assert calls == ['true', 'false']
+    finally:
+        set_json_backend('json')
+        unregister_json_backend('test')
+
+    assert get_json_backend().name == 'json'
+    assert 'test' not in get_json_backends()
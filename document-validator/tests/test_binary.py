@@ -0,0 +1,135 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import object_to_binary, binary_to_object
+from byteplug.document import object_to_document, validate_object
+from byteplug.document import ValidationError
+import math
+import pytest
+
+specs = {
+    'type': 'map',
+    'fields': {
+        'flag': {'type': 'flag'},
+        'integer': {'type': 'integer', 'minimum': -2 ** 100},
+        'decimal': {'type': 'decimal', 'option': True},
+        'string': {'type': 'string', 'length': {'maximum': 16}},
+        'enum': {'type': 'enum', 'values': ['foo', 'bar', 'quz']},
+        'list': {
+            'type': 'list',
+            'value': {'type': 'tuple', 'values': [{'type': 'integer'}, {'type': 'string', 'option': True}]}
+        }
+    }
+}
+
+def test_round_trip():
+    objects = [
+        {'flag': True, 'integer': 0, 'decimal': 1.5, 'string': '', 'enum': 'foo', 'list': []},
+        {'flag': False, 'integer': -2 ** 100, 'decimal': None, 'string': 'bär\ud800', 'enum': 'quz', 'list': [(1, 'foo'), (-1, None)]},
+        {'list': [(2 ** 64, 'x' * 200)] * 3, 'enum': 'bar', 'string': '😀', 'decimal': -0.0, 'integer': 63, 'flag': True}
+    ]
+
+    for object in objects:
+        data = object_to_binary(object, specs)
+        assert type(data) is bytes
+        assert binary_to_object(data, specs) == object
+        assert binary_to_object(bytearray(data), specs) == object
+        assert binary_to_object(memoryview(data), specs) == object
+
+    # the field names are not encoded
+    object = objects[0]
+    assert len(object_to_binary(object, specs)) < len(object_to_document(object, specs)) / 4
+
+    data = object_to_binary({**object, 'decimal': math.nan}, specs)
+    assert math.isnan(binary_to_object(data, specs)['decimal'])
+
+    # the order of the fields and of the enum values in the specs doesn't
+    # matter
+    reordered_specs = {
+        'type': 'map',
+        'fields': {key: specs['fields'][key] for key in reversed(list(specs['fields']))}
+    }
+    reordered_specs['fields']['enum'] = {'type': 'enum', 'values': ['quz', 'bar', 'foo']}
+    assert binary_to_object(object_to_binary(objects[1], specs), reordered_specs) == objects[1]
+
+def test_numpy_arrays():
+    numpy = pytest.importorskip('numpy')
+
+    specs = {'type': 'list', 'value': {'type': 'integer'}}
+    object = numpy.array([2 ** 62, 5, -2 ** 63, 2 ** 63 - 1], dtype=numpy.int64)
+    assert binary_to_object(object_to_binary(object, specs), specs) == object.tolist()
+
+    specs = {
+        'type': 'list',
+        'value': {
+            'type': 'map',
+            'fields': {
+                'integer': {'type': 'integer'},
+                'decimal': {'type': 'decimal'},
+                'enum': {'type': 'enum', 'values': ['foo', 'bar']}
+            }
+        }
+    }
+    object = numpy.array([(-2 ** 63, 1.5, 1), (2 ** 63 - 1, -0.5, 0)], dtype=[('integer', 'i8'), ('decimal', 'f8'), ('enum', 'i1')])
+    assert binary_to_object(object_to_binary(object, specs), specs) == [
+        {'integer': -2 ** 63, 'decimal': 1.5, 'enum': 'foo'},
+        {'integer': 2 ** 63 - 1, 'decimal': -0.5, 'enum': 'bar'}
+    ]
+
+def test_invalid_object():
+    object = {'flag': True, 'integer': 1.5, 'decimal': 1, 'string': 'foo', 'enum': 'yolo', 'list': []}
+
+    with pytest.raises(ValidationError) as e_info:
+        object_to_binary(object, specs)
+    assert e_info.value.path == "root.integer"
+    assert e_info.value.message == "was expecting an integer"
+
+    # same errors as validate_object(), and nothing is encoded
+    expected_errors = []
+    validate_object(object, specs, errors=expected_errors)
+
+    errors = []
+    assert object_to_binary(object, specs, errors=errors) is None
+    assert [error.args for error in errors] == [error.args for error in expected_errors]
+    assert len(errors) == 3
+
+    # decoded objects are validated too
+    list_specs = {'type': 'list', 'value': {'type': 'integer'}}
+    data = object_to_binary([1, 2, 3], list_specs)
+    bounded_specs = {'type': 'list', 'value': {'type': 'integer', 'maximum': 2}, 'length': {'minimum': 1}}
+
+    with pytest.raises(ValidationError) as e_info:
+        binary_to_object(data, bounded_specs)
+    assert e_info.value.path == "root.[2]"
+    assert e_info.value.message == "value must be equal or lower than 2"
+
+    errors = []
+    assert binary_to_object(data, bounded_specs, errors=errors) is None
+    assert len(errors) == 1
+
+def test_invalid_data():
+    data = object_to_binary({'flag': True, 'integer': 1, 'decimal': 1.5, 'string': 'foo', 'enum': 'foo', 'list': [(1, 'bar')]}, specs)
+
+    # truncated data, extra data, and data that doesn't match the specs
+    for invalid_data in [b'', data[:-1], data[:4], data + b'\x00', b'\x02' + data[1:], b'\xff' * 32]:
+        with pytest.raises(ValueError):
+            binary_to_object(invalid_data, specs)
+
+    enum_specs = {'type': 'enum', 'values': ['foo', 'bar']}
+    assert binary_to_object(b'\x01', enum_specs) == 'foo'
+    with pytest.raises(ValueError):
+        binary_to_object(b'\x02', enum_specs)
+
+    string_specs = {'type': 'string'}
+    with pytest.raises(ValueError):
+        binary_to_object(b'\x02\xff\xff', string_specs)
+
+    # the length of lists is checked before they're allocated
+    list_specs = {'type': 'list', 'value': {'type': 'flag'}}
+    with pytest.raises(ValueError):
+        binary_to_object(b'\xff\xff\xff\xff\x0f', list_specs)
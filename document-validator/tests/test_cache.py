@@ -0,0 +1,83 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document.types import *
+from byteplug.document import compile_specs
+from byteplug.document.cache import fingerprint_specs, ValidatorCache
+import byteplug.document.cache as cache_module
+
+def test_fingerprint_specs():
+    specs = Map({
+        'foo': Integer(min=42),
+        'bar': List(String(length=(1, None)))
+    }).to_object()
+
+    other_specs = {
+        'type': 'map',
+        'fields': {
+            'bar': {'type': 'list', 'value': {'type': 'string', 'length': {'minimum': 1}}},
+            'foo': {'minimum': 42, 'type': 'integer'}
+        }
+    }
+
+    assert fingerprint_specs(specs) == fingerprint_specs(other_specs)
+
+    # integers and decimals are not confused
+    assert fingerprint_specs({'type': 'integer', 'minimum': 42}) != fingerprint_specs({'type': 'integer', 'minimum': 42.0})
+    assert fingerprint_specs({'type': 'integer'}) != fingerprint_specs({'type': 'decimal'})
+
+def test_validator_cache():
+    cache = ValidatorCache(maximum_size=2)
+
+    compiled = cache.get(Map({'foo': Flag()}).to_object())
+    assert cache.get(Map({'foo': Flag()}).to_object()) is compiled
+    assert cache.statistics() == {'size': 1, 'maximum_size': 2, 'hits': 1, 'misses': 1, 'evictions': 0}
+
+    # compiled specs go through the cache untouched
+    other_compiled = compile_specs({'type': 'flag'})
+    assert cache.get(other_compiled) is other_compiled
+
+    cache.get({'type': 'flag'})
+    cache.get({'type': 'string'})
+    assert cache.statistics() == {'size': 2, 'maximum_size': 2, 'hits': 1, 'misses': 3, 'evictions': 1}
+
+    # the least recently used compiled specs was evicted
+    assert cache.get(Map({'foo': Flag()}).to_object()) is not compiled
+    assert cache.statistics() == {'size': 2, 'maximum_size': 2, 'hits': 1, 'misses': 4, 'evictions': 2}
+
+    cache.resize(0)
+    assert cache.statistics() == {'size': 0, 'maximum_size': 0, 'hits': 1, 'misses': 4, 'evictions': 4}
+    cache.get({'type': 'flag'})
+    assert cache.statistics() == {'size': 0, 'maximum_size': 0, 'hits': 1, 'misses': 5, 'evictions': 4}
+
+    cache.clear()
+    assert cache.statistics() == {'size': 0, 'maximum_size': 0, 'hits': 0, 'misses': 0, 'evictions': 0}
+
+def test_validator_cache_fingerprints(monkeypatch):
+    fingerprinted_specs = []
+    def fingerprint(specs):
+        fingerprinted_specs.append(specs)
+        return fingerprint_specs(specs)
+
+    monkeypatch.setattr(cache_module, 'fingerprint_specs', fingerprint)
+
+    # the fingerprint of a specs object that was seen recently is not
+    # computed again
+    cache = ValidatorCache(maximum_size=2)
+    specs = {'type': 'flag'}
+    compiled = cache.get(specs)
+    assert cache.get(specs) is compiled
+    assert fingerprinted_specs == [specs]
+
+    other_specs = {'type': 'flag'}
+    assert cache.get(other_specs) is compiled
+    assert fingerprinted_specs == [specs, other_specs]
+
+    cache.get({'type': 'string'})
+    cache.get(specs)
+    assert len(fingerprinted_specs) == 4
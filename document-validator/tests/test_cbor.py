@@ -0,0 +1,111 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import cbor_to_object, object_to_cbor
+from byteplug.document import document_to_object, object_to_document
+from byteplug.document import ValidationError
+from byteplug.document.cbor import load_cbor, dump_cbor
+import json
+import math
+import pytest
+
+specs = {
+    'type': 'map',
+    'fields': {
+        'integer': {'type': 'integer', 'minimum': 0},
+        'decimal': {'type': 'decimal'},
+        'tuple': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'string', 'option': True}]},
+        'list': {'type': 'list', 'value': {'type': 'enum', 'values': ['foo', 'bar']}}
+    }
+}
+
+def test_format():
+    # examples of the RFC 8949 (appendix A)
+    values = [
+        (0, '00'),
+        (23, '17'),
+        (24, '1818'),
+        (1000, '1903e8'),
+        (1000000, '1a000f4240'),
+        (18446744073709551615, '1bffffffffffffffff'),
+        (18446744073709551616, 'c249010000000000000000'),
+        (-18446744073709551616, '3bffffffffffffffff'),
+        (-18446744073709551617, 'c349010000000000000000'),
+        (-1, '20'),
+        (-1000, '3903e7'),
+        (1.1, 'fb3ff199999999999a'),
+        (False, 'f4'),
+        (True, 'f5'),
+        (None, 'f6'),
+        ('', '60'),
+        ('ü', '62c3bc'),
+        ('\U00010151', '64f0908591'),
+        ([], '80'),
+        ([1, [2, 3], [4, 5]], '8301820203820405'),
+        ({}, 'a0'),
+        ({'a': 1, 'b': [2, 3]}, 'a26161016162820203')
+    ]
+
+    for value, data in values:
+        assert dump_cbor(value) == bytes.fromhex(data)
+        assert load_cbor(bytes.fromhex(data)) == value
+
+    # decoder-only formats
+    assert load_cbor(bytes.fromhex('f93c00')) == 1.0
+    assert load_cbor(bytes.fromhex('fa47c35000')) == 100000.0
+    assert load_cbor(bytes.fromhex('f97c00')) == math.inf
+    assert load_cbor(bytes.fromhex('4401020304')) == b'\x01\x02\x03\x04'
+    assert load_cbor(bytes.fromhex('7f657374726561646d696e67ff')) == 'streaming'
+    assert load_cbor(bytes.fromhex('9f018202039f0405ffff')) == [1, [2, 3], [4, 5]]
+    assert load_cbor(bytes.fromhex('bf61610161629f0203ffff')) == {'a': 1, 'b': [2, 3]}
+
+    # truncated data, extra data, reserved values, tags, undefined, etc.
+    for data in ['', '18', '1c', '3f', '62c3', '8301', 'f6f6', 'c074323031332d30332d32315432303a30343a30305a', 'f7', 'ff', '9f01', '7f6161', '7f01ff', 'c201', 'a18001', '9bffffffffffffffff']:
+        with pytest.raises(ValueError):
+            load_cbor(bytes.fromhex(data))
+
+def test_cbor_to_object():
+    document = '{"integer": 42, "decimal": 1, "tuple": [true, null], "list": ["foo", "bar"]}'
+    data = dump_cbor(json.loads(document))
+
+    object = cbor_to_object(data, specs)
+    assert object == document_to_object(document, specs)
+    assert type(object['decimal']) is float
+    assert cbor_to_object(memoryview(data), specs) == object
+
+    # same errors and warnings as document_to_object()
+    document = '{"integer": -1.5, "decimal": "1", "tuple": [true], "list": ["quz"], "yolo": 42}'
+    expected_errors, expected_warnings = [], []
+    expected = document_to_object(document, specs, errors=expected_errors, warnings=expected_warnings)
+
+    errors, warnings = [], []
+    assert cbor_to_object(dump_cbor(json.loads(document)), specs, errors=errors, warnings=warnings) == expected
+    assert [error.args for error in errors] == [error.args for error in expected_errors]
+    assert [warning.args for warning in warnings] == [warning.args for warning in expected_warnings]
+
+    with pytest.raises(ValidationError) as e_info:
+        cbor_to_object(b'\x81' * 100000 + b'\x80', {'type': 'list', 'value': {'type': 'integer'}})
+    assert e_info.value.message == "document is nested too deeply"
+
+def test_object_to_cbor():
+    object = {'integer': 2 ** 100, 'decimal': 1.5, 'tuple': (True, 'bär'), 'list': ['bar']}
+
+    data = object_to_cbor(object, specs)
+    assert load_cbor(data) == json.loads(object_to_document(object, specs))
+    assert cbor_to_object(data, specs) == object
+
+    with pytest.raises(ValidationError) as e_info:
+        object_to_cbor({**object, 'integer': -1}, specs)
+    assert e_info.value.path == "root.integer"
+    assert e_info.value.message == "value must be equal or greater than 0"
+
+    # invalid nodes are encoded as null with lazy validation
+    errors = []
+    data = object_to_cbor({**object, 'decimal': 1}, specs, errors=errors)
+    assert load_cbor(data)['decimal'] is None
+    assert len(errors) == 1
@@ -0,0 +1,306 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import compile_specs
+from byteplug.document import document_to_object, object_to_document
+from byteplug.document import ValidationError
+from byteplug.document.codegen import generate_document_function, generate_object_function
+import byteplug.document.document as document_module
+import byteplug.document.object as object_module
+import json
+import pytest
+
+specs = {
+    'type': 'map',
+    'fields': {
+        'flag': {'type': 'flag'},
+        'integer': {
+            'type': 'integer',
+            'minimum': 0,
+            'maximum': {'exclusive': True, 'value': 100}
+        },
+        'decimal': {
+            'type': 'decimal',
+            'minimum': {'exclusive': True, 'value': 0.5},
+            'maximum': 99.5,
+            'option': True
+        },
+        'string': {
+            'type': 'string',
+            'length': {'minimum': 2, 'maximum': 4},
+            'pattern': '^[a-z]+$'
+        },
+        'enum': {'type': 'enum', 'values': ['foo', 'bar']},
+        'list': {
+            'type': 'list',
+            'value': {
+                'type': 'tuple',
+                'values': [
+                    {'type': 'string', 'length': 3},
+                    {'type': 'integer', 'option': True}
+                ]
+            },
+            'length': {'maximum': 3}
+        }
+    }
+}
+
+documents = [
+    '{"flag": true, "integer": 42, "decimal": 42, "string": "foo", "enum": "foo", "list": [["foo", 1], ["bar", null]]}',
+    '{"flag": false, "integer": 42.5, "decimal": null, "string": "abcd", "enum": "bar", "list": []}',
+    '{"flag": 1, "integer": -1, "decimal": 0.5, "string": "FOO", "enum": "quz", "list": [["fo", 1.5], [null, 1], ["foo"]]}',
+    '{"flag": null, "integer": 100, "decimal": 100, "string": "a", "enum": 42, "list": [[], [], [], []]}',
+    '{"integer": "42", "decimal": "42", "string": "abcdef", "yolo": 42, "list": {}}',
+    '{}',
+    '[]',
+    'null'
+]
+
+objects = [
+    {'flag': True, 'integer': 42, 'decimal': 42.0, 'string': 'foo', 'enum': 'foo', 'list': [('foo', 1), ('bar', None)]},
+    {'flag': False, 'integer': 42.5, 'decimal': 42, 'string': 'abcd', 'enum': 'bar', 'list': [['foo', 1]]},
+    {'flag': 1, 'integer': -1, 'decimal': 0.5, 'string': 'FOO', 'enum': 'quz', 'list': [('fo', 1.5), (None, 1), ('foo',)]},
+    {1: True, 'flag': True},
+    {'yolo': 42},
+    [],
+    None
+]
+
+def errors_of(errors):
+    return [(type(error), error.args) for error in errors]
+
+def test_generate_document_function():
+    compiled = compile_specs(specs)
+    function = generate_document_function(compiled)
+
+    for document in documents:
+        errors, warnings = [], []
+        expected = document_to_object(document, compiled, errors=errors, warnings=warnings)
+
+        generated_errors, generated_warnings = [], []
+        object = function("root", json.loads(document), generated_errors, generated_warnings)
+
+        assert object == expected
+        assert errors_of(generated_errors) == errors_of(errors)
+        assert errors_of(generated_warnings) == errors_of(warnings)
+
+def test_generate_validate_document_function():
+    compiled = compile_specs(specs)
+    function = generate_document_function(compiled, validate_only=True)
+
+    for document in documents:
+        errors, warnings = [], []
+        document_module.validate_node("root", json.loads(document), compiled, errors, warnings)
+
+        generated_errors, generated_warnings = [], []
+        assert function("root", json.loads(document), generated_errors, generated_warnings) is None
+
+        assert errors_of(generated_errors) == errors_of(errors)
+        assert errors_of(generated_warnings) == errors_of(warnings)
+
+def test_generate_share_document_function():
+    compiled = compile_specs(specs)
+    function = generate_document_function(compiled, share=True)
+
+    for document in documents:
+        errors, warnings = [], []
+        expected = document_module.share_node("root", json.loads(document), compiled, errors, warnings)
+        assert expected == document_to_object(document, compiled, errors=[])
+
+        generated_errors, generated_warnings = [], []
+        object = function("root", json.loads(document), generated_errors, generated_warnings)
+
+        assert object == expected
+        assert errors_of(generated_errors) == errors_of(errors)
+        assert errors_of(generated_warnings) == errors_of(warnings)
+
+    # only the changed containers are copied
+    share_specs = compile_specs({
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'list', 'value': {'type': 'list', 'value': {'type': 'integer'}}},
+            'bar': {'type': 'map', 'fields': {'quz': {'type': 'decimal'}}},
+            'yolo': {'type': 'map', 'fields': {'quz': {'type': 'decimal'}}}
+        }
+    })
+    function = generate_document_function(share_specs, share=True)
+
+    for share_function in (function, lambda *args: document_module.share_node(*args[:2], share_specs, *args[2:])):
+        node = json.loads('{"foo": [[1, 2], [3.0]], "bar": {"quz": 1.5}, "yolo": {"quz": 1}}')
+        object = share_function("root", node, [], [])
+
+        assert object == {'foo': [[1, 2], [3]], 'bar': {'quz': 1.5}, 'yolo': {'quz': 1.0}}
+        assert object is not node
+        assert object['foo'] is not node['foo']
+        assert object['foo'][0] is node['foo'][0]
+        assert object['bar'] is node['bar']
+        assert object['yolo'] is not node['yolo']
+
+        node = json.loads('{"foo": [], "bar": {"quz": 1.5}, "yolo": {"quz": 1.5}}')
+        assert share_function("root", node, [], []) is node
+
+def test_generate_object_function():
+    compiled = compile_specs(specs)
+    function = generate_object_function(compiled)
+
+    for object in objects:
+        errors, warnings = [], []
+        expected = object_to_document(object, compiled, errors=errors, warnings=warnings, no_dump=True)
+
+        generated_errors, generated_warnings = [], []
+        document = function("root", object, generated_errors, generated_warnings)
+
+        assert document == expected
+        assert errors_of(generated_errors) == errors_of(errors)
+        assert errors_of(generated_warnings) == errors_of(warnings)
+
+def test_generate_validate_object_function():
+    compiled = compile_specs(specs)
+    function = generate_object_function(compiled, validate_only=True)
+
+    for object in objects:
+        errors, warnings = [], []
+        object_module.validate_node("root", object, compiled, errors, warnings)
+
+        generated_errors, generated_warnings = [], []
+        assert function("root", object, generated_errors, generated_warnings) is None
+
+        assert errors_of(generated_errors) == errors_of(errors)
+        assert errors_of(generated_warnings) == errors_of(warnings)
+
+def test_generate_encode_object_function():
+    compiled = compile_specs(specs)
+    function = generate_object_function(compiled, encode=True)
+
+    for object in objects:
+        errors, warnings = [], []
+        expected = object_to_document(object, compiled, errors=errors, warnings=warnings, no_dump=True)
+
+        generated_errors, generated_warnings = [], []
+        document = function("root", object, generated_errors, generated_warnings)
+
+        assert document == json.dumps(expected)
+        assert errors_of(generated_errors) == errors_of(errors)
+        assert errors_of(generated_warnings) == errors_of(warnings)
+
+    # the keys, strings and numbers are encoded like json.dumps() does
+    encode_specs = {
+        'type': 'map',
+        'fields': {
+            'bär "quz"\n': {'type': 'list', 'value': {'type': 'decimal'}},
+            'integer': {'type': 'integer'},
+            'string': {'type': 'string', 'option': True},
+            'enum': {'type': 'enum', 'values': ['bär', '\\', '\u2028']},
+            'tuple': {'type': 'tuple', 'values': [{'type': 'flag'}]}
+        }
+    }
+
+    function = generate_object_function(compile_specs(encode_specs), encode=True)
+
+    object = {
+        'bär "quz"\n': [0.1, -0.0, 1e100, 1.5e-10, float('nan'), float('inf'), -float('inf')],
+        'integer': -2 ** 100,
+        'string': '\x00\t"\\/é\U0001f600',
+        'enum': '\u2028',
+        'tuple': (False,)
+    }
+    assert function("root", object, [], []) == json.dumps({key: list(value) if type(value) is tuple else value for key, value in object.items()})
+
+    for value in ['bär', '\\']:
+        assert function("root", {**object, 'enum': value}, [], []) == json.dumps({**object, 'enum': value, 'tuple': [False]})
+
+def test_generate_deeply_nested_specs():
+    # Nodes that are nested too deeply to be inlined are spilled into
+    # functions of their own.
+    nested_specs = {'type': 'integer', 'minimum': 0}
+    for _ in range(30):
+        nested_specs = {'type': 'list', 'value': nested_specs}
+
+    compiled = compile_specs(nested_specs, generate=True)
+
+    document = '[' * 30 + '-1' + ']' * 30
+    errors = []
+    document_to_object(document, compiled, errors=errors)
+    assert len(errors) == 1
+    assert errors[0].path == 'root' + '.[0]' * 30
+
+def test_generate_wide_maps():
+    # the fields of wide maps are found by index, the result, errors and
+    # warnings (and the order of the keys) are the same
+    fields = {f'field{index}': {'type': 'integer', 'minimum': 0} for index in range(37)}
+    wide_specs = {'type': 'map', 'fields': {**fields, 'map': {'type': 'map', 'fields': fields}}}
+    compiled = compile_specs(wide_specs)
+
+    keys = list(fields.keys())
+    wide_documents = [
+        {**{key: index for (index, key) in enumerate(reversed(keys))}, 'map': {key: 1 for key in keys}},
+        {**{key: -1 for key in keys[::3]}, 'yolo': 1, **{key: 1.5 for key in keys[1::3]}, 'map': {'quz': 1}},
+        {'map': {key: None for key in reversed(keys)}}
+    ]
+
+    for document in wide_documents:
+        errors, warnings = [], []
+        expected = document_to_object(json.dumps(document), compiled, errors=errors, warnings=warnings)
+
+        for function in [generate_document_function(compiled), generate_document_function(compiled, share=True)]:
+            generated_errors, generated_warnings = [], []
+            object = function("root", json.loads(json.dumps(document)), generated_errors, generated_warnings)
+
+            assert object == expected
+            assert object is None or list(object.keys()) == list(expected.keys())
+            assert errors_of(generated_errors) == errors_of(errors)
+            assert errors_of(generated_warnings) == errors_of(warnings)
+
+        errors, warnings = [], []
+        expected = object_to_document(document, compiled, errors=errors, warnings=warnings, no_dump=True)
+
+        generated_errors, generated_warnings = [], []
+        encoded_document = generate_object_function(compiled, encode=True)("root", document, generated_errors, generated_warnings)
+        assert encoded_document == json.dumps(expected)
+        assert errors_of(generated_errors) == errors_of(errors)
+
+    # wide maps can be inlined as deeply as the other containers
+    nested_specs = {'type': 'integer'}
+    for _ in range(6):
+        nested_specs = {'type': 'map', 'fields': {**{f'field{index}': {'type': 'flag'} for index in range(100)}, 'map': nested_specs}}
+    assert compile_specs(nested_specs, generate=True).document_function is not None
+
+def test_compile_specs_generate():
+    compiled = compile_specs(specs, generate=True)
+    assert compiled.document_function is not None
+    assert compiled.object_function is not None
+    assert compiled.validate_document_function is not None
+    assert compiled.validate_object_function is not None
+    assert compiled.share_document_function is not None
+    assert compiled.encode_object_function is not None
+
+    object = document_to_object(documents[0], compiled)
+    assert object == objects[0]
+    assert object_to_document(object, compiled) == object_to_document(object, specs)
+
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object(documents[2], compiled)
+    assert e_info.value.path == "root.flag"
+    assert e_info.value.message == "was expecting a JSON boolean"
+
+def test_generate_numpy_arrays():
+    numpy = pytest.importorskip('numpy')
+
+    list_specs = compile_specs({'type': 'tuple', 'values': [{'type': 'list', 'value': {'type': 'integer', 'maximum': 1}}]})
+    adjust_function = generate_object_function(list_specs)
+    validate_function = generate_object_function(list_specs, validate_only=True)
+    encode_function = generate_object_function(list_specs, encode=True)
+
+    assert adjust_function("root", (numpy.array([0, 1]),), [], []) == [[0, 1]]
+    assert encode_function("root", (numpy.array([0, 1]),), [], []) == '[[0, 1]]'
+
+    for function in [adjust_function, validate_function, encode_function]:
+        errors = []
+        function("root", (numpy.array([0, 2]),), errors, [])
+        assert errors_of(errors) == [(ValidationError, ("root.(0).[1]", "value must be equal or lower than 1"))]
+
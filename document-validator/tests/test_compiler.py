@@ -0,0 +1,134 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import compile_specs
+from byteplug.document import document_to_object, object_to_document
+from byteplug.document import ValidationError
+from byteplug.document.compiler import CompiledSpecs
+from byteplug.document.utils import compile_pattern
+import pytest
+
+def test_compile_specs():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'foo': {
+                'type': 'integer',
+                'minimum': 42.0,
+                'maximum': {
+                    'exclusive': True,
+                    'value': 100
+                }
+            },
+            'bar': {
+                'type': 'decimal',
+                'minimum': {
+                    'exclusive': True,
+                    'value': 0.5
+                },
+                'option': True
+            },
+            'quz': {
+                'type': 'string',
+                'length': {
+                    'minimum': 2.0,
+                    'maximum': 8
+                },
+                'pattern': '^[a-z]+$'
+            },
+            'yolo': {
+                'type': 'list',
+                'value': {
+                    'type': 'enum',
+                    'values': ['foo', 'bar']
+                },
+                'length': 2
+            },
+            'baz': {
+                'type': 'tuple',
+                'values': [{'type': 'flag'}, {'type': 'string'}]
+            }
+        }
+    }
+
+    compiled = compile_specs(specs)
+    assert type(compiled) is CompiledSpecs
+    assert compiled.type == 'map'
+    assert compiled.option == False
+    assert compiled.required == frozenset(['foo', 'bar', 'quz', 'yolo', 'baz'])
+    assert compiled.specs is specs
+
+    foo = compiled.fields['foo']
+    assert foo.minimum == (False, 42)
+    assert type(foo.minimum[1]) is int
+    assert foo.maximum == (True, 100)
+
+    bar = compiled.fields['bar']
+    assert bar.option == True
+    assert bar.minimum == (True, 0.5)
+    assert bar.maximum is None
+
+    quz = compiled.fields['quz']
+    assert quz.length is None
+    assert quz.minimum_length == 2
+    assert quz.maximum_length == 8
+    assert quz.pattern.pattern == '^[a-z]+$'
+
+    yolo = compiled.fields['yolo']
+    assert yolo.length == 2
+    assert yolo.value.values == frozenset(['foo', 'bar'])
+
+    baz = compiled.fields['baz']
+    assert [value.type for value in baz.values] == ['flag', 'string']
+
+    # patterns are compiled once and shared across specs
+    hits = compile_pattern.cache_info().hits
+    assert compile_specs(specs).fields['quz'].pattern is quz.pattern
+    assert compile_pattern.cache_info().hits == hits + 1
+
+    # compiling an already compiled specs is a no-op
+    assert compile_specs(compiled) is compiled
+
+def test_compiled_specs():
+    specs = compile_specs({
+        'type': 'list',
+        'value': {
+            'type': 'map',
+            'fields': {
+                'foo': {'type': 'integer', 'minimum': 0},
+                'bar': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'decimal'}]}
+            }
+        }
+    })
+
+    # the compiled specs can be reused across calls
+    for _ in range(2):
+        object = document_to_object('[{"foo": 42, "bar": [true, 1]}]', specs)
+        assert object == [{'foo': 42, 'bar': (True, 1.0)}]
+
+        document = object_to_document([{'foo': 42, 'bar': (True, 1.0)}], specs)
+        assert document == '[{"foo": 42, "bar": [true, 1.0]}]'
+
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('[{"foo": -1, "bar": [true, 1]}]', specs)
+    assert e_info.value.path == "root.[0].foo"
+    assert e_info.value.message == "value must be equal or greater than 0"
+
+    errors = []
+    document_to_object('[{"foo": 42}]', specs, errors=errors)
+    assert len(errors) == 1
+    assert errors[0].path == "root.[0]"
+    assert errors[0].message == "'bar' field was missing"
+
+    errors = []
+    object_to_document([{'bar': (True, 1.0), 'quz': 42}], specs, errors=errors)
+    assert len(errors) == 2
+    assert errors[0].path == "root.[0]"
+    assert errors[0].message == "'quz' field was unexpected"
+    assert errors[1].path == "root.[0]"
+    assert errors[1].message == "'foo' field was missing"
@@ -6,8 +6,11 @@
 #
 # Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
 
-from byteplug.document import document_to_object
-from byteplug.document import ValidationError
+from byteplug.document import document_to_object, validate_document
+from byteplug.document import decoded_document_to_object, validate_decoded_document
+from byteplug.document import ValidationError, Record
+import array
+import pickle
 import pytest
 
 # Notes:
@@ -533,3 +536,332 @@ def test_map_type():
     assert errors[1].message == "was expecting a JSON number"
     assert errors[2].path == "root.quz"
     assert errors[2].message == "was expecting a JSON string"
+
+def test_fail_fast():
+    specs = {'type': 'list', 'value': {'type': 'integer'}}
+
+    # the walk is aborted at the first error when errors are only raised
+    warnings = []
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('[true, 42.5, "foo"]', specs, warnings=warnings)
+    assert e_info.value.path == "root.[0]"
+    assert e_info.value.message == "was expecting a JSON number"
+    assert len(warnings) == 0
+
+    warnings = []
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('[true, 42.5, "foo"]', specs, warnings=warnings, fail_fast=False)
+    assert e_info.value.path == "root.[0]"
+    assert e_info.value.message == "was expecting a JSON number"
+    assert len(warnings) == 1
+
+    # fail-fast mode can also be used with lazy validation
+    errors = []
+    object = document_to_object('[true, 42.5, "foo"]', specs, errors=errors, fail_fast=True)
+    assert object is None
+    assert len(errors) == 1
+    assert errors[0].path == "root.[0]"
+    assert errors[0].message == "was expecting a JSON number"
+
+def test_validate_document():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'list', 'value': {'type': 'integer', 'minimum': 0}},
+            'bar': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'string'}]}
+        }
+    }
+
+    assert validate_document('{"foo": [1, 2], "bar": [true, "baz"]}', specs) == True
+
+    with pytest.raises(ValidationError) as e_info:
+        validate_document('{"foo": [1, -2], "bar": [true, "baz"]}', specs)
+    assert e_info.value.path == "root.foo.[1]"
+    assert e_info.value.message == "value must be equal or greater than 0"
+
+    # same errors and warnings as document_to_object()
+    document = '{"foo": [1.5, -2, null], "quz": 42}'
+
+    expected_errors, expected_warnings = [], []
+    document_to_object(document, specs, errors=expected_errors, warnings=expected_warnings)
+
+    errors, warnings = [], []
+    assert validate_document(document, specs, errors=errors, warnings=warnings) == False
+    assert [error.args for error in errors] == [error.args for error in expected_errors]
+    assert [warning.args for warning in warnings] == [warning.args for warning in expected_warnings]
+
+def test_copy_on_write():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'list', 'value': {'type': 'list', 'value': {'type': 'integer'}}},
+            'bar': {'type': 'list', 'value': {'type': 'decimal'}},
+            'quz': {'type': 'map', 'fields': {'yolo': {'type': 'string'}}},
+            'baz': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'flag'}]}
+        }
+    }
+
+    # same object as without copy-on-write
+    documents = [
+        '{"foo": [[1, 2], [3.0]], "bar": [1.5, 2.5], "quz": {"yolo": "foo"}, "baz": [true, false]}',
+        '{"foo": [[1, 2]], "bar": [1, 2.5], "quz": {"yolo": "foo", "yolo2": 42}, "baz": [true, false]}'
+    ]
+
+    for document in documents:
+        errors = []
+        expected = document_to_object(document, specs, errors=[])
+        object = document_to_object(document, specs, errors=errors, copy_on_write=True)
+        assert object == expected
+        assert type(object['baz']) is tuple
+
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('{"foo": [[1, "2"]], "bar": [], "quz": {"yolo": "foo"}, "baz": [true, false]}', specs, copy_on_write=True)
+    assert e_info.value.path == "root.foo.[0].[1]"
+    assert e_info.value.message == "was expecting a JSON number"
+
+def test_bytes_like_document():
+    specs = {'type': 'map', 'fields': {'foo': {'type': 'string'}}}
+
+    document = '{"foo": "bär"}'
+    for encoding in ['utf-8', 'utf-8-sig', 'utf-16', 'utf-32']:
+        encoded_document = document.encode(encoding)
+        assert document_to_object(encoded_document, specs) == {'foo': 'bär'}
+        assert document_to_object(bytearray(encoded_document), specs) == {'foo': 'bär'}
+        assert document_to_object(memoryview(encoded_document), specs) == {'foo': 'bär'}
+
+    # a memoryview over a part of a buffer
+    buffer = bytearray(b'xx{"foo": "bar"}xx')
+    assert document_to_object(memoryview(buffer)[2:-2], specs) == {'foo': 'bar'}
+    assert validate_document(memoryview(buffer)[2:-2], specs) == True
+
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object(memoryview(b'{"foo": 42}'), specs)
+    assert e_info.value.path == "root.foo"
+    assert e_info.value.message == "was expecting a JSON string"
+
+def test_decoded_document():
+    specs = {'type': 'map', 'fields': {'foo': {'type': 'decimal'}, 'bar': {'type': 'tuple', 'values': [{'type': 'integer'}]}}}
+
+    value = {'foo': 42, 'bar': [42]}
+    assert decoded_document_to_object(value, specs) == {'foo': 42.0, 'bar': (42,)}
+    assert validate_decoded_document(value, specs) == True
+    assert value == {'foo': 42, 'bar': [42]}
+
+    with pytest.raises(ValidationError) as e_info:
+        decoded_document_to_object({'foo': "42", 'bar': [42]}, specs)
+    assert e_info.value.path == "root.foo"
+    assert e_info.value.message == "was expecting a JSON number"
+
+    errors = []
+    assert validate_decoded_document({'foo': 42.0}, specs, errors=errors) == False
+    assert len(errors) == 1
+    assert errors[0].path == "root"
+    assert errors[0].message == "'bar' field was missing"
+
+def test_numpy_lists():
+    numpy = pytest.importorskip('numpy')
+
+    specs = {
+        'type': 'map',
+        'fields': {
+            'integers': {'type': 'list', 'value': {'type': 'integer', 'minimum': {'exclusive': True, 'value': 0}, 'maximum': 100}},
+            'decimals': {'type': 'list', 'value': {'type': 'decimal', 'maximum': {'exclusive': True, 'value': 1.5}}},
+            'optionals': {'type': 'list', 'value': {'type': 'integer', 'option': True}}
+        }
+    }
+
+    warnings = []
+    object = document_to_object('{"integers": [1, 2.0, 100], "decimals": [1, -0.5], "optionals": [1, null]}', specs, warnings=warnings, numeric_lists='numpy')
+    assert object['integers'].dtype == numpy.int64
+    assert object['integers'].tolist() == [1, 2, 100]
+    assert object['decimals'].dtype == numpy.float64
+    assert object['decimals'].tolist() == [1.0, -0.5]
+    assert object['optionals'] == [1, None]
+    assert len(warnings) == 1
+    assert warnings[0].path == "root.integers.[1]"
+    assert warnings[0].message == "may lose precision"
+
+    # same errors and warnings as without NumPy
+    documents = [
+        {'integers': [0, 5.5, 101, 7.5], 'decimals': [1.5, float('nan')], 'optionals': []},
+        {'integers': [1, 'foo', None, 2 ** 70], 'decimals': [True], 'optionals': [1.5]}
+    ]
+    for document in documents:
+        for fail_fast in [False, True]:
+            errors, warnings = [], []
+            object = decoded_document_to_object(document, specs, errors, warnings, fail_fast, numeric_lists='numpy')
+            if not fail_fast:
+                assert object == {'integers': None, 'decimals': None, 'optionals': [1] * len(document['optionals'])}
+
+            expected_errors, expected_warnings = [], []
+            decoded_document_to_object(document, specs, expected_errors, expected_warnings, fail_fast)
+
+            assert [error.args for error in errors] == [error.args for error in expected_errors]
+            assert [warning.args for warning in warnings] == [warning.args for warning in expected_warnings]
+
+    # integers that don't fit in 64 bits
+    specs = {'type': 'list', 'value': {'type': 'integer'}}
+    assert document_to_object('[-9223372036854775808, 9223372036854775807]', specs, numeric_lists='numpy').tolist() == [-2 ** 63, 2 ** 63 - 1]
+
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('[1, 9223372036854775808]', specs, numeric_lists='numpy')
+    assert e_info.value.path == "root.[1]"
+    assert e_info.value.message == "value does not fit in 64 bits"
+
+def test_columnar_lists():
+    numpy = pytest.importorskip('numpy')
+
+    specs = {
+        'type': 'list',
+        'value': {
+            'type': 'map',
+            'fields': {
+                'id': {'type': 'integer', 'minimum': 0},
+                'score': {'type': 'decimal', 'maximum': 1},
+                'valid': {'type': 'flag'},
+                'name': {'type': 'string', 'length': {'maximum': 5}},
+                'kind': {'type': 'enum', 'values': ['foo', 'bar', 'quz']}
+            }
+        }
+    }
+
+    document = '[{"id": 1, "score": 0.5, "valid": true, "name": "foo", "kind": "quz"}, {"kind": "bar", "name": "", "valid": false, "score": 1, "id": 2.0}]'
+
+    warnings = []
+    object = document_to_object(document, specs, warnings=warnings, columnar='dict')
+    assert list(object.keys()) == ['id', 'score', 'valid', 'name', 'kind']
+    assert object['id'].dtype == numpy.int64
+    assert object['id'].tolist() == [1, 2]
+    assert object['score'].dtype == numpy.float64
+    assert object['score'].tolist() == [0.5, 1.0]
+    assert object['valid'].dtype == numpy.bool_
+    assert object['valid'].tolist() == [True, False]
+    assert object['name'].tolist() == ['foo', '']
+    assert object['kind'].dtype == numpy.uint8
+    assert object['kind'].tolist() == [2, 0]
+    assert len(warnings) == 1
+    assert warnings[0].path == "root.[1].id"
+
+    object = document_to_object(document, specs, columnar='structured')
+    assert object.dtype.names == ('id', 'score', 'valid', 'name', 'kind')
+    assert object[1].tolist() == (2, 1.0, False, '', 0)
+    assert object['kind'].tolist() == [2, 0]
+
+    # lists of maps with optional fields are not converted
+    optional_specs = {'type': 'list', 'value': {'type': 'map', 'fields': {'id': {'type': 'integer', 'option': True}}}}
+    assert document_to_object('[{"id": null}]', optional_specs, columnar='dict') == [{'id': None}]
+
+    # same errors and warnings as without NumPy
+    documents = [
+        [
+            {'id': -1, 'score': 2, 'valid': True, 'name': 'foobar', 'kind': 'yolo'},
+            {'id': 1.5, 'score': 0, 'valid': True, 'name': 'foo', 'kind': 'foo'},
+            {'id': 1, 'score': 0, 'valid': True, 'name': 'foo', 'kind': 'foo'}
+        ],
+        [
+            {'id': 1.5, 'score': 0, 'valid': 1, 'name': 'foo', 'kind': 'foo'},
+            {'id': 1, 'score': 0, 'valid': True, 'name': 'foo', 'kind': 'foo', 'bar': 42},
+            None,
+            {'id': 1, 'score': float('nan')}
+        ]
+    ]
+    for document in documents:
+        for fail_fast in [False, True]:
+            errors, warnings = [], []
+            assert decoded_document_to_object(document, specs, errors, warnings, fail_fast, columnar='dict') is None
+
+            expected_errors, expected_warnings = [], []
+            decoded_document_to_object(document, specs, expected_errors, expected_warnings, fail_fast)
+
+            assert [error.args for error in errors] == [error.args for error in expected_errors]
+            assert [warning.args for warning in warnings] == [warning.args for warning in expected_warnings]
+
+def test_array_lists():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'integers': {'type': 'list', 'value': {'type': 'integer', 'maximum': 100}},
+            'decimals': {'type': 'list', 'value': {'type': 'decimal'}},
+            'flags': {'type': 'list', 'value': {'type': 'flag'}},
+            'optionals': {'type': 'list', 'value': {'type': 'flag', 'option': True}}
+        }
+    }
+
+    warnings = []
+    object = document_to_object('{"integers": [1, -2.0], "decimals": [1, 0.5], "flags": [true, false], "optionals": [null]}', specs, warnings=warnings, numeric_lists='array')
+    assert object == {
+        'integers': array.array('q', [1, -2]),
+        'decimals': array.array('d', [1.0, 0.5]),
+        'flags': bytearray([1, 0]),
+        'optionals': [None]
+    }
+    assert len(warnings) == 1
+    assert warnings[0].path == "root.integers.[1]"
+
+    errors = []
+    object = document_to_object('{"integers": [101, true], "decimals": [], "flags": [1], "optionals": []}', specs, errors=errors, numeric_lists='array')
+    assert object == {'integers': None, 'decimals': array.array('d'), 'flags': None, 'optionals': []}
+    assert [(error.path, error.message) for error in errors] == [
+        ("root.integers.[0]", "value must be equal or lower than 100"),
+        ("root.integers.[1]", "was expecting a JSON number"),
+        ("root.flags.[0]", "was expecting a JSON boolean")
+    ]
+
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('[1, -9223372036854775809]', {'type': 'list', 'value': {'type': 'integer'}}, numeric_lists='array')
+    assert e_info.value.path == "root.[1]"
+    assert e_info.value.message == "value does not fit in 64 bits"
+
+def test_records():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'integer'},
+            'bar': {'type': 'list', 'value': {'type': 'map', 'fields': {'quz': {'type': 'string'}}}},
+            'yolo': {'type': 'map', 'fields': {'class': {'type': 'flag'}}, 'option': True}
+        }
+    }
+
+    object = document_to_object('{"foo": 1.0, "bar": [{"quz": "a"}, {"quz": "b"}], "yolo": {"class": true}}', specs, records=True)
+    assert isinstance(object, Record)
+    assert object._fields == ('foo', 'bar', 'yolo')
+    assert object.foo == 1
+    assert [item.quz for item in object.bar] == ['a', 'b']
+    assert not hasattr(object, '__dict__')
+    assert object._asdict()['bar'] == object.bar
+
+    # maps with fields that can't be attributes are kept as dicts
+    assert object.yolo == {'class': True}
+
+    # one record class per specs
+    other_object = document_to_object('{"foo": 1, "bar": [], "yolo": null}', specs, records=True)
+    assert type(other_object) is type(object)
+    assert type(other_object) is not type(object.bar[0])
+    assert other_object != object
+    assert other_object == document_to_object('{"bar": [], "foo": 1, "yolo": null}', specs, records=True)
+
+    # missing fields are set to None
+    errors = []
+    object = document_to_object('{"foo": 1, "yolo": null}', specs, errors=errors, records=True)
+    assert object.bar is None
+    assert len(errors) == 1
+    assert errors[0].message == "'bar' field was missing"
+
+    # the record classes have distinct names
+    object = document_to_object('{"foo": 1, "bar": [{"quz": "a"}], "yolo": null}', specs, records=True)
+    assert type(object).__name__ != type(object.bar[0]).__name__
+    assert repr(object.bar[0]) == f"{type(object.bar[0]).__name__}(quz='a')"
+
+    # records can be pickled
+    other_object = pickle.loads(pickle.dumps(object))
+    assert type(other_object) is type(object)
+    assert type(other_object.bar[0]) is type(object.bar[0])
+    assert other_object == object
+
+    # fields can be named 'self'
+    specs = {'type': 'map', 'fields': {'self': {'type': 'integer'}, 'other': {'type': 'string'}}}
+    object = document_to_object('{"self": 42, "other": "foo"}', specs, records=True)
+    assert object.self == 42
+    assert object.other == 'foo'
+    assert pickle.loads(pickle.dumps(object)) == object
+
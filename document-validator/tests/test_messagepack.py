@@ -0,0 +1,117 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import msgpack_to_object, object_to_msgpack
+from byteplug.document import document_to_object, object_to_document
+from byteplug.document import ValidationError
+from byteplug.document.messagepack import load_msgpack, dump_msgpack
+import json
+import pytest
+
+specs = {
+    'type': 'map',
+    'fields': {
+        'integer': {'type': 'integer', 'minimum': 0},
+        'decimal': {'type': 'decimal'},
+        'tuple': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'string', 'option': True}]},
+        'list': {'type': 'list', 'value': {'type': 'enum', 'values': ['foo', 'bar']}}
+    }
+}
+
+def test_format():
+    values = [
+        (None, b'\xc0'),
+        (False, b'\xc2'),
+        (True, b'\xc3'),
+        (0, b'\x00'),
+        (127, b'\x7f'),
+        (128, b'\xcc\x80'),
+        (65536, b'\xce\x00\x01\x00\x00'),
+        (2 ** 64 - 1, b'\xcf' + b'\xff' * 8),
+        (-1, b'\xff'),
+        (-32, b'\xe0'),
+        (-33, b'\xd0\xdf'),
+        (-2 ** 63, b'\xd3\x80' + b'\x00' * 7),
+        (1.5, b'\xcb\x3f\xf8' + b'\x00' * 6),
+        ('', b'\xa0'),
+        ('bär', b'\xa4b\xc3\xa4r'),
+        ('x' * 32, b'\xd9\x20' + b'x' * 32),
+        ('x' * 256, b'\xda\x01\x00' + b'x' * 256),
+        ([], b'\x90'),
+        ([1, [2]], b'\x92\x01\x91\x02'),
+        ([0] * 16, b'\xdc\x00\x10' + b'\x00' * 16),
+        ({'a': 1}, b'\x81\xa1a\x01'),
+    ]
+
+    for value, data in values:
+        assert dump_msgpack(value) == data
+        assert load_msgpack(data) == value
+
+    value = {str(i): i for i in range(16)}
+    assert dump_msgpack(value)[:3] == b'\xde\x00\x10'
+    assert load_msgpack(dump_msgpack(value)) == value
+
+    # decoder-only formats
+    assert load_msgpack(b'\xca\x3f\xc0\x00\x00') == 1.5
+    assert load_msgpack(b'\xd1\xff\x00') == -256
+    assert load_msgpack(b'\xc4\x02\x00\x01') == b'\x00\x01'
+
+    with pytest.raises(ValueError):
+        dump_msgpack(2 ** 64)
+    with pytest.raises(ValueError):
+        dump_msgpack(-2 ** 63 - 1)
+
+    for data in [b'', b'\xc1', b'\xd4\x01\x00', b'\x92\x01', b'\xa2a', b'\xc0\xc0', b'\xdd\xff\xff\xff\xff', b'\x81\x90\x00', b'\xa1\xff']:
+        with pytest.raises(ValueError):
+            load_msgpack(data)
+
+def test_msgpack_to_object():
+    document = '{"integer": 42, "decimal": 1, "tuple": [true, null], "list": ["foo", "bar"]}'
+    data = dump_msgpack(json.loads(document))
+
+    object = msgpack_to_object(data, specs)
+    assert object == document_to_object(document, specs)
+    assert type(object['decimal']) is float
+    assert msgpack_to_object(bytearray(data), specs) == object
+
+    # same errors and warnings as document_to_object()
+    document = '{"integer": -1.5, "decimal": "1", "tuple": [true], "list": ["quz"], "yolo": 42}'
+    expected_errors, expected_warnings = [], []
+    expected = document_to_object(document, specs, errors=expected_errors, warnings=expected_warnings)
+
+    errors, warnings = [], []
+    assert msgpack_to_object(dump_msgpack(json.loads(document)), specs, errors=errors, warnings=warnings) == expected
+    assert [error.args for error in errors] == [error.args for error in expected_errors]
+    assert [warning.args for warning in warnings] == [warning.args for warning in expected_warnings]
+
+    with pytest.raises(ValidationError) as e_info:
+        msgpack_to_object(b'\x81\xa7integer\xc4\x0242', specs)
+    assert e_info.value.path == "root.integer"
+    assert e_info.value.message == "was expecting a JSON number"
+
+    with pytest.raises(ValidationError) as e_info:
+        msgpack_to_object(b'\x91' * 100000 + b'\x90', {'type': 'list', 'value': {'type': 'integer'}})
+    assert e_info.value.message == "document is nested too deeply"
+
+def test_object_to_msgpack():
+    object = {'integer': 42, 'decimal': 1.5, 'tuple': (True, 'bär'), 'list': ['bar']}
+
+    data = object_to_msgpack(object, specs)
+    assert load_msgpack(data) == json.loads(object_to_document(object, specs))
+    assert msgpack_to_object(data, specs) == object
+
+    with pytest.raises(ValidationError) as e_info:
+        object_to_msgpack({**object, 'integer': -1}, specs)
+    assert e_info.value.path == "root.integer"
+    assert e_info.value.message == "value must be equal or greater than 0"
+
+    # invalid nodes are encoded as nil with lazy validation
+    errors = []
+    data = object_to_msgpack({**object, 'decimal': 1}, specs, errors=errors)
+    assert load_msgpack(data)['decimal'] is None
+    assert len(errors) == 1
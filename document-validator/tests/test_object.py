@@ -6,8 +6,11 @@
 #
 # Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
 
-from byteplug.document import object_to_document
+from byteplug.document import object_to_document, validate_object
+from byteplug.document import iter_object_to_document, write_object_to_document
+from byteplug.document import compile_specs
 from byteplug.document import ValidationError
+import io
 import pytest
 
 # Notes:
@@ -537,3 +540,194 @@ def test_map_type():
     assert errors[1].message == "was expecting an integer"
     assert errors[2].path == "root.quz"
     assert errors[2].message == "was expecting a string"
+
+def test_fail_fast():
+    specs = {'type': 'list', 'value': {'type': 'integer'}}
+
+    with pytest.raises(ValidationError) as e_info:
+        object_to_document([True, 42.5, "foo"], specs)
+    assert e_info.value.path == "root.[0]"
+    assert e_info.value.message == "was expecting an integer"
+
+    # fail-fast mode can also be used with lazy validation
+    errors = []
+    object_to_document([True, 42.5, "foo"], specs, errors=errors, fail_fast=True)
+    assert len(errors) == 1
+    assert errors[0].path == "root.[0]"
+    assert errors[0].message == "was expecting an integer"
+
+    errors = []
+    object_to_document([True, 42.5, "foo"], specs, errors=errors)
+    assert len(errors) == 3
+
+def test_validate_object():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'list', 'value': {'type': 'integer', 'minimum': 0}},
+            'bar': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'string'}]}
+        }
+    }
+
+    assert validate_object({'foo': [1, 2], 'bar': (True, 'baz')}, specs) == True
+
+    with pytest.raises(ValidationError) as e_info:
+        validate_object({'foo': [1, -2], 'bar': (True, 'baz')}, specs)
+    assert e_info.value.path == "root.foo.[1]"
+    assert e_info.value.message == "value must be equal or greater than 0"
+
+    # same errors and warnings as object_to_document()
+    object = {'foo': [1.5, -2, None], 'quz': 42}
+
+    expected_errors, expected_warnings = [], []
+    object_to_document(object, specs, errors=expected_errors, warnings=expected_warnings)
+
+    errors, warnings = [], []
+    assert validate_object(object, specs, errors=errors, warnings=warnings) == False
+    assert [error.args for error in errors] == [error.args for error in expected_errors]
+    assert [warning.args for warning in warnings] == [warning.args for warning in expected_warnings]
+
+def test_no_dump():
+    specs = {'type': 'map', 'fields': {'foo': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'decimal'}]}}}
+
+    # the document is not encoded (nor generated) when it's not dumped
+    object = {'foo': (True, 1.5)}
+    assert object_to_document(object, specs, no_dump=True) == {'foo': [True, 1.5]}
+    assert object_to_document(object, compile_specs(specs, generate=True), no_dump=True) == {'foo': [True, 1.5]}
+    assert object_to_document(object, compile_specs(specs, generate=True)) == '{"foo": [true, 1.5]}'
+
+def test_iter_object_to_document():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'list', 'value': {'type': 'integer', 'minimum': 0}, 'length': {'maximum': 3}},
+            'bar': {'type': 'tuple', 'values': [{'type': 'flag'}, {'type': 'string', 'option': True}]},
+            'quz': {'type': 'list', 'value': {'type': 'map', 'fields': {'yolo': {'type': 'enum', 'values': ['foo']}}}}
+        }
+    }
+
+    objects = [
+        {'foo': [1, 2], 'bar': (True, 'bär "baz"'), 'quz': [{'yolo': 'foo'}, {'yolo': 'foo'}]},
+        {'quz': [], 'bar': (False, None), 'foo': []},
+        {'foo': [1.5, -2, None], 'bar': [True, 'baz'], 'quz': [{}, {'yolo': 'bar', 42: 'foo'}], 'yolo': 42},
+        {'foo': [1, 2, 3, 4], 'bar': (True,), 'quz': None},
+        [],
+        None
+    ]
+
+    for object in objects:
+        for fail_fast in [False, True]:
+            expected_errors, expected_warnings = [], []
+            expected = object_to_document(object, specs, errors=expected_errors, warnings=expected_warnings, fail_fast=fail_fast)
+
+            for chunk_size in [1, 10, 65536]:
+                errors, warnings = [], []
+                chunks = list(iter_object_to_document(object, specs, errors=errors, warnings=warnings,
+                    fail_fast=fail_fast, chunk_size=chunk_size))
+
+                assert [error.args for error in errors] == [error.args for error in expected_errors]
+                assert [warning.args for warning in warnings] == [warning.args for warning in expected_warnings]
+
+                # the output is incomplete in fail-fast mode if there are
+                # errors
+                if not (fail_fast and errors):
+                    assert ''.join(chunks) == expected
+
+                if chunk_size == 1:
+                    assert all(len(chunk) > 0 for chunk in chunks)
+
+    stream = io.StringIO()
+    write_object_to_document(objects[0], specs, stream, chunk_size=16)
+    assert stream.getvalue() == object_to_document(objects[0], specs)
+
+    # the first error is raised as soon as it occurs, after the chunks that
+    # were produced before
+    chunks = []
+    with pytest.raises(ValidationError) as e_info:
+        for chunk in iter_object_to_document({'foo': [1, -1], 'bar': (True, None), 'quz': []}, specs, chunk_size=1):
+            chunks.append(chunk)
+    assert e_info.value.path == "root.foo.[1]"
+    assert e_info.value.message == "value must be equal or greater than 0"
+    assert ''.join(chunks) == '{"foo": [1, '
+
+def test_numpy_arrays():
+    numpy = pytest.importorskip('numpy')
+
+    specs = {
+        'type': 'map',
+        'fields': {
+            'integers': {'type': 'list', 'value': {'type': 'integer', 'minimum': 0, 'maximum': {'exclusive': True, 'value': 10}}},
+            'decimals': {'type': 'list', 'value': {'type': 'decimal'}, 'length': {'maximum': 3}},
+            'flags': {'type': 'list', 'value': {'type': 'flag'}}
+        }
+    }
+
+    object = {
+        'integers': numpy.arange(10, dtype=numpy.uint8),
+        'decimals': numpy.array([1.5, numpy.nan], dtype=numpy.float32),
+        'flags': numpy.array([True, False])
+    }
+    assert object_to_document(object, specs) == '{"integers": [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], "decimals": [1.5, NaN], "flags": [true, false]}'
+    assert object_to_document(object, specs, no_dump=True)['integers'] == list(range(10))
+    assert validate_object(object, specs) == True
+    assert ''.join(iter_object_to_document(object, specs)) == object_to_document(object, specs)
+
+    # same errors as the equivalent lists, except for arrays of the wrong type
+    # which are reported as a whole
+    object = {
+        'integers': numpy.array([-1, 3, 10, 12]),
+        'decimals': numpy.zeros(4),
+        'flags': numpy.array([1, 0])
+    }
+    errors = []
+    assert object_to_document(object, specs, errors=errors, no_dump=True) == {'integers': None, 'decimals': None, 'flags': None}
+    assert [(error.path, error.message) for error in errors] == [
+        ("root.integers.[0]", "value must be equal or greater than 0"),
+        ("root.integers.[2]", "value must be strictly lower than 10"),
+        ("root.integers.[3]", "value must be strictly lower than 10"),
+        ("root.decimals", "length must be equal or lower than 3"),
+        ("root.flags", "was expecting an array of booleans")
+    ]
+
+    with pytest.raises(ValidationError) as e_info:
+        validate_object({**object, 'integers': numpy.arange(3)}, specs)
+    assert e_info.value.path == "root.decimals"
+
+    # structured arrays in place of lists of maps
+    specs = {
+        'type': 'list',
+        'value': {
+            'type': 'map',
+            'fields': {
+                'id': {'type': 'integer', 'minimum': 0},
+                'kind': {'type': 'enum', 'values': ['foo', 'bar']},
+                'name': {'type': 'string', 'length': {'maximum': 3}}
+            }
+        }
+    }
+
+    object = numpy.array([(1, 'foo', 'a'), (2, 'bar', 'bc')], dtype=[('id', 'i8'), ('kind', 'U3'), ('name', 'O')])
+    assert object_to_document(object, specs) == '[{"id": 1, "kind": "foo", "name": "a"}, {"id": 2, "kind": "bar", "name": "bc"}]'
+
+    # enums can be the index of their value in the sorted values
+    object = numpy.array([(1, 0, 'a'), (2, 1, 'bc')], dtype=[('id', 'i8'), ('kind', 'u1'), ('name', 'U2')])
+    assert object_to_document(object, specs) == '[{"id": 1, "kind": "bar", "name": "a"}, {"id": 2, "kind": "foo", "name": "bc"}]'
+
+    object = numpy.array([(1, 'foo', 'a'), (-2, 'quz', 'abcd'), (3, 'bar', None)], dtype=[('id', 'i8'), ('kind', 'U3'), ('name', 'O')])
+    errors = []
+    object_to_document(object, specs, errors=errors)
+    assert [(error.path, error.message) for error in errors] == [
+        ("root.[1].id", "value must be equal or greater than 0"),
+        ("root.[1].kind", "enum value is invalid"),
+        ("root.[1].name", "length must be equal or lower than 3"),
+        ("root.[2].name", "was expecting a string")
+    ]
+
+    errors = []
+    object_to_document(numpy.zeros(2, dtype=[('id', 'f8'), ('foo', 'i8')]), specs, errors=errors)
+    assert [(error.path, error.message) for error in errors] == [
+        ("root", "'id' field was expecting an array of integers"),
+        ("root", "'foo' field was unexpected"),
+        ("root", "'kind' field was missing"),
+        ("root", "'name' field was missing")
+    ]
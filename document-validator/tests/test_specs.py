@@ -411,6 +411,11 @@ def test_string_type():
     validate_specs(specs | {'pattern': '^[a-z]+(-[a-z]+)*$'})
     string_value_property_test(specs, 'pattern', 'root')
 
+    with pytest.raises(ValidationError) as e_info:
+        validate_specs(specs | {'pattern': '^[a-z+$'})
+    assert e_info.value.path == "root.pattern"
+    assert e_info.value.message == "value must be a valid regex"
+
     # test the 'option' property
     option_property_test(specs, 'root')
 
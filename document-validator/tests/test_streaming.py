@@ -0,0 +1,287 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import document_to_object, validate_document
+from byteplug.document import iter_document_items, validate_document_stream, iter_documents_to_objects
+from byteplug.document import document_file_to_object, validate_document_file, iter_document_file_to_objects
+from byteplug.document import ValidationError
+import byteplug.document.files as files_module
+import io
+import json
+import pytest
+
+specs = {
+    'type': 'list',
+    'value': {
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'integer', 'minimum': 0},
+            'bar': {'type': 'string', 'option': True},
+            'quz': {'type': 'tuple', 'values': [{'type': 'decimal'}, {'type': 'flag'}]}
+        }
+    },
+    'length': {'maximum': 3}
+}
+
+def errors_of(errors):
+    return [(type(error), error.args) for error in errors]
+
+def test_iter_document_items():
+    documents = [
+        '[{"foo": 42, "bar": "bär", "quz": [1.5e10, true]}, {"foo": 12345678901234567890, "bar": null, "quz": [-1, false]}]',
+        ' [ {"foo" : 1, "bar": "\\"]", "quz": [1E-5, true]} ,\n{"foo": 2.0, "bar": "\\u00e4", "quz": [0, false]} ] \n',
+        '[{"foo": -1, "quz": [1, 1]}, {"foo": 1, "bar": 42, "quz": []}, {"yolo": 42}]',
+        '[]',
+    ]
+
+    for document in documents:
+        expected_errors, expected_warnings = [], []
+        expected = document_to_object(document, specs, errors=expected_errors, warnings=expected_warnings)
+
+        # the chunks end in the middle of numbers, strings, literals, and
+        # UTF-8 encoded characters
+        for chunk_size in [1, 2, 3, 7, 65536]:
+            for stream in [io.StringIO(document), io.BytesIO(document.encode('utf-8'))]:
+                errors, warnings = [], []
+                items = list(iter_document_items(stream, specs, errors=errors, warnings=warnings, chunk_size=chunk_size))
+
+                assert items == expected
+                assert errors_of(errors) == errors_of(expected_errors)
+                assert errors_of(warnings) == errors_of(expected_warnings)
+
+def test_iter_document_items_errors():
+    # the first error is raised, and the items that were read before are
+    # yielded
+    document = '[{"foo": 1, "bar": null, "quz": [1, true]}, {"foo": -1, "bar": null, "quz": [1, true]}]'
+    iterator = iter_document_items(io.StringIO(document), specs, chunk_size=4)
+    assert next(iterator) == {'foo': 1, 'bar': None, 'quz': (1.0, True)}
+    with pytest.raises(ValidationError) as e_info:
+        next(iterator)
+    assert e_info.value.path == "root.[1].foo"
+    assert e_info.value.message == "value must be equal or greater than 0"
+
+    # the list is reported as soon as it's too long
+    item = '{"foo": 1, "bar": null, "quz": [1, true]}'
+    iterator = iter_document_items(io.StringIO('[' + ', '.join([item] * 4) + ', '), specs)
+    assert len([next(iterator) for _ in range(3)]) == 3
+    with pytest.raises(ValidationError) as e_info:
+        next(iterator)
+    assert e_info.value.path == "root"
+    assert e_info.value.message == "length must be equal or lower than 3"
+
+    # the minimum length is checked at the end of the array
+    list_specs = {'type': 'list', 'value': {'type': 'integer'}, 'length': {'minimum': 2}}
+    errors = []
+    assert list(iter_document_items(io.StringIO('[42]'), list_specs, errors=errors)) == [42]
+    assert len(errors) == 1
+    assert errors[0].path == "root"
+    assert errors[0].message == "length must be equal or greater than 2"
+
+    # documents that are not JSON arrays are reported like document_to_object()
+    with pytest.raises(ValidationError) as e_info:
+        list(iter_document_items(io.StringIO('{"foo": 42}'), list_specs))
+    assert e_info.value.path == "root"
+    assert e_info.value.message == "was expecting a JSON array"
+
+    optional_specs = {'type': 'list', 'value': {'type': 'integer'}, 'option': True}
+    assert list(iter_document_items(io.StringIO(' null '), optional_specs)) == []
+
+    # invalid JSON documents
+    for document in ['', '[', '[42', '[42,]', '[42 42]', '[,]', '[42] 42', '[4x]', 'nul']:
+        with pytest.raises(ValueError):
+            list(iter_document_items(io.StringIO(document), list_specs, chunk_size=2))
+
+    # a malformed item is reported without reading the rest of the document,
+    # at the same position as the standard library json.loads() does
+    list_specs = {'type': 'list', 'value': {'type': 'map', 'fields': {'foo': {'type': 'integer'}}}}
+    document = '[\n  {"foo": 1},\n  {"foo": 2},\n  {"foo" 3}' + ',\n  {"foo": 4}' * 10000 + '\n]'
+    for chunk_size in [1, 7, 16]:
+        stream = io.StringIO(document)
+        with pytest.raises(json.JSONDecodeError) as e_info:
+            list(iter_document_items(stream, list_specs, chunk_size=chunk_size))
+        assert stream.tell() < 100
+
+        with pytest.raises(json.JSONDecodeError) as expected_info:
+            json.loads(document)
+        assert str(e_info.value) == str(expected_info.value)
+        assert (e_info.value.pos, e_info.value.lineno, e_info.value.colno) == \
+            (expected_info.value.pos, expected_info.value.lineno, expected_info.value.colno)
+
+def test_validate_document_stream():
+    list_specs = {'type': 'list', 'value': {'type': 'integer', 'minimum': 0}, 'length': {'minimum': 2, 'maximum': 3}}
+    map_specs = {'type': 'map', 'fields': {'foo': {'type': 'integer'}}}
+
+    # the items are not validated if the length of the list is invalid
+    documents = [
+        (specs, '[{"foo": 42, "bar": "bär", "quz": [1.5e10, true]}, {"foo": 2.0, "quz": [0, false]}]'),
+        (specs, '[{"foo": -1, "quz": [1, 1]}, {"foo": 1, "bar": 42, "quz": []}, {"yolo": 42}]'),
+        (list_specs, '[-1, 1.0, -2]'),
+        (list_specs, '[-1, 1.0, -2, 3]'),
+        (list_specs, '[-1]'),
+        (list_specs, '[]'),
+        (list_specs, '{"foo": 42}'),
+        (map_specs, '{"foo": 42.5}'),
+        (map_specs, '[' * 100000 + ']' * 100000)
+    ]
+
+    for specs_, document in documents:
+        for fail_fast in [False, True]:
+            expected_errors, expected_warnings = [], []
+            expected = validate_document(document, specs_, errors=expected_errors, warnings=expected_warnings, fail_fast=fail_fast)
+
+            for chunk_size in [1, 3, 65536]:
+                errors, warnings = [], []
+                assert validate_document_stream(io.StringIO(document), specs_, errors=errors, warnings=warnings,
+                    fail_fast=fail_fast, chunk_size=chunk_size) == expected
+
+                assert errors_of(errors) == errors_of(expected_errors)
+                assert errors_of(warnings) == errors_of(expected_warnings)
+
+    with pytest.raises(ValidationError) as e_info:
+        validate_document_stream(io.StringIO('[1, -1, -2]'), list_specs)
+    assert e_info.value.path == "root.[1]"
+    assert e_info.value.message == "value must be equal or greater than 0"
+
+    # invalid JSON documents are reported even if an item is invalid
+    for document in ['[-1', '[-1, 1, 2, 3, 4', '[-1, 1,]', '[-1] 42']:
+        with pytest.raises(ValueError):
+            validate_document_stream(io.StringIO(document), list_specs, errors=[])
+
+def test_document_files(tmp_path):
+    path = tmp_path / "document.json"
+
+    document = '[{"foo": 42, "bar": "bär", "quz": [1.5e10, true]}, {"foo": 1, "bar": null, "quz": [-1, false]}]'
+    path.write_bytes(document.encode('utf-8'))
+    assert document_file_to_object(path, specs) == document_to_object(document, specs)
+    assert validate_document_file(str(path), specs, chunk_size=16) == True
+
+    path.write_bytes('{"foo": -1}'.encode('utf-16'))
+    errors = []
+    assert document_file_to_object(path, {'type': 'map', 'fields': {'foo': {'type': 'integer'}}}, errors=errors) == {'foo': -1}
+    assert errors == []
+
+    path.write_bytes(b'[{"foo": -1, "bar": null, "quz": [1, true]}]')
+    with pytest.raises(ValidationError) as e_info:
+        document_file_to_object(path, specs)
+    assert e_info.value.path == "root.[0].foo"
+    with pytest.raises(ValidationError) as e_info:
+        validate_document_file(path, specs)
+    assert e_info.value.path == "root.[0].foo"
+
+    # empty files can't be memory-mapped
+    path.write_bytes(b'')
+    with pytest.raises(ValueError):
+        document_file_to_object(path, specs)
+    with pytest.raises(ValueError):
+        validate_document_file(path, specs)
+
+    path.write_bytes(b'{"foo": 42, "bar": [1]}\n\n{"foo": -1, "bar": []}\n{"foo": 1')
+    ndjson_specs = {'type': 'map', 'fields': {'foo': {'type': 'integer', 'minimum': 0}, 'bar': {'type': 'list', 'value': {'type': 'decimal'}}}}
+
+    statistics = {}
+    records = list(iter_document_file_to_objects(path, ndjson_specs, statistics=statistics))
+    assert [(record[0], record[1]) for record in records] == [(1, {'foo': 42, 'bar': [1.0]}), (3, {'foo': None, 'bar': []}), (4, None)]
+    assert statistics['bytes'] == path.stat().st_size
+
+    path.write_bytes(b'')
+    assert list(iter_document_file_to_objects(path, ndjson_specs)) == []
+
+def test_document_files_unmapped(tmp_path, monkeypatch):
+    # the files are unmapped once the documents are converted, even if they're
+    # invalid, or if the iteration over the documents stops early
+    buffers = []
+    original_map_file = files_module.map_file
+    def map_file(path, sequential=False):
+        buffers.append(original_map_file(path, sequential))
+        return buffers[-1]
+    monkeypatch.setattr(files_module, 'map_file', map_file)
+
+    path = tmp_path / "document.json"
+    path.write_bytes(b'[{"foo": -1, "bar": null, "quz": [1, true]}]')
+    with pytest.raises(ValidationError):
+        document_file_to_object(path, specs)
+    with pytest.raises(ValidationError):
+        validate_document_file(path, specs)
+    assert document_file_to_object(path, specs, errors=[]) == [{'foo': None, 'bar': None, 'quz': (1.0, True)}]
+
+    path.write_bytes(b'[1, 2')
+    with pytest.raises(ValueError):
+        document_file_to_object(path, specs)
+
+    path.write_bytes(b'{"foo": 42, "bar": [1]}\n{"foo": 1, "bar": []}\n')
+    ndjson_specs = {'type': 'map', 'fields': {'foo': {'type': 'integer'}, 'bar': {'type': 'list', 'value': {'type': 'decimal'}}}}
+    assert len(list(iter_document_file_to_objects(path, ndjson_specs))) == 2
+    iterator = iter_document_file_to_objects(path, ndjson_specs)
+    next(iterator)
+    iterator.close()
+
+    assert len(buffers) == 6
+    assert all(buffer.closed for buffer in buffers)
+
+    # which lets the file be removed
+    path.unlink()
+    assert not path.exists()
+
+def test_iter_documents_to_objects():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'integer', 'minimum': 0},
+            'bar': {'type': 'list', 'value': {'type': 'decimal'}}
+        }
+    }
+
+    lines = [
+        b'{"foo": 42, "bar": [1, 2.5]}\n',
+        b'\n',
+        b'{"foo": -1, "bar": ["1"]}\r\n',
+        b'{"foo": 42, \n',
+        b'{"foo": 1.0, "bar": []}'
+    ]
+
+    statistics = {}
+    records = list(iter_documents_to_objects(io.BytesIO(b''.join(lines)), specs, statistics=statistics))
+    assert [record[0] for record in records] == [1, 3, 4, 5]
+
+    assert records[0][1:] == ({'foo': 42, 'bar': [1.0, 2.5]}, [], [])
+
+    line_no, object, errors, warnings = records[1]
+    assert object == {'foo': None, 'bar': [None]}
+    assert [(error.path, error.message) for error in errors] == [
+        ("root.foo", "value must be equal or greater than 0"),
+        ("root.bar.[0]", "was expecting a JSON number")
+    ]
+
+    line_no, object, errors, warnings = records[2]
+    assert object is None
+    assert [(error.path, error.message) for error in errors] == [("root", "document is not valid JSON")]
+
+    line_no, object, errors, warnings = records[3]
+    assert object == {'foo': 1, 'bar': []}
+    assert [(warning.path, warning.message) for warning in warnings] == [("root.foo", "may lose precision")]
+
+    assert statistics['documents'] == 4
+    assert statistics['invalid_documents'] == 2
+    assert statistics['bytes'] == len(b''.join(lines))
+    assert statistics['seconds'] > 0
+
+    # the size of the lines of text streams is counted in bytes
+    statistics = {}
+    list(iter_documents_to_objects(io.StringIO('{"foo": 1, "bar": []}\n"bär"\n'), specs, statistics=statistics))
+    assert statistics['bytes'] == len('{"foo": 1, "bar": []}\n"bär"\n'.encode('utf-8'))
+
+    # invalid documents can be skipped, or stop the iteration
+    records = list(iter_documents_to_objects(io.BytesIO(b''.join(lines)), specs, on_invalid='skip'))
+    assert [record[0] for record in records] == [1, 5]
+
+    records = list(iter_documents_to_objects(io.BytesIO(b''.join(lines)), specs, on_invalid='stop'))
+    assert [record[0] for record in records] == [1, 3]
+
+    # only the first error of each document is reported in fail-fast mode
+    records = list(iter_documents_to_objects(io.StringIO(b''.join(lines).decode()), specs, fail_fast=True))
+    assert [len(record[2]) for record in records] == [0, 1, 1, 0]
@@ -0,0 +1,95 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import document_to_object, object_to_document
+from byteplug.document import ValidationError
+from byteplug.document.tiering import set_promotion_threshold
+from byteplug.document.tiering import get_specs_tier, get_specs_tiers, reset_specs_tiers
+from byteplug.document.cache import clear_cache
+import pytest
+
+@pytest.fixture(autouse=True)
+def tiering():
+    reset_specs_tiers()
+    clear_cache()
+    set_promotion_threshold(3)
+    yield
+    set_promotion_threshold(100)
+    reset_specs_tiers()
+    clear_cache()
+
+def test_promotion():
+    specs = {
+        'type': 'map',
+        'fields': {
+            'foo': {'type': 'integer', 'maximum': 42}
+        }
+    }
+
+    assert get_specs_tier(specs) is None
+
+    assert document_to_object('{"foo": 42}', specs) == {'foo': 42}
+    assert get_specs_tier(specs) == {'specs': specs, 'tier': 'interpreted', 'calls': 1}
+
+    assert object_to_document({'foo': 42}, specs) == '{"foo": 42}'
+    assert get_specs_tier(specs) == {'specs': specs, 'tier': 'interpreted', 'calls': 2}
+
+    # the third call promotes the specs
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('{"foo": 43}', specs)
+    assert e_info.value.path == "root.foo"
+    assert e_info.value.message == "value must be equal or lower than 42"
+    assert get_specs_tier(specs) == {'specs': specs, 'tier': 'generated', 'calls': 3}
+
+    assert document_to_object('{"foo": 42}', specs) == {'foo': 42}
+    assert object_to_document({'foo': 42}, specs) == '{"foo": 42}'
+    assert get_specs_tier(specs) == {'specs': specs, 'tier': 'generated', 'calls': 5}
+
+    # specs are tracked by identity
+    other_specs = {'type': 'map', 'fields': {'foo': {'type': 'integer'}}}
+    document_to_object('{"foo": 42}', other_specs)
+
+    assert get_specs_tiers() == [
+        {'specs': specs, 'tier': 'generated', 'calls': 5},
+        {'specs': other_specs, 'tier': 'interpreted', 'calls': 1}
+    ]
+
+def test_no_promotion():
+    set_promotion_threshold(None)
+
+    specs = {'type': 'flag'}
+    for _ in range(10):
+        document_to_object('true', specs)
+
+    assert get_specs_tier(specs) == {'specs': specs, 'tier': 'interpreted', 'calls': 10}
+
+def test_structurally_equal_specs():
+    # structurally equal specs share the same compiled specs, and therefore
+    # the same tier and number of calls
+    for _ in range(3):
+        specs = {'type': 'list', 'value': {'type': 'integer'}}
+        document_to_object('[42]', specs)
+
+    assert get_specs_tier(specs) == {'specs': specs, 'tier': 'generated', 'calls': 3}
+
+def test_modified_specs():
+    # a modified specs must be a new specs object, it's then validated against
+    # its new structure (even if the original specs was promoted)
+    specs = {'type': 'integer', 'minimum': 5}
+    for _ in range(3):
+        assert document_to_object('7', specs) == 7
+    assert get_specs_tier(specs)['tier'] == 'generated'
+
+    other_specs = {**specs, 'maximum': 6}
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('7', other_specs)
+    assert e_info.value.message == "value must be equal or lower than 6"
+    assert get_specs_tier(other_specs) == {'specs': other_specs, 'tier': 'interpreted', 'calls': 1}
+
+    other_specs = {**specs, 'minimum': 1}
+    assert document_to_object('3', other_specs) == 3
@@ -0,0 +1,168 @@
+# Copyright (c) 2022 - Byteplug Inc.
+#
+# This source file is part of the Byteplug toolkit for the Python programming
+# language which is released under the OSL-3.0 license. Please refer to the
+# LICENSE file that can be found at the root of the project directory.
+#
+# Written by Jonathan De Wachter <jonathan.dewachter@byteplug.io>, June 2022
+
+from byteplug.document import compile_specs
+from byteplug.document import document_to_object, object_to_document, decoded_document_to_object
+from byteplug.document import object_to_binary, binary_to_object
+from byteplug.document import ValidationError
+from byteplug.document.traversal import adjust_node_iteratively
+import byteplug.document.document as document_module
+import byteplug.document.object as object_module
+import json
+import pytest
+
+specs = {
+    'type': 'map',
+    'fields': {
+        'foo': {'type': 'integer', 'minimum': 0},
+        'bar': {
+            'type': 'list',
+            'value': {
+                'type': 'tuple',
+                'values': [{'type': 'flag'}, {'type': 'decimal', 'option': True}]
+            },
+            'length': {'maximum': 2}
+        },
+        'quz': {
+            'type': 'map',
+            'fields': {'yolo': {'type': 'enum', 'values': ['foo', 'bar']}}
+        }
+    }
+}
+
+def errors_of(errors):
+    return [(type(error), error.args) for error in errors]
+
+def test_adjust_node_iteratively():
+    compiled = compile_specs(specs)
+
+    documents = [
+        '{"foo": 42, "bar": [[true, 1], [false, null]], "quz": {"yolo": "foo"}}',
+        '{"foo": -1.5, "bar": [[1, true], [null, 1], []], "quz": {"yolo": "quz", "baz": 1}}',
+        '{"foo": 42, "bar": [[1, true], [null, 1]], "yolo": {}}',
+        '{"bar": {}, "quz": []}',
+        '[]'
+    ]
+
+    for document in documents:
+        expected_errors, expected_warnings = [], []
+        expected = document_module.adjust_node("root", json.loads(document), compiled, expected_errors, expected_warnings)
+
+        errors, warnings = [], []
+        adjusted_node = adjust_node_iteratively("root", json.loads(document), compiled, errors, warnings,
+            document_module.adjust_node_map, document_module.check_node_map, tuple)
+
+        assert adjusted_node == expected
+        assert errors_of(errors) == errors_of(expected_errors)
+        assert errors_of(warnings) == errors_of(expected_warnings)
+
+        errors, warnings = [], []
+        adjusted_node = adjust_node_iteratively("root", json.loads(document), compiled, errors, warnings,
+            document_module.adjust_node_map, document_module.check_node_map, tuple, validate_only=True)
+
+        assert adjusted_node is None
+        assert errors_of(errors) == errors_of(expected_errors)
+        assert errors_of(warnings) == errors_of(expected_warnings)
+
+    objects = [
+        {'foo': 42, 'bar': [(True, 1.0), (False, None)], 'quz': {'yolo': 'foo'}},
+        {'foo': 42.0, 'bar': [[True, 1.0]], 'quz': {'yolo': 'foo', 42: 'bar'}},
+        {'foo': 42, 'bar': [(1, True), (None, 1)], 'yolo': {}},
+        None
+    ]
+
+    for object in objects:
+        expected_errors, expected_warnings = [], []
+        expected = object_module.adjust_node("root", object, compiled, expected_errors, expected_warnings)
+
+        errors, warnings = [], []
+        adjusted_node = adjust_node_iteratively("root", object, compiled, errors, warnings,
+            object_module.adjust_node_map, object_module.check_node_map, list)
+
+        assert adjusted_node == expected
+        assert errors_of(errors) == errors_of(expected_errors)
+        assert errors_of(warnings) == errors_of(expected_warnings)
+
+        errors, warnings = [], []
+        adjusted_node = adjust_node_iteratively("root", object, compiled, errors, warnings,
+            object_module.adjust_node_map, object_module.check_node_map, list, validate_only=True)
+
+        assert adjusted_node is None
+        assert errors_of(errors) == errors_of(expected_errors)
+        assert errors_of(warnings) == errors_of(expected_warnings)
+
+def test_deeply_nested_specs():
+    depth = 500
+
+    nested_specs = {'type': 'integer', 'minimum': 0}
+    for _ in range(depth):
+        nested_specs = {'type': 'list', 'value': nested_specs}
+
+    compiled = compile_specs(nested_specs, generate=True)
+    assert compiled.depth == depth
+    assert compiled.document_function is None
+
+    object_ = document_to_object('[' * depth + '42' + ']' * depth, compiled)
+    for _ in range(depth):
+        object_ = object_[0]
+    assert object_ == 42
+
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('[' * depth + '-1' + ']' * depth, compiled)
+    assert e_info.value.path == 'root' + '.[0]' * depth
+    assert e_info.value.message == "value must be equal or greater than 0"
+
+    object_ = 42
+    for _ in range(depth):
+        object_ = [object_]
+    assert object_to_document(object_, compiled) == '[' * depth + '42' + ']' * depth
+
+def test_arbitrarily_nested_specs():
+    # specs nested more deeply than the recursion limit of the interpreter
+    depth = 5000
+
+    nested_specs = {'type': 'integer', 'minimum': 0}
+    for _ in range(depth):
+        nested_specs = {'type': 'list', 'value': nested_specs}
+
+    compiled = compile_specs(nested_specs)
+    assert compiled.depth == depth
+
+    # the specs is too deep to be fingerprinted, it's compiled without the
+    # cache
+    assert document_to_object('[]', nested_specs) == []
+    assert object_to_document([], nested_specs) == '[]'
+
+    object_ = 42
+    for _ in range(depth):
+        object_ = [object_]
+
+    object_ = decoded_document_to_object(object_, nested_specs)
+    for _ in range(depth):
+        object_ = object_[0]
+    assert object_ == 42
+
+    assert binary_to_object(object_to_binary([], nested_specs), nested_specs) == []
+    assert binary_to_object(object_to_binary([[]], compiled), compiled) == [[]]
+
+    # deep maps are kept as dicts
+    map_specs = {'type': 'map', 'fields': {'foo': nested_specs}}
+    assert document_to_object('{"foo": []}', map_specs, records=True) == {'foo': []}
+
+def test_too_deeply_nested_document():
+    specs = {'type': 'list', 'value': {'type': 'integer'}}
+
+    with pytest.raises(ValidationError) as e_info:
+        document_to_object('[' * 100000 + ']' * 100000, specs)
+    assert e_info.value.path == "root"
+    assert e_info.value.message == "document is nested too deeply"
+
+    errors = []
+    document_to_object('[' * 100000 + ']' * 100000, specs, errors=errors)
+    assert errors[0].path == "root"
+    assert errors[0].message == "document is nested too deeply"
@@ -12,7 +12,8 @@ from flask import Flask, request
 from flask_cors import CORS
 from byteplug.document.object import object_to_document
 from byteplug.document.specs import validate_specs
-from byteplug.document.document import document_to_object
+from byteplug.document.backends import get_json_backend
+from byteplug.document.document import load_document, decoded_document_to_object
 from byteplug.document.exception import ValidationError, ValidationWarning
 from byteplug.endpoints.record import Record
 from byteplug.endpoints.endpoint import Operate
@@ -167,9 +168,6 @@ class Endpoints:
                 is_body_json = None
                 if has_body:
                     is_body_json = request.is_json
-                json_body = None
-                if is_body_json:
-                    json_body = request.json
 
                 document = None
                 if endpoint.specs['request']:
@@ -179,8 +177,23 @@ class Endpoints:
                     if not is_body_json:
                         return body_not_json_format()
 
-                    errors, warnings = [], []
-                    document = document_to_object(json_body, endpoint.specs['request'], errors=errors, warnings=warnings)
+                    # The raw body is parsed once (rather than having Flask
+                    # parse it first) with the configured JSON backend; only
+                    # the parsing errors (ValueError, whatever the backend)
+                    # mean the body is not JSON.
+                    body = request.get_data(cache=False)
+
+                    try:
+                        value = load_document(body, get_json_backend())
+                    except ValueError:
+                        return body_not_json_format()
+                    except RecursionError:
+                        errors = [ValidationError("root", "document is nested too deeply")]
+                        warnings = []
+                    else:
+                        errors, warnings = [], []
+                        document = decoded_document_to_object(value, endpoint.specs['request'], errors=errors, warnings=warnings)
+
                     if len(errors) > 0:
                         return json_body_specs_mismatch(errors, warnings)
 
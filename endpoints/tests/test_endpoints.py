@@ -74,7 +74,7 @@ def test_endpoints():
     server = start_server(endpoints, 8081)
 
     url = build_url('/foobar', 8081)
-    response = requests.post(url, json='"foo"')
+    response = requests.post(url, json="foo")
     assert response.status_code == 200
     assert response.json() == "bar"
 
@@ -184,9 +184,19 @@ def test_request():
         'description': "The format of the body in the HTTP request must be JSON."
     }
 
+    headers = {"Content-Type": "application/json"}
+    response = requests.post(url, data="Hello world!", headers=headers)
+    assert response.status_code == 400
+    assert response.json() == {
+        'kind': 'client-side-error',
+        'code': 'body-not-json-format',
+        'name': "The body is not JSON format",
+        'description': "The format of the body in the HTTP request must be JSON."
+    }
+
     # test triggering the 'json-body-specs-mismatch' client-side error
     url = build_url('/bar', 8083)
-    response = requests.post(url, json="42")
+    response = requests.post(url, json=42)
     assert response.status_code == 400
     assert response.json() == {
         'kind': 'client-side-error',
@@ -199,12 +209,62 @@ def test_request():
 
     # test calling the 'bar' endpoint correctly
     url = build_url('/bar', 8083)
-    response = requests.post(url, json='"Hello world!"')
+    response = requests.post(url, json="Hello world!")
     assert response.status_code == 204
     assert response.text == ''
 
     stop_server(server, 8083)
 
+def test_request_json_backend():
+    """ Test that the request bodies are parsed with the configured JSON
+    backend, and that its parsing errors are reported as
+    'body-not-json-format'.
+    """
+
+    import json
+    from byteplug.document.backends import JSONBackend
+    from byteplug.document.backends import register_json_backend, unregister_json_backend, set_json_backend
+
+    class BackendError(ValueError):
+        pass
+
+    # The backend reverses the lists, and has its own parsing error.
+    def loads(document):
+        try:
+            return list(reversed(json.loads(document)))
+        except json.JSONDecodeError as error:
+            raise BackendError(str(error)) from None
+
+    @request(List(Integer()).to_object())
+    @endpoint("foo")
+    def foo(document):
+        if document != [2, 1]:
+            raise RuntimeError("the body was not parsed by the backend")
+
+    endpoints = Endpoints("test")
+    endpoints.add_endpoint(foo)
+
+    register_json_backend(JSONBackend('test', loads, json.dumps))
+    set_json_backend('test')
+    try:
+        server = start_server(endpoints, 8089)
+    finally:
+        set_json_backend('json')
+        unregister_json_backend('test')
+
+    url = build_url('/foo', 8089)
+    headers = {"Content-Type": "application/json"}
+
+    response = requests.post(url, data="[1, 2]", headers=headers)
+    assert response.status_code == 204
+
+    for body in [b"[1, 2", b"[1, 2]]", b"\xff"]:
+        response = requests.post(url, data=body, headers=headers)
+        assert response.status_code == 400
+        assert response.json()['code'] == 'body-not-json-format'
+
+    stop_server(server, 8089)
+
 def test_response():
     """ Test response-related functionalities.
 
@@ -337,7 +397,7 @@ def test_errors():
     server = start_server(endpoints, 8085)
 
     url = build_url('/foobar', 8085)
-    response = requests.post(url, json='"foo"')
+    response = requests.post(url, json="foo")
     assert response.status_code == 500
     assert response.json() == {
         'kind': 'error',
@@ -348,7 +408,7 @@ def test_errors():
     }
 
     url = build_url('/foobar', 8085)
-    response = requests.post(url, json='"bar"')
+    response = requests.post(url, json="bar")
     assert response.status_code == 500
     assert response.json() == {
         'kind': 'error',
@@ -358,7 +418,7 @@ def test_errors():
     }
 
     url = build_url('/foobar', 8085)
-    response = requests.post(url, json='"quz"')
+    response = requests.post(url, json="quz")
     assert response.status_code == 500
     assert response.json() == {
         'kind': 'error',
@@ -368,7 +428,7 @@ def test_errors():
     }
 
     url = build_url('/foobar', 8085)
-    response = requests.post(url, json='"yolo"')
+    response = requests.post(url, json="yolo")
     assert response.status_code == 500
     assert response.json() == {
         'kind': 'error',
@@ -376,7 +436,7 @@ def test_errors():
     }
 
     url = build_url('/foobar', 8085)
-    response = requests.post(url, json='"specs-mismatch"')
+    response = requests.post(url, json="specs-mismatch")
     assert response.status_code == 500
     assert response.json() == {
         'kind': 'server-side-error',
@@ -388,7 +448,7 @@ def test_errors():
     }
 
     url = build_url('/foobar', 8085)
-    response = requests.post(url, json='"invalid-error"')
+    response = requests.post(url, json="invalid-error")
     assert response.status_code == 500
     assert response.json() == {
         'kind': 'server-side-error',
@@ -398,7 +458,7 @@ def test_errors():
     }
 
     url = build_url('/foobar', 8085)
-    response = requests.post(url, json='"unhandled-error"')
+    response = requests.post(url, json="unhandled-error")
     assert response.status_code == 500
     assert response.json() == {
         'kind': 'server-side-error',
@@ -484,7 +544,7 @@ def test_adaptor_decorator():
         'quz': String()
     }).to_object()
 
-    document_value = '{"foo": false, "bar": 42, "quz": "Hello world!"}'
+    document_value = {'foo': False, 'bar': 42, 'quz': "Hello world!"}
 
     @request(request_specs)
     @response(String().to_object())